@@ -1,67 +1,266 @@
+import threading
+import time
 import custom_speech_recognition as sr
-import pyaudiowpatch as pyaudio
-from datetime import datetime
+from custom_speech_recognition import dsp
+from custom_speech_recognition.energy import NoiseFloorTracker, buffer_count, ema_thresholds
+from segmenter import StreamingSegmenter
+from calibration_store import CalibrationStore, device_key, noise_stats
 
-RECORD_TIMEOUT = 3
+# Энергия везде (порог, калибровка, трекер фона) — RMS кадра SEGMENT_FRAME_MS уже сведённого в моно
+# 16 кГц потока в 16-битной шкале (StreamingSegmenter.frame_energies), одинаково для mic и loopback
 ENERGY_THRESHOLD = 1000
 DYNAMIC_ENERGY_THRESHOLD = False
+# Непрерывное слежение за шумовым фоном: порог = 3 × 15-й перцентиль энергии всех кадров
+# за последние 6 с (не ниже MIN_ENERGY_THRESHOLD); речь с паузами перцентиль почти не сдвигает,
+# а поднявшийся фон поднимает порог. Калибровка при старте заполняет окно трекера кадрами той же длительности.
+NOISE_FLOOR_TRACKING = True
+MIN_ENERGY_THRESHOLD = 150
+
+# Длительность одного блока захвата (мс) для каждого источника.
+# Раньше динамик читался по 2 фрейма за раз, что давало ~24 000 итераций/сек.
+MIC_BLOCK_MS = 30
+SPEAKER_BLOCK_MS = 20
+
+# Захват через stream_callback в заранее выделенный кольцевой буфер
+# (переполнения считаются в source.stream.ring_buffer, а не теряются молча).
+CALLBACK_CAPTURE = True
+CAPTURE_BUFFER_SECONDS = 2.0
+# Столько секунд stop() ждёт поток захвата (блокирующее чтение без callback-режима не прервать)
+STOP_TIMEOUT = 2.0
+
+# Формат аудио, которое уходит в очередь: то, что нужно Whisper.
+TARGET_SAMPLE_RATE = 16000
+
+# Сегментация (segmenter.StreamingSegmenter): фраза кончается после SEGMENT_END_SILENCE_MS тишины,
+# куски речи уходят в очередь не реже чем раз в SEGMENT_EMIT_MS.
+SEGMENT_FRAME_MS = 20
+SEGMENT_PREROLL_MS = 300
+SEGMENT_MIN_SPEECH_MS = 250
+SEGMENT_END_SILENCE_MS = 500
+SEGMENT_TAIL_MS = 200
+SEGMENT_EMIT_MS = 500
+
+# Калибровка шума сохраняется между запусками (calibration_store.CALIBRATION_FILE, в данных пользователя);
+# при старте делается только короткий замер фона, полная калибровка — если профиль устарел или фон «уплыл».
+# При NOISE_FLOOR_TRACKING порогом владеет трекер: калибровка заполняет его окно, и если этого хватило
+# (полная калибровка), захват сразу идёт с порогом трекера. Сохранённый порог действует только до того,
+# как трекер наберёт warmup_seconds фона (после короткого замера), или всегда — без слежения за фоном.
+CALIBRATION_SECONDS = 1.0
+CALIBRATION_PROBE_SECONDS = 0.3
+CALIBRATION = CalibrationStore()
+
+
+def block_chunk_size(sample_rate, block_ms):
+    """Количество фреймов в блоке длительностью ``block_ms`` при частоте ``sample_rate``."""
+    return max(1, int(sample_rate * block_ms / 1000))
+
+
+def profile_key(p, device_info, sample_rate):
+    """Ключ профиля калибровки для устройства из PyAudio (имя + host API + частота)."""
+    host_api = p.get_host_api_info_by_index(device_info["hostApi"])["name"]
+    return device_key(device_info["name"], host_api, sample_rate)
+
+
+class StreamConverter:
+    """
+    Потоковое сведение в моно и ресемплинг до ``target_rate``.
+    Состояние фильтра хранится между блоками, поэтому блоки можно подавать по мере захвата.
+    """
+    def __init__(self, sample_rate, channels, sample_width, target_rate=TARGET_SAMPLE_RATE):
+        self.channels = channels
+        self.sample_width = sample_width
+        self.resampler = None
+        if sample_rate != target_rate:
+            self.resampler = dsp.PolyphaseResampler(sample_rate, target_rate, channels=1)
+
+    def reset(self):
+        if self.resampler is not None:
+            self.resampler.reset()
+
+    def convert(self, data):
+        if self.channels == 1 and self.resampler is None:
+            return data
+        samples = dsp.to_samples(data, self.sample_width).reshape(-1, self.channels)
+        mono = samples.mean(axis=1)
+        if self.resampler is not None:
+            mono = self.resampler.process(mono)[:, 0]
+        return dsp.from_samples(mono, self.sample_width)
+
+
+def create_segmenter(sample_width, energy_threshold, noise_floor=None):
+    """Сегментатор потока после StreamConverter с настройками SEGMENT_* (его же меряет bench_capture.py)."""
+    return StreamingSegmenter(
+        TARGET_SAMPLE_RATE, sample_width, energy_threshold, noise_floor=noise_floor,
+        frame_ms=SEGMENT_FRAME_MS, preroll_ms=SEGMENT_PREROLL_MS,
+        min_speech_ms=SEGMENT_MIN_SPEECH_MS, end_silence_ms=SEGMENT_END_SILENCE_MS,
+        tail_ms=SEGMENT_TAIL_MS, emit_ms=SEGMENT_EMIT_MS,
+    )
+
 
 class BaseRecorder:
     def __init__(self, source):
         self.recorder = sr.Recognizer()
         self.recorder.energy_threshold = ENERGY_THRESHOLD
         self.recorder.dynamic_energy_threshold = DYNAMIC_ENERGY_THRESHOLD
+        if NOISE_FLOOR_TRACKING:
+            self.recorder.noise_floor = NoiseFloorTracker(min_threshold=MIN_ENERGY_THRESHOLD)
 
         if source is None:
             raise ValueError("audio source can't be None")
 
         self.source = source
         self.muted = False                     # ← флаг mute
+        self._active = threading.Event()       # сброшен → поток захвата стоит на паузе
+        self._active.set()
+        self._thread = None
+
+        # формат данных в очереди (после конвертации)
+        self.SAMPLE_RATE = TARGET_SAMPLE_RATE
+        self.SAMPLE_WIDTH = source.SAMPLE_WIDTH
+        self.channels = 1
+        self.converter = StreamConverter(source.SAMPLE_RATE, source.channels, source.SAMPLE_WIDTH)
+        self.segmenter = create_segmenter(self.SAMPLE_WIDTH, self.recorder.energy_threshold, self.recorder.noise_floor)
 
 
     # ---------- Mute control ----------
     def set_muted(self, state: bool):
-        """Включить / отключить отправку аудио в очередь."""
+        """
+        Включить / отключить захват.
+        При mute поток захвата закрывает текущую фразу, останавливает PortAudio-стрим и спит,
+        т.е. никаких чтений, RMS и аллокаций; при снятии mute старое аудио отбрасывается.
+        """
         self.muted = bool(state)
+        if self.muted:
+            self._active.clear()
+        else:
+            self._active.set()
 
     # ---------- Capture ----------
     def record_into_queue(self, audio_queue):
         """
-        Ставим listen_in_background и, если self.muted == True,
-        просто игнорируем поступающие фреймы.
+        Запускает поток захвата: блоки с устройства → моно 16 кГц → StreamingSegmenter → очередь.
+        В очередь кладётся (data, start, end, final): кусок фразы, время его первого и следующего
+        за последним сэмпла по монотонным часам потока (time.monotonic()) и признак конца фразы.
+        Пока self.muted == True, захват на паузе.
         """
-        def record_callback(_, audio: sr.AudioData) -> None:
-            if self.muted:                 # ← проверка mute
-                return
-            data = audio.get_raw_data()
-            audio_queue.put((data, datetime.utcnow()))
-
-        self._stopper = self.recorder.listen_in_background(   # NEW / FIX
-            self.source,
-            record_callback,
-            phrase_time_limit=RECORD_TIMEOUT,
-        )
+        tracker = self.recorder.noise_floor
+        self.segmenter.energy_threshold = (tracker.threshold() if tracker is not None and tracker.ready
+                                           else self.recorder.energy_threshold)
+        self.segmenter.reset()
+        self._running = True
+        self._thread = threading.Thread(target=self._capture_loop, args=(audio_queue,), daemon=True)
+        self._thread.start()
+
+    def _capture_loop(self, audio_queue):
+        def put(events):
+            for event in events:
+                audio_queue.put(event)
+
+        with self.source:
+            stream = self.source.stream
+            frame_bytes = self.source.SAMPLE_WIDTH * self.source.channels
+            while self._running:
+                if not self._active.is_set():
+                    put(self.segmenter.flush())       # фраза, начатая до mute, закрывается
+                    stream.pause()
+                    self._active.wait()
+                    if not self._running:
+                        break
+                    stream.resume()
+                    self.converter.reset()
+                    self.segmenter.reset()
+                    continue
+
+                buffer = stream.read(self.source.CHUNK)
+                if len(buffer) == 0:
+                    break
+                frames = len(buffer) // frame_bytes
+                start = stream.clock.time_of(stream.position - frames)
+                if start is None:
+                    start = time.monotonic() - frames / self.source.SAMPLE_RATE
+                put(self.segmenter.feed(self.converter.convert(buffer), start))
+            put(self.segmenter.flush())
 
     def stop(self):
-        """Останавливает фоновую запись, если запущена."""
-        if hasattr(self, "_stopper") and self._stopper:
-            self._stopper()
+        """Останавливает поток захвата, если запущен; незаконченная фраза отправляется."""
+        if self._thread is None:
+            return
+        self._running = False
+        self._active.set()                    # разбудить, если стоим на паузе
+        # loopback WASAPI в тишине не присылает данных — закрытый буфер отпускает ждущий read()
+        ring_buffer = getattr(self.source.stream, "ring_buffer", None)
+        if ring_buffer is not None:
+            ring_buffer.close()
+        self._thread.join(STOP_TIMEOUT)
+        if self._thread.is_alive():
+            print(f"[WARN] Capture thread did not stop in {STOP_TIMEOUT:.0f} s")
+        self._thread = None
 
-    def adjust_for_noise(self, device_name, msg):
-        print(f"[INFO] Adjusting for ambient noise from {device_name}. " + msg)
+    def adjust_for_noise(self, device_name, msg, key=None):
+        """
+        Порог энергии для устройства. Если для key есть свежий профиль и короткий
+        замер фона с ним согласуется — берём сохранённый порог, иначе полная калибровка.
+        """
         with self.source:
-            self.recorder.adjust_for_ambient_noise(self.source)
+            profile = CALIBRATION.get(key) if key else None
+            if profile and not CALIBRATION.is_stale(profile):
+                probe = self._measure_noise(CALIBRATION_PROBE_SECONDS)
+                stats = noise_stats(probe)
+                if stats and not CALIBRATION.has_drifted(profile, stats["noise_floor"]):
+                    self.recorder.energy_threshold = profile["energy_threshold"]
+                    self._seed_noise_floor(probe)
+                    print(f"[INFO] Using stored noise calibration for {device_name} "
+                          f"(threshold {profile['energy_threshold']:.0f}).")
+                    return
+                print(f"[INFO] Ambient noise changed for {device_name}, recalibrating.")
+
+            print(f"[INFO] Adjusting for ambient noise from {device_name}. " + msg)
+            energies = self._measure_noise(CALIBRATION_SECONDS)
+            self.recorder.energy_threshold = self._calibrated_threshold(energies)
+        if key and len(energies):
+            CALIBRATION.put(key, self.recorder.energy_threshold, noise_stats(energies))
+        self._seed_noise_floor(energies)
         print(f"[INFO] Completed ambient noise adjustment for {device_name}.")
 
+    def _measure_noise(self, seconds):
+        """Энергии кадров сегментатора за seconds секунд фона — так же, как их увидит захват."""
+        count = buffer_count(seconds, self.source.CHUNK / self.source.SAMPLE_RATE)
+        data = self.converter.convert(self.source.stream.read(self.source.CHUNK * count))
+        self.converter.reset()
+        return self.segmenter.frame_energies(data)
+
+    def _calibrated_threshold(self, energies):
+        """Порог по замеру фона: то же сглаживание, что Recognizer.adjust_for_ambient_noise, по кадрам сегментатора."""
+        if not len(energies):
+            return ENERGY_THRESHOLD
+        damping = self.recorder.dynamic_energy_adjustment_damping ** self.segmenter.frame_seconds
+        targets = energies * self.recorder.dynamic_energy_ratio
+        return float(ema_thresholds(ENERGY_THRESHOLD, targets, damping)[-1])
+
+    def _seed_noise_floor(self, energies):
+        """Энергии кадров, замеренные при калибровке, — первые значения в окне трекера фона."""
+        tracker = self.recorder.noise_floor
+        if tracker is not None and len(energies):
+            # та же длительность кадра, что у сегментатора, иначе трекер сбросит окно на первом кадре
+            tracker.update(energies, self.segmenter.frame_seconds)
+
 
 class DefaultMicRecorder(BaseRecorder):
-    def __init__(self):
-        super().__init__(source=sr.Microphone(sample_rate=16000))
-        self.adjust_for_noise("Default Mic", "Please make some noise from the Default Mic...")
+    def __init__(self, block_ms=MIC_BLOCK_MS):
+        import pyaudiowpatch as pyaudio     # только Windows; BaseRecorder работает с любым источником и без него
+        with sr.Microphone.portaudio_lock, pyaudio.PyAudio() as p:
+            key = profile_key(p, p.get_default_input_device_info(), 16000)
+        source = sr.Microphone(sample_rate=16000,
+                               chunk_size=block_chunk_size(16000, block_ms),
+                               callback_mode=CALLBACK_CAPTURE,
+                               buffer_seconds=CAPTURE_BUFFER_SECONDS)
+        super().__init__(source=source)
+        self.adjust_for_noise("Default Mic", "Please make some noise from the Default Mic...", key)
 
 class DefaultSpeakerRecorder(BaseRecorder):
-    def __init__(self):
-        with pyaudio.PyAudio() as p:
+    def __init__(self, block_ms=SPEAKER_BLOCK_MS):
+        import pyaudiowpatch as pyaudio
+        with sr.Microphone.portaudio_lock, pyaudio.PyAudio() as p:
             wasapi_info = p.get_host_api_info_by_type(pyaudio.paWASAPI)
             default_speakers = p.get_device_info_by_index(wasapi_info["defaultOutputDevice"])
             
@@ -72,11 +271,15 @@ class DefaultSpeakerRecorder(BaseRecorder):
                         break
                 else:
                     print("[ERROR] No loopback device found.")
+            key = profile_key(p, default_speakers, default_speakers["defaultSampleRate"])
         
+        sample_rate = int(default_speakers["defaultSampleRate"])
         source = sr.Microphone(speaker=True,
                                device_index= default_speakers["index"],
-                               sample_rate=int(default_speakers["defaultSampleRate"]),
-                               chunk_size=pyaudio.get_sample_size(pyaudio.paInt16),
-                               channels=default_speakers["maxInputChannels"])
+                               sample_rate=sample_rate,
+                               chunk_size=block_chunk_size(sample_rate, block_ms),
+                               channels=default_speakers["maxInputChannels"],
+                               callback_mode=CALLBACK_CAPTURE,
+                               buffer_seconds=CAPTURE_BUFFER_SECONDS)
         super().__init__(source=source)
-        self.adjust_for_noise("Default Speaker", "Please make or play some noise from the Default Speaker...")
\ No newline at end of file
+        self.adjust_for_noise("Default Speaker", "Please make or play some noise from the Default Speaker...", key)
\ No newline at end of file
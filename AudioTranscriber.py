@@ -1,16 +1,40 @@
-import wave
-import os
 import threading
-import tempfile
 import custom_speech_recognition as sr
-import io
 import asyncio
-from datetime import timedelta, datetime, timezone
-import pyaudiowpatch as pyaudio
+import concurrent.futures
+import time
 from heapq import merge
+from phrase_buffer import PhraseBuffer
+from text_merge import merge_overlap, StablePrefix
+from transcription_scheduler import TranscriptionScheduler, PARTIAL
 
-PHRASE_TIMEOUT = 3.05
+PHRASE_TIMEOUT = 2.0    # страховка: фраза без final (потерян при переполнении очереди) закрывается через столько секунд после последнего куска
 MAX_PHRASES = 10
+# Длинная речь без пауз режется на окна по MAX_PHRASE_SECONDS с перекрытием PHRASE_OVERLAP_SECONDS;
+# окна распознаются по мере заполнения, текст склеивается в одну запись транскрипта (text_merge).
+MAX_PHRASE_SECONDS = 15.0
+PHRASE_OVERLAP_SECONDS = 1.5
+# Промежуточные гипотезы: пока фраза открыта, каждые PARTIAL_INTERVAL секунд перераспознаётся только
+# её хвост — аудио после последней точки фиксации плюс PHRASE_OVERLAP_SECONDS для склейки. Когда хвост
+# дорастает до PARTIAL_SPAN_SECONDS, его текст фиксируется и следующий хвост начинается с этого места,
+# так что за тик распознаётся ограниченный кусок, а не всё окно. Подтверждённые (совпавшие в двух
+# гипотезах подряд) слова не мигают. Только для локальной модели (supports_partials): через API
+# каждый тик — отдельный платный запрос. Строки с PARTIAL_MARK в подсказки GPT не попадают.
+STREAMING_PARTIALS = True
+PARTIAL_INTERVAL = 1.0
+PARTIAL_SPAN_SECONDS = 5.0
+PARTIAL_MARK = " …"
+# Распознавание идёт через TranscriptionScheduler: не больше max_concurrency модели заданий сразу,
+# итоговый текст каждого источника публикуется в порядке фраз. SPEAKER_PRIORITY — при очереди
+# собеседник распознаётся раньше микрофона (его реплики нужны для подсказок GPT).
+SPEAKER_PRIORITY = True
+# Раз в STATS_INTERVAL секунд в консоль пишется сводка планировщика (очередь, отмены)
+STATS_INTERVAL = 60.0
+# При остановке открытые фразы дораспознаются; что не успело за столько секунд — отбрасывается.
+# Если сам цикл не ответил за SHUTDOWN_TIMEOUT + SHUTDOWN_GRACE, shutdown() перестаёт его ждать;
+# остановку обработчиков планировщика цикл тоже ждёт не дольше SHUTDOWN_GRACE.
+SHUTDOWN_TIMEOUT = 10.0
+SHUTDOWN_GRACE = 2.0
 
 class AudioTranscriber:
     def __init__(self, mic_source, speaker_source, model,
@@ -24,30 +48,46 @@ class AudioTranscriber:
         self.transcript_data = {"You": [], "Speaker": []}
         self.transcript_changed_event = threading.Event()
         self.audio_model = model
+        self.partials = STREAMING_PARTIALS and getattr(model, "supports_partials", False)
+        self._phrase_parts = {}   # (who, phrase_id) -> {"texts": {окно: текст}, "count": число окон или None}
         self.audio_sources = {
             "You": {
                 "sample_rate": mic_source.SAMPLE_RATE,
                 "sample_width": mic_source.SAMPLE_WIDTH,
                 "channels": mic_source.channels,
                 "last_sample": bytes(),
-                "phrase_buffer": bytearray(),
+                "phrase_buffer": PhraseBuffer(),
                 "last_spoken": None,
                 "new_phrase": True,
                 "phrase_id": 0,
                 "phrase_start": None,
-                "process_data_func": self.process_mic_data
+                "timeout_handle": None,
+                "window_index": 0,
+                "partial_handle": None,
+                "partial_bytes": 0,
+                "partial_applied": 0,
+                "partial_base": 0,
+                "partial_text": '',
+                "stable": StablePrefix(),
             },
             "Speaker": {
                 "sample_rate": speaker_source.SAMPLE_RATE,
                 "sample_width": speaker_source.SAMPLE_WIDTH,
                 "channels": speaker_source.channels,
                 "last_sample": bytes(),
-                "phrase_buffer": bytearray(),
+                "phrase_buffer": PhraseBuffer(),
                 "last_spoken": None,
                 "new_phrase": True,
                 "phrase_id": 0,
                 "phrase_start": None,
-                "process_data_func": self.process_speaker_data
+                "timeout_handle": None,
+                "window_index": 0,
+                "partial_handle": None,
+                "partial_bytes": 0,
+                "partial_applied": 0,
+                "partial_base": 0,
+                "partial_text": '',
+                "stable": StablePrefix(),
             }
         }
         
@@ -60,8 +100,12 @@ class AudioTranscriber:
     def set_language(self, lang_code):
         self.language = lang_code
 
+    def get_context_lines(self):
+        """Строки собеседника, по которым считаются context_start / context_end: промежуточный текст — не подсказка."""
+        return [t for t in self.transcript_data['Speaker'] if not t[4]]
+
     def get_current_prompt(self):
-        spk = self.transcript_data['Speaker']
+        spk = self.get_context_lines()
         if not spk:
             return []
         start = min(self.context_start, len(spk) - 1)
@@ -74,135 +118,349 @@ class AudioTranscriber:
         asyncio.run(self.transcribe_audio_queue_async(speaker_queue, mic_queue))
 
     async def transcribe_audio_queue_async(self, speaker_queue, mic_queue):
-        import queue
+        """
+        Событийный цикл: потоки захвата будят его через call_soon_threadsafe при каждом put(),
+        таймаут фразы — таймер на PHRASE_TIMEOUT после прихода последнего куска. В простое цикл спит.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._queues = {"You": mic_queue, "Speaker": speaker_queue}
+        self._stopping = False
+        self._wakeup = wakeup = asyncio.Event()
 
-        pending_tasks = set()
+        def notify():
+            self._loop.call_soon_threadsafe(wakeup.set)
 
-        while True:
+        for q in self._queues.values():
+            q.add_listener(notify)
 
-            while True:
-                try:
-                    data, time_spoken = mic_queue.get_nowait()
-                    completed = self.update_last_sample_and_phrase_status("You", data, time_spoken)
-                    if completed:
-                        buf, pid, t_spoken = completed
-                        pending_tasks.add(asyncio.create_task(
-                            self._process_phrase("You", buf, t_spoken, pid)
-                        ))
-                except queue.Empty:
-                    break
+        priority = {"Speaker": 0, "You": 1} if SPEAKER_PRIORITY else None
+        self.scheduler = TranscriptionScheduler(getattr(self.audio_model, "max_concurrency", 1), priority)
+        self.scheduler.start()
+
+        self._stats_handle = self._loop.call_later(STATS_INTERVAL, self._report_stats)
+
+        try:
+            while not self._stopping:
+                await wakeup.wait()
+                wakeup.clear()
+                if not self._stopping:
+                    self._drain_queues()
+        finally:
+            self._stats_handle.cancel()
+            for q in self._queues.values():
+                q.remove_listener(notify)
+            if not await self.scheduler.close(SHUTDOWN_GRACE):
+                print("[WARN] Transcription scheduler did not stop; leaving its tasks behind")
+
+    def shutdown(self, timeout=SHUTDOWN_TIMEOUT):
+        """
+        Штатная остановка (вызывается из другого потока после остановки захвата): забирает
+        остатки очередей, закрывает открытые фразы и ждёт их распознавания не дольше timeout,
+        остальное отменяет и завершает цикл. Возвращает отчёт — что дораспознано и что потеряно,
+        или None, если цикл не запущен или не ответил вовремя.
+        """
+        loop = getattr(self, "_loop", None)
+        if loop is None or not loop.is_running():
+            return None
+        future = asyncio.run_coroutine_threadsafe(self._shutdown_async(timeout), loop)
+        try:
+            return future.result(timeout + SHUTDOWN_GRACE)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            loop.call_soon_threadsafe(self._request_stop)     # цикл выходит и без отчёта
+            return None
+
+    async def _shutdown_async(self, timeout):
+        self._drain_queues()
+        flushed = 0
+        for who, src in self.audio_sources.items():
+            if src["timeout_handle"] is not None:
+                src["timeout_handle"].cancel()
+                src["timeout_handle"] = None
+            if src["phrase_buffer"]:
+                self._submit_phrase(who, *self._close_phrase(who))
+                flushed += 1
+        self.scheduler.cancel(kind=PARTIAL)
+
+        t0 = time.monotonic()
+        try:
+            await asyncio.wait_for(self.scheduler.join(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        cancelled_seconds = self.scheduler.cancelled_seconds
+        dropped = self.scheduler.cancel_all()
+        report = {
+            "flushed_phrases": flushed,
+            "drain_seconds": round(time.monotonic() - t0, 2),
+            "dropped_jobs": dropped,
+            "dropped_seconds": round(self.scheduler.cancelled_seconds - cancelled_seconds, 1),
+            "capture_dropped": {who: q.dropped for who, q in self._queues.items()},
+            "scheduler": self.scheduler.stats(),
+        }
+        self._request_stop()
+        return report
 
+    def _request_stop(self):
+        self._stopping = True
+        self._wakeup.set()
+
+    def _report_stats(self):
+        self._stats_handle = self._loop.call_later(STATS_INTERVAL, self._report_stats)
+        s = self.scheduler.stats()
+        print(f"[INFO] Transcription: {s['completed']}/{s['submitted']} done, {s['failed']} failed, "
+              f"backlog {s['backlog']} (max {s['max_backlog']}), cancelled {s['cancelled_queued']} queued + "
+              f"{s['cancelled_running']} running ({s['cancelled_seconds']:.1f} s of audio)")
+        for q in self._queues.values():
+            s = q.stats()
+            print(f"[INFO] {s['name']} queue: depth {s['depth']}/{s['maxsize']} (high water {s['high_water']}), "
+                  f"dropped {s['dropped']}, coalesced {s['coalesced']}, blocked {s['blocked']}")
+
+    def _drain_queues(self):
+        import queue
+
+        for who, q in self._queues.items():
+            received = False
             while True:
                 try:
-                    data, time_spoken = speaker_queue.get_nowait()
-                    completed = self.update_last_sample_and_phrase_status("Speaker", data, time_spoken)
-                    if completed:
-                        buf, pid, t_spoken = completed
-                        pending_tasks.add(asyncio.create_task(
-                            self._process_phrase("Speaker", buf, t_spoken, pid)
-                        ))
+                    data, start, end, final = q.get_nowait()
                 except queue.Empty:
                     break
+                received = True
+                completed = self.update_last_sample_and_phrase_status(who, data, start, end, final)
+                if completed:
+                    self._submit_phrase(who, *completed)
+            if received:
+                self._schedule_phrase_timeout(who)
 
-            now = datetime.utcnow()
-
-            for who in ("You", "Speaker"):
-                src = self.audio_sources[who]
-                if (
-                    src["phrase_buffer"]
-                    and src["last_spoken"] is not None
-                    and now - src["last_spoken"] > timedelta(seconds=PHRASE_TIMEOUT)
-                ):
-                    buf = bytes(src["phrase_buffer"])
-                    pid = src["phrase_id"]
-                    t_spoken = src["last_spoken"]
-                    src["phrase_buffer"] = bytearray()
-                    src["phrase_id"] += 1
-                    src["new_phrase"] = True
-                    pending_tasks.add(asyncio.create_task(
-                        self._process_phrase(who, buf, t_spoken, pid)
-                    ))
-
-            done = {t for t in pending_tasks if t.done()}
-            for t in done:
-                pending_tasks.remove(t)
-                try:
-                    await t
-                except Exception as e:
-                    print(f"Transcription task error: {e}")
+    def _schedule_phrase_timeout(self, who):
+        src = self.audio_sources[who]
+        if src.get("timeout_handle") is not None:
+            src["timeout_handle"].cancel()
+            src["timeout_handle"] = None
+        if src["phrase_buffer"]:          # фраза открыта — страхуемся от потерянного final
+            # отсчёт от прихода куска, а не от его метки: метки идут по часам потока, и кусок,
+            # пролежавший в очереди, иначе закрывал бы фразу сразу
+            src["timeout_handle"] = self._loop.call_later(PHRASE_TIMEOUT, self._on_phrase_timeout, who)
 
-            await asyncio.sleep(0.1)
+    def _on_phrase_timeout(self, who):
+        src = self.audio_sources[who]
+        src["timeout_handle"] = None
+        self._drain_queues()  # данные могли прийти, но цикл ещё не проснулся
+        if src["timeout_handle"] is not None:
+            return  # пришло продолжение — таймер перепланирован
+        if src["phrase_buffer"]:
+            self._submit_phrase(who, *self._close_phrase(who))
 
-    def update_last_sample_and_phrase_status(self, who_spoke, data, time_spoken):
+    def _close_phrase(self, who_spoke):
         source_info = self.audio_sources[who_spoke]
-        completed = None
-
-        if (
-            source_info["last_spoken"] is not None
-            and time_spoken - source_info["last_spoken"] > timedelta(seconds=PHRASE_TIMEOUT)
-            and source_info["phrase_buffer"]
-        ):
-            completed = (
-                bytes(source_info["phrase_buffer"]),
-                source_info["phrase_id"],
-                source_info["last_spoken"],
-            )
-            source_info["phrase_buffer"] = bytearray()
-            source_info["phrase_id"] += 1
-            source_info["new_phrase"] = True
-        else:
-            source_info["new_phrase"] = False
+        completed = (
+            source_info["phrase_buffer"].take(),   # memoryview, без копирования
+            source_info["phrase_id"],
+            source_info["window_index"],
+            source_info["last_spoken"],
+            True,
+        )
+        self._stop_partials(who_spoke)
+        source_info["phrase_id"] += 1
+        source_info["window_index"] = 0
+        source_info["new_phrase"] = True
+        return completed
+
+    def _cut_window(self, who_spoke, window_bytes, overlap_bytes):
+        """Очередное окно длинной фразы; его последние overlap_bytes остаются началом следующего."""
+        source_info = self.audio_sources[who_spoke]
+        completed = (
+            source_info["phrase_buffer"].split(window_bytes, overlap_bytes),
+            source_info["phrase_id"],
+            source_info["window_index"],
+            source_info["last_spoken"],
+            False,
+        )
+        source_info["window_index"] += 1
+        self._cancel_partials(who_spoke, completed[1])   # гипотезы по старому окну больше не нужны
+        self._reset_partials(who_spoke)     # гипотезы нового окна сравниваются только между собой
+        return completed
+
+    def _bytes_per_second(self, who_spoke):
+        source_info = self.audio_sources[who_spoke]
+        return source_info["sample_rate"] * source_info["sample_width"] * source_info["channels"]
+
+    def _aligned_bytes(self, who_spoke, seconds):
+        """Столько секунд аудио источника в байтах, по границе кадра."""
+        source_info = self.audio_sources[who_spoke]
+        frame_bytes = source_info["sample_width"] * source_info["channels"]
+        return int(seconds * self._bytes_per_second(who_spoke)) // frame_bytes * frame_bytes
+
+    def update_last_sample_and_phrase_status(self, who_spoke, data, start, end, final):
+        """
+        Кусок фразы от сегментатора: ``start`` / ``end`` — время первого и следующего за последним
+        сэмпла (time.monotonic()), ``final`` — сегментатор зафиксировал конец фразы.
+        Возвращает (данные, phrase_id, номер окна, время конца, последнее ли окно) для завершённой
+        фразы или заполненного окна длинной фразы, иначе None.
+        """
+        source_info = self.audio_sources[who_spoke]
+        source_info["new_phrase"] = not source_info["phrase_buffer"]
+        if source_info["new_phrase"] and self.partials and not final:
+            self._start_partials(who_spoke)
 
-        source_info["phrase_buffer"] += data
+        source_info["phrase_buffer"].append(data)
         # keep last_sample for backward compatibility but avoid expensive copy
         source_info["last_sample"] = source_info["phrase_buffer"]
-        source_info["last_spoken"] = time_spoken
+        source_info["last_spoken"] = end
 
-        return completed
+        if final and source_info["phrase_buffer"]:
+            return self._close_phrase(who_spoke)
+        window_bytes = self._aligned_bytes(who_spoke, MAX_PHRASE_SECONDS)
+        if len(source_info["phrase_buffer"]) >= window_bytes:
+            overlap_bytes = self._aligned_bytes(who_spoke, PHRASE_OVERLAP_SECONDS)
+            return self._cut_window(who_spoke, window_bytes, overlap_bytes)
+        return None
+
+    def _submit_phrase(self, who_spoke, data, phrase_id, part, time_spoken, last):
+        """Ставит фразу (или окно длинной фразы) в очередь распознавания."""
+        self.scheduler.submit(
+            who_spoke, phrase_id,
+            lambda: self._transcribe(who_spoke, data),
+            lambda text: self._publish_part(who_spoke, phrase_id, part, last, text, time_spoken),
+            seconds=len(data) / self._bytes_per_second(who_spoke),
+        )
 
-    async def _process_phrase(self, who_spoke, data, time_spoken, phrase_id):
+    async def _transcribe(self, who_spoke, data, partial=False):
+        """Распознаёт аудио (memoryview фразы, без копий и временных файлов); при ошибке — пустая строка."""
         source_info = self.audio_sources[who_spoke]
+        audio = sr.AudioData(data, source_info["sample_rate"], source_info["sample_width"])
         try:
-            fd, path = tempfile.mkstemp(suffix=".wav")
-            os.close(fd)
-            source_info["process_data_func"](data, path)
-            text = await self.audio_model.get_transcription(path, self.get_language())
-            if text != '' and text.lower() != 'you':
-                self.update_transcript(who_spoke, text, time_spoken, phrase_id)
-                self._check_gpt_trigger()
-                self.transcript_changed_event.set()
+            if partial:     # гипотезы бывают только у бэкендов с supports_partials
+                text = await self.audio_model.get_transcription(audio, self.get_language(), partial=True)
+            else:
+                text = await self.audio_model.get_transcription(audio, self.get_language())
         except Exception as e:
             print(f"Transcription error for {who_spoke}: {e}")
-        finally:
-            os.unlink(path)
-
-    def process_mic_data(self, data, temp_file_name):
-        audio_data = sr.AudioData(data, self.audio_sources["You"]["sample_rate"], self.audio_sources["You"]["sample_width"])
-        wav_data = io.BytesIO(audio_data.get_wav_data())
-        with open(temp_file_name, 'w+b') as f:
-            f.write(wav_data.read())
-
-    def process_speaker_data(self, data, temp_file_name):
-        with wave.open(temp_file_name, 'wb') as wf:
-            wf.setnchannels(self.audio_sources["Speaker"]["channels"])
-            p = pyaudio.PyAudio()
-            wf.setsampwidth(p.get_sample_size(pyaudio.paInt16))
-            wf.setframerate(self.audio_sources["Speaker"]["sample_rate"])
-            wf.writeframes(data)
-
-    def update_transcript(self, who_spoke, text, time_spoken, phrase_id):
+            text = ''
+        return text or ''
+
+    # ---------- промежуточные гипотезы ----------
+    def _reset_partials(self, who_spoke):
+        source_info = self.audio_sources[who_spoke]
+        source_info["stable"] = StablePrefix()
+        source_info["partial_bytes"] = 0
+        source_info["partial_applied"] = 0
+        source_info["partial_base"] = 0
+        source_info["partial_text"] = ''
+
+    def _start_partials(self, who_spoke):
+        source_info = self.audio_sources[who_spoke]
+        self._reset_partials(who_spoke)
+        source_info["partial_handle"] = self._loop.call_later(PARTIAL_INTERVAL, self._on_partial_tick, who_spoke)
+
+    def _stop_partials(self, who_spoke):
+        source_info = self.audio_sources[who_spoke]
+        if source_info["partial_handle"] is not None:
+            source_info["partial_handle"].cancel()
+            source_info["partial_handle"] = None
+        self._cancel_partials(who_spoke, source_info["phrase_id"])
+
+    def _cancel_partials(self, who_spoke, phrase_id):
+        """Отменяет гипотезы фразы: итоговый текст или новое окно делает их устаревшими."""
+        self.scheduler.cancel(who_spoke, phrase_id, PARTIAL)
+
+    def _on_partial_tick(self, who_spoke):
         source_info = self.audio_sources[who_spoke]
+        source_info["partial_handle"] = self._loop.call_later(PARTIAL_INTERVAL, self._on_partial_tick, who_spoke)
+        size = len(source_info["phrase_buffer"])
+        if size <= source_info["partial_bytes"]:
+            return  # новых данных нет
+        source_info["partial_bytes"] = size
+        # только хвост после точки фиксации, с перекрытием для склейки с уже зафиксированным текстом
+        start = max(0, source_info["partial_base"] - self._aligned_bytes(who_spoke, PHRASE_OVERLAP_SECONDS))
+        data = source_info["phrase_buffer"].view()[start:size]
+        phrase_id, part, time_spoken = source_info["phrase_id"], source_info["window_index"], source_info["last_spoken"]
+        self.scheduler.submit(
+            who_spoke, phrase_id,
+            lambda: self._transcribe(who_spoke, data, partial=True),
+            lambda text: self._apply_partial(who_spoke, phrase_id, part, size, text, time_spoken),
+            kind=PARTIAL, seconds=(size - start) / self._bytes_per_second(who_spoke),
+            supersede=True,     # ещё не начатая гипотеза заменяется более свежей
+        )
+
+    def _apply_partial(self, who_spoke, phrase_id, part, size, text, time_spoken):
+        source_info = self.audio_sources[who_spoke]
+        text = text or ''
+        # фраза уже закрыта (финальный текст важнее), окно сменилось или уже показана гипотеза
+        # по более длинному аудио (гипотезы, считавшиеся параллельно, могут прийти не по порядку)
+        if (source_info["phrase_id"] != phrase_id or source_info["window_index"] != part
+                or size <= source_info["partial_applied"] or not text.strip()):
+            return
+        source_info["partial_applied"] = size
+        committed, tail = source_info["stable"].update(text.strip())
+        current = merge_overlap(source_info["partial_text"], " ".join(t for t in (committed, tail) if t))
+        if size - source_info["partial_base"] >= self._aligned_bytes(who_spoke, PARTIAL_SPAN_SECONDS):
+            # хвост дорос — фиксируем его текст, дальше распознаётся только то, что после size
+            source_info["partial_text"] = current
+            source_info["partial_base"] = size
+            source_info["stable"] = StablePrefix()
+        merged = merge_overlap(self._merged_parts((who_spoke, phrase_id))[0], current)
+        if merged != '' and merged.lower() != 'you':
+            self.update_transcript(who_spoke, merged + PARTIAL_MARK, time_spoken, phrase_id, partial=True)
+            self.transcript_changed_event.set()
+
+    # ---------- итоговый текст ----------
+    def _merged_parts(self, key):
+        """Текст подряд распознанных окон фразы и число этих окон."""
+        state = self._phrase_parts.get(key)
+        merged, i = '', 0
+        while state and i in state["texts"]:
+            merged = merge_overlap(merged, state["texts"][i])
+            i += 1
+        return merged, i
+
+    def _publish_part(self, who_spoke, phrase_id, part, last, text, time_spoken):
+        """Склеивает уже распознанные подряд окна фразы и обновляет её запись в транскрипте."""
+        key = (who_spoke, phrase_id)
+        state = self._phrase_parts.setdefault(key, {"texts": {}, "count": None})
+        state["texts"][part] = (text or '').strip()
+        if last:
+            state["count"] = part + 1
+
+        merged, done = self._merged_parts(key)
+        complete = state["count"] is not None and done == state["count"]
+        if complete:
+            del self._phrase_parts[key]
+        elif self.partials and not last and self.audio_sources[who_spoke]["phrase_id"] == phrase_id:
+            return  # окно открытой фразы — запись обновит следующая промежуточная гипотеза
+
+        if merged != '' and merged.lower() != 'you':
+            self.update_transcript(who_spoke, merged, time_spoken, phrase_id)
+            if complete:
+                if self.logger is not None:
+                    self.logger.write(f"{who_spoke}: {merged}")
+                self._check_gpt_trigger()
+            self.transcript_changed_event.set()
+        elif complete and self.remove_transcript_entry(who_spoke, phrase_id):
+            self.transcript_changed_event.set()   # итог пустой — убираем промежуточный текст
+
+    def update_transcript(self, who_spoke, text, time_spoken, phrase_id, partial=False):
+        """Запись транскрипта: (строка, время, кто, phrase_id, промежуточная ли гипотеза)."""
         transcript = self.transcript_data[who_spoke]
+        entry = (f"{who_spoke}: [{text}]\n\n", time_spoken, who_spoke, phrase_id, partial)
 
         # Try to find existing entry for this phrase
-        for idx, entry in enumerate(transcript):
-            if len(entry) >= 4 and entry[3] == phrase_id:
-                transcript[idx] = (f"{who_spoke}: [{text}]\n\n", time_spoken, who_spoke, phrase_id)
+        for idx, old in enumerate(transcript):
+            if old[3] == phrase_id:
+                transcript[idx] = entry
                 break
         else:
             if len(transcript) >= MAX_PHRASES:
                 transcript.pop(-1)
-            transcript.insert(0, (f"{who_spoke}: [{text}]\n\n", time_spoken, who_spoke, phrase_id))
+            transcript.insert(0, entry)
+
+    def remove_transcript_entry(self, who_spoke, phrase_id):
+        transcript = self.transcript_data[who_spoke]
+        for idx, entry in enumerate(transcript):
+            if len(entry) >= 4 and entry[3] == phrase_id:
+                del transcript[idx]
+                return True
+        return False
 
     def get_transcript(self):
         combined = list(merge(
@@ -211,16 +469,40 @@ class AudioTranscriber:
         return combined[:MAX_PHRASES]   # список кортежей (text, time, role)
 
     def clear_transcript_data(self):
+        """
+        Очищает транскрипт; задания распознавания старых фраз отменяются, их текст не вернётся.
+        Из другого потока очистка только ставится в цикл распознавания (вызывающий не ждёт),
+        по её завершении взводится transcript_changed_event.
+        """
+        loop = getattr(self, "_loop", None)
+        try:
+            current = asyncio.get_running_loop()
+        except RuntimeError:
+            current = None
+        if loop is not None and loop.is_running() and current is not loop:
+            # состояние фраз принадлежит циклу распознавания — чистим в его потоке
+            loop.call_soon_threadsafe(self.clear_transcript_data)
+            return
+
+        if getattr(self, "scheduler", None) is not None:
+            for who in self.audio_sources:
+                self._stop_partials(who)
+            self.scheduler.cancel_all()
+        self._phrase_parts.clear()
+
         self.transcript_data["You"].clear()
         self.transcript_data["Speaker"].clear()
 
         self.audio_sources["You"]["last_sample"] = bytes()
         self.audio_sources["Speaker"]["last_sample"] = bytes()
-        self.audio_sources["You"]["phrase_buffer"] = bytearray()
-        self.audio_sources["Speaker"]["phrase_buffer"] = bytearray()
+        self.audio_sources["You"]["phrase_buffer"] = PhraseBuffer()
+        self.audio_sources["Speaker"]["phrase_buffer"] = PhraseBuffer()
 
         self.audio_sources["You"]["new_phrase"] = True
         self.audio_sources["Speaker"]["new_phrase"] = True
+        self.audio_sources["You"]["window_index"] = 0
+        self.audio_sources["Speaker"]["window_index"] = 0
+        self.transcript_changed_event.set()
 
     def _check_gpt_trigger(self):
         if not self._gpt_callback:
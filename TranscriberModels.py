@@ -1,45 +1,270 @@
-import torch
-from faster_whisper import WhisperModel
-from openai import AsyncOpenAI
+import asyncio
+import bisect
+import io
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+# Каждому бэкенду нужна только своя библиотека: "api" работает без faster-whisper, "local" — без openai.
+# torch импортируется лишь для device="auto" — узнать, есть ли CUDA.
+try:
+    from faster_whisper import WhisperModel
+except ImportError:
+    WhisperModel = None
+try:
+    from faster_whisper import BatchedInferencePipeline
+except ImportError:     # faster-whisper < 1.1 — только последовательный режим
+    BatchedInferencePipeline = None
+try:
+    from openai import AsyncOpenAI
+except ImportError:
+    AsyncOpenAI = None
+from custom_speech_recognition import dsp
+from model_pool import ModelPool
 
-def get_model(use_api):
-    if use_api:
-        return APIWhisperTranscriber()
-    else:
-        return FasterWhisperTranscriber()
+WHISPER_SAMPLE_RATE = 16000
+# Значения по умолчанию; в приложении всё берётся из секции "transcriber" config.json (config_manager)
+MODEL_NAME = "base"     # многоязычная; *.en понимают только английский
+BEAM_SIZE = 5
+# Локальная модель считает в отдельных потоках, цикл транскрибера в это время свободен.
+# CTranslate2 отпускает GIL, поэтому num_workers потоков действительно декодируют параллельно.
+INFERENCE_WORKERS = 1
+# Пакетный режим: фразы, пришедшие в течение BATCH_WINDOW секунд (до BATCH_SIZE штук), склеиваются
+# и распознаются одним проходом BatchedInferencePipeline — каждая фраза отдельным клипом (clip_timestamps).
+# Соседние клипы конвейер может объединить в один кусок до 30 с, поэтому текст раскладывается по фразам
+# пословно, по времени каждого слова. Промежуточные гипотезы собираются в свои пакеты, отдельно от итоговых.
+# Одиночная фраза и любые ошибки пакета — обычный последовательный transcribe().
+BATCHING = True
+BATCH_SIZE = 8
+BATCH_WINDOW = 0.05
+# Пул процессов (model_pool.py): POOL_PROCESSES > 0 — модель грузится в столько отдельных процессов,
+# по cpu_threads потоков CTranslate2 в каждом (0 — ядра делятся поровну). Пакетный режим при этом выключен.
+POOL_PROCESSES = 0
+# Прогрев клиента API — фаза запуска; без сети она не должна задерживать окно дольше этого
+API_WARM_UP_TIMEOUT = 5.0
+
+def get_model(settings=None, language=None):
+    """
+    Бэкенд распознавания по настройкам (секция "transcriber" конфига):
+    backend ("api" | "local"), model, device, compute_type, cpu_threads, workers, processes,
+    beam_size, batching, batch_size, batch_window, language ("" — язык из окна), warm_up.
+    Отсутствующие ключи — по умолчанию. language — язык из окна настроек; англоязычная
+    модель (*.en) с другим языком не загружается: она распознала бы речь как английскую.
+    """
+    settings = settings or {}
+    if settings.get("backend", "api") == "api":
+        return APIWhisperTranscriber(language=settings.get("language"))
+    model_name = settings.get("model", MODEL_NAME)
+    language = settings.get("language") or language
+    if model_name.endswith(".en") and language and language != "en":
+        raise ValueError(f"Whisper model {model_name!r} is English-only but the recognition language is "
+                         f"{language!r}; set transcriber.model to a multilingual model (base, small, ...)")
+    return FasterWhisperTranscriber(
+        model_name=model_name,
+        device=settings.get("device", "auto"),
+        compute_type=settings.get("compute_type", "auto"),
+        cpu_threads=settings.get("cpu_threads", 0),
+        workers=settings.get("workers", INFERENCE_WORKERS),
+        processes=settings.get("processes", POOL_PROCESSES),
+        beam_size=settings.get("beam_size", BEAM_SIZE),
+        batching=settings.get("batching", BATCHING),
+        batch_size=settings.get("batch_size", BATCH_SIZE),
+        batch_window=settings.get("batch_window", BATCH_WINDOW),
+        language=settings.get("language"),
+        warm_up=settings.get("warm_up", True),
+    )
+
+# get_transcription(audio, language, partial=False) принимает sr.AudioData с PCM моно (frame_data может быть
+# memoryview); каждый бэкенд сам приводит его к нужному виду в памяти, без временных файлов.
+# partial — промежуточная гипотеза (см. supports_partials).
+
+def audio_to_float32(audio):
+    """PCM → float32 в [-1, 1] с частотой WHISPER_SAMPLE_RATE (так faster-whisper принимает аудио без декодирования)."""
+    width = audio.sample_width
+    data = audio.frame_data
+    if width == 1:      # 8-битные сэмплы в AudioData беззнаковые, как в WAV
+        data = dsp.bias(data, 1, -128)
+    if audio.sample_rate != WHISPER_SAMPLE_RATE and len(data):
+        data = dsp.resample(data, width, 1, audio.sample_rate, WHISPER_SAMPLE_RATE)
+    return dsp.to_samples(data, width).astype(np.float32) / float(1 << (8 * width - 1))
+
+def audio_to_wav_file(audio, name="audio.wav"):
+    """WAV в BytesIO; имя нужно API, чтобы определить формат файла."""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(audio.sample_width)
+        wf.setframerate(audio.sample_rate)
+        wf.writeframes(audio.frame_data)
+    buffer.name = name
+    buffer.seek(0)
+    return buffer
 
 class FasterWhisperTranscriber:
-    def __init__(self):
-        print(f"[INFO] Loading Faster Whisper model...")
-        self.model = WhisperModel(
-            "tiny.en",
-            device="cuda" if torch.cuda.is_available() else "cpu",
-            compute_type="float32" if torch.cuda.is_available() else "int8",
+    supports_partials = True    # промежуточные гипотезы считаются локально и ничего не стоят
+
+    def __init__(self, model_name=MODEL_NAME, device="auto", compute_type="auto", cpu_threads=0,
+                 workers=INFERENCE_WORKERS, processes=POOL_PROCESSES, beam_size=BEAM_SIZE,
+                 batching=BATCHING, batch_size=BATCH_SIZE, batch_window=BATCH_WINDOW, language=None, warm_up=True):
+        print(f"[INFO] Loading Faster Whisper model {model_name}...")
+        if device == "auto":
+            import torch
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+        if compute_type == "auto":
+            compute_type = "float32" if device == "cuda" else "int8"
+        model_kwargs = {"device": device, "compute_type": compute_type}
+        self.beam_size = beam_size
+        self.batch_size = max(1, batch_size)
+        self.batch_window = batch_window
+        self.language = language or None     # None — язык из настроек окна (аргумент get_transcription)
+        self.model = self.pool = self.batched = None
+        if processes > 0:
+            # потоки исполнителя только ждут ответа своих процессов
+            workers = processes
+            self.pool = ModelPool(processes, (model_name,), model_kwargs, {"beam_size": beam_size},
+                                  cpu_threads, warm_up=warm_up)
+            print(f"[INFO] Faster Whisper pool: {processes} processes")
+        else:
+            workers = max(1, workers)
+            if WhisperModel is None:
+                raise ImportError("faster-whisper is not installed; install it or set transcriber.backend to \"api\"")
+            self.model = WhisperModel(model_name, cpu_threads=cpu_threads, num_workers=workers, **model_kwargs)
+            if batching and BatchedInferencePipeline:
+                self.batched = BatchedInferencePipeline(self.model)
+            if warm_up:
+                self._warm_up()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="whisper")
+        # при пакетном режиме планировщик должен отдавать сразу несколько фраз, иначе собирать нечего
+        self.max_concurrency = workers * self.batch_size if self.batched else workers
+        self._batch = []            # [(audio, язык, гипотеза ли, future)] — ждут отправки
+        self._batch_handle = None
+        self._batch_tasks = set()
+        print(f"[INFO] Faster Whisper on {device} ({compute_type}), batching: {self.batched is not None}")
+
+    def _warm_up(self):
+        # первый проход выделяет буферы и инициализирует ядра CTranslate2 — пусть это будет не на живой фразе
+        start = time.perf_counter()
+        samples = np.zeros(WHISPER_SAMPLE_RATE, dtype=np.float32)
+        segments, _ = self.model.transcribe(samples, beam_size=self.beam_size, language=self.language)
+        for _ in segments:
+            pass
+        print(f"[INFO] Faster Whisper warm-up: {time.perf_counter() - start:.2f} s")
+
+    async def get_transcription(self, audio, language="ru", partial=False):
+        # отмена задания освобождает цикл сразу, но начатый в потоке расчёт доработает до конца
+        language = self.language or language
+        loop = asyncio.get_running_loop()
+        if self.batched is None:
+            return await loop.run_in_executor(self._executor, self._transcribe, audio, language)
+        future = loop.create_future()
+        self._batch.append((audio, language, partial, future))
+        if len(self._batch) >= self.batch_size:
+            self._flush_batch()
+        elif self._batch_handle is None:
+            self._batch_handle = loop.call_later(self.batch_window, self._flush_batch)
+        return await future
+
+    def _flush_batch(self):
+        if self._batch_handle is not None:
+            self._batch_handle.cancel()
+            self._batch_handle = None
+        batches = {}    # один проход — один язык и один вид заданий (гипотезы отдельно); без отменённых
+        for audio, language, partial, future in self._batch:
+            if not future.done():
+                batches.setdefault((language, partial), []).append((audio, future))
+        self._batch = []
+        for (language, _), batch in batches.items():
+            task = asyncio.ensure_future(self._run_batch(batch, language))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    async def _run_batch(self, batch, language):
+        loop = asyncio.get_running_loop()
+        audios = [audio for audio, _ in batch]
+        texts = None
+        if len(batch) > 1:
+            try:
+                texts = await loop.run_in_executor(self._executor, self._transcribe_batch, audios, language)
+            except Exception as e:
+                print(f"[WARN] Batched transcription failed, falling back to sequential: {e}")
+        if texts is None:
+            texts = await asyncio.gather(*(loop.run_in_executor(self._executor, self._transcribe, audio, language)
+                                           for audio in audios))
+        for (_, future), text in zip(batch, texts):
+            if not future.done():
+                future.set_result(text)
+
+    def _transcribe_batch(self, audios, language=None):
+        """
+        Один проход BatchedInferencePipeline по склеенным фразам. Кусок конвейера может содержать
+        несколько клипов, поэтому текст раскладывается по фразам пословно — по середине каждого слова.
+        """
+        samples = [audio_to_float32(audio) for audio in audios]
+        clips, starts, position = [], [], 0
+        for s in samples:
+            clips.append({"start": position, "end": position + len(s)})
+            starts.append(position / WHISPER_SAMPLE_RATE)
+            position += len(s)
+        segments, _ = self.batched.transcribe(
+            np.concatenate(samples), clip_timestamps=clips, batch_size=len(samples),
+            beam_size=self.beam_size, language=language, vad_filter=False, word_timestamps=True,
         )
-        print(f"[INFO] Faster Whisper using GPU: {torch.cuda.is_available()}")
+        texts = [[] for _ in samples]
+
+        def add(item, text):
+            index = bisect.bisect_right(starts, (item.start + item.end) / 2) - 1
+            texts[max(0, index)].append(text)
 
-    async def get_transcription(self, wav_file_path, language="ru"):
+        for segment in segments:
+            if segment.words:
+                for word in segment.words:
+                    add(word, word.word)
+            else:       # без слов — хотя бы по середине сегмента
+                add(segment, segment.text)
+        return ["".join(parts).strip() for parts in texts]
+
+    def _transcribe(self, audio, language=None):
         try:
-            # language игнорируется для локальной модели
-            segments, _ = self.model.transcribe(wav_file_path, beam_size=5)
-            full_text = " ".join(segment.text for segment in segments)
+            if self.pool is not None:
+                return self.pool.transcribe(audio_to_float32(audio), {"language": language})
+            segments, _ = self.model.transcribe(audio_to_float32(audio), beam_size=self.beam_size, language=language)
+            full_text = " ".join(segment.text for segment in segments)   # генератор: декодирование идёт здесь
             return full_text.strip()
         except Exception as e:
             print(e)
             return ''
 
+    def close(self):
+        self._executor.shutdown(wait=False)
+        if self.pool is not None:
+            self.pool.close()
+
 class APIWhisperTranscriber:
-    def __init__(self, api_key=None):
+    max_concurrency = 4     # одновременных запросов к API, больше — упираемся в rate limit
+    supports_partials = False   # гипотеза каждую секунду — платный запрос к API
+
+    def __init__(self, api_key=None, language=None):
+        if AsyncOpenAI is None:
+            raise ImportError("openai is not installed; install it or set transcriber.backend to \"local\"")
         self.client = AsyncOpenAI(api_key=api_key)
+        self.language = language or None     # None — язык из настроек окна
+
+    async def warm_up(self):
+        # открываем TLS-соединение заранее (фаза запуска в цикле транскрибера), чтобы первая фраза не ждала рукопожатия
+        start = time.perf_counter()
+        try:
+            await self.client.with_options(timeout=API_WARM_UP_TIMEOUT).models.retrieve("whisper-1")
+            print(f"[INFO] Whisper API warm-up: {time.perf_counter() - start:.2f} s")
+        except Exception as e:
+            print(f"[WARN] Whisper API warm-up failed: {e}")
 
-    async def get_transcription(self, wav_file_path, language="ru"):
+    async def get_transcription(self, audio, language="ru", partial=False):
         try:
-            with open(wav_file_path, "rb") as audio_file:
-                result = await self.client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=audio_file,
-                    language=language,
-                )
+            result = await self.client.audio.transcriptions.create(
+                model="whisper-1",
+                file=audio_to_wav_file(audio),
+                language=self.language or language,
+            )
             return result.text.strip()
         except Exception as e:
             print(e)
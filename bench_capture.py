@@ -0,0 +1,115 @@
+"""
+Бенчмарк потока захвата: CPU-время на секунду аудио 48 кГц стерео при разных размерах блока.
+
+    python bench_capture.py [секунд_аудио]
+
+«Захват» — то, что поток захвата делает с каждым блоком (BaseRecorder._capture_loop):
+StreamConverter.convert (моно 16 кГц) + StreamingSegmenter.feed со слежением за фоном;
+отдельно показано, сколько из этого времени занимает конвертация. Для сравнения —
+прежний захват динамика: Recognizer.listen по 2 фрейма за чтение.
+"""
+import sys
+import time
+
+import numpy as np
+
+import custom_speech_recognition as sr
+from custom_speech_recognition.energy import NoiseFloorTracker
+from AudioRecorder import (ENERGY_THRESHOLD, MIN_ENERGY_THRESHOLD, NOISE_FLOOR_TRACKING, StreamConverter,
+                           block_chunk_size, create_segmenter)
+
+SAMPLE_RATE = 48000
+CHANNELS = 2
+SECONDS = float(sys.argv[1]) if len(sys.argv) > 1 else 10.0
+
+
+class SyntheticLoopback(sr.AudioSource):
+    """Имитация loopback-устройства: шум + периодические «фразы» (тон 440 Гц)."""
+
+    def __init__(self, pcm, chunk_size):
+        self.SAMPLE_RATE = SAMPLE_RATE
+        self.SAMPLE_WIDTH = 2
+        self.CHUNK = chunk_size
+        self.channels = CHANNELS
+        self.pcm = pcm
+        self.stream = None
+
+    def __enter__(self):
+        self.stream = SyntheticLoopback.Stream(self.pcm, CHANNELS * 2)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stream = None
+
+    class Stream(object):
+        def __init__(self, pcm, frame_bytes):
+            self.pcm = pcm
+            self.pos = 0
+            self.frame_bytes = frame_bytes
+
+        def read(self, size):
+            n = size * self.frame_bytes
+            data = self.pcm[self.pos:self.pos + n]
+            self.pos += n
+            return data
+
+
+def make_pcm(seconds):
+    rng = np.random.default_rng(0)
+    n = int(seconds * SAMPLE_RATE)
+    t = np.arange(n) / SAMPLE_RATE
+    signal = rng.normal(0, 100, n)
+    speech = (t % 4.0) < 1.5  # 1.5 с «речи» каждые 4 с
+    signal[speech] += 6000 * np.sin(2 * np.pi * 440 * t[speech])
+    frames = np.repeat(signal[:, None], CHANNELS, axis=1)
+    return frames.astype("<i2").tobytes()
+
+
+def run(pcm, chunk_size, vectorized):
+    recognizer = sr.Recognizer()
+    recognizer.vectorized = vectorized
+    recognizer.energy_threshold = 1000
+    recognizer.dynamic_energy_threshold = False
+    source = SyntheticLoopback(pcm, chunk_size)
+    phrases = 0
+    start = time.process_time()
+    with source:
+        while source.stream.pos < len(pcm):
+            audio = recognizer.listen(source, phrase_time_limit=3)
+            if audio.frame_data:
+                phrases += 1
+    return time.process_time() - start, phrases
+
+
+def run_capture(pcm, block_ms):
+    """Блоки по block_ms через конвертер и сегментатор, как в потоке захвата; CPU всего и конвертации отдельно."""
+    converter = StreamConverter(SAMPLE_RATE, CHANNELS, 2)
+    noise_floor = NoiseFloorTracker(min_threshold=MIN_ENERGY_THRESHOLD) if NOISE_FLOOR_TRACKING else None
+    segmenter = create_segmenter(2, ENERGY_THRESHOLD, noise_floor)
+    step = block_chunk_size(SAMPLE_RATE, block_ms) * CHANNELS * 2
+    phrases = 0
+    convert_cpu = 0.0
+    start = time.process_time()
+    for i in range(0, len(pcm), step):
+        t0 = time.process_time()
+        data = converter.convert(pcm[i:i + step])
+        convert_cpu += time.process_time() - t0
+        events = segmenter.feed(data, i / (CHANNELS * 2) / SAMPLE_RATE)
+        phrases += sum(1 for *_, final in events if final)
+    phrases += sum(1 for *_, final in segmenter.flush() if final)
+    return time.process_time() - start, convert_cpu, phrases
+
+
+def main():
+    pcm = make_pcm(SECONDS)
+    print(f"Синтетический loopback: {SAMPLE_RATE} Гц, {CHANNELS} кан., {SECONDS:.0f} с")
+    cpu, phrases = run(pcm, 2, False)
+    print(f"{'listen, 2 фрейма (старый)':>26}: CPU {cpu / SECONDS * 1000:8.2f} мс/с аудио  фраз: {phrases}")
+    for ms in (10, 20, 30):
+        cpu, convert_cpu, phrases = run_capture(pcm, ms)
+        print(f"{f'захват, блок {ms} мс':>26}: CPU {cpu / SECONDS * 1000:8.2f} мс/с аудио  "
+              f"(конвертация {convert_cpu / SECONDS * 1000:.2f})  фраз: {phrases}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import json
+import math
+import os
+import threading
+import time
+
+
+def user_data_dir(app="ecoute"):
+    """Каталог данных пользователя: %APPDATA%\\ecoute на Windows, $XDG_DATA_HOME/ecoute (~/.local/share) иначе."""
+    base = os.environ.get("APPDATA") or os.environ.get("XDG_DATA_HOME") \
+        or os.path.join(os.path.expanduser("~"), ".local", "share")
+    return os.path.join(base, app)
+
+
+# Профили привязаны к устройствам этой машины, а не к рабочему каталогу или репозиторию
+CALIBRATION_FILE = os.path.join(user_data_dir(), "calibration.json")
+
+MAX_AGE_DAYS = 7          # профиль старше — калибруем заново
+DRIFT_RATIO = 2.0         # шум изменился больше чем в 2 раза (в любую сторону) — калибруем заново
+DRIFT_FLOOR = 50.0        # прибавка к энергиям при сравнении: тишина loopback (0) не считается дрейфом
+
+
+def device_key(name, host_api, sample_rate):
+    """Ключ профиля: имя устройства, host API и частота (разные режимы одного устройства — разные профили)."""
+    return f"{name}|{host_api}|{int(sample_rate)}"
+
+
+def noise_stats(energies):
+    """Статистика шумового фона по энергиям блоков: медиана и 90-й перцентиль."""
+    values = sorted(float(e) for e in energies)
+    if not values:
+        return None
+
+    def percentile(q):
+        return values[min(len(values) - 1, int(q * len(values)))]
+
+    return {"noise_floor": percentile(0.5), "noise_p90": percentile(0.9)}
+
+
+class CalibrationStore:
+    """
+    Профили калибровки шума по устройствам, хранятся в JSON между запусками.
+    Профиль: energy_threshold, noise_floor, noise_p90, measured_at (unix time).
+    Один экземпляр можно использовать из нескольких потоков.
+    """
+    def __init__(self, path=CALIBRATION_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._profiles = None
+
+    def _load(self):
+        if self._profiles is None:
+            self._profiles = {}
+            if os.path.exists(self.path):
+                try:
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        self._profiles = json.load(f)
+                except Exception:
+                    # повреждённый файл — просто калибруемся заново
+                    self._profiles = {}
+        return self._profiles
+
+    def get(self, key):
+        with self._lock:
+            profile = self._load().get(key)
+            return dict(profile) if profile else None
+
+    def put(self, key, energy_threshold, stats):
+        profile = {"energy_threshold": float(energy_threshold), "measured_at": time.time()}
+        profile.update(stats or {})
+        with self._lock:
+            self._load()[key] = profile
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump(self._profiles, f, ensure_ascii=False, indent=2)
+        return profile
+
+    @staticmethod
+    def is_stale(profile, max_age_days=MAX_AGE_DAYS):
+        return time.time() - profile.get("measured_at", 0) > max_age_days * 86400
+
+    @staticmethod
+    def has_drifted(profile, noise_floor, ratio=DRIFT_RATIO):
+        """Сравнивает свежий замер фона с сохранённым."""
+        stored = profile.get("noise_floor")
+        if stored is None:
+            return True
+        return abs(math.log((noise_floor + DRIFT_FLOOR) / (stored + DRIFT_FLOOR))) > math.log(ratio)
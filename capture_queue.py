@@ -0,0 +1,125 @@
+import queue
+
+# Политики переполнения
+BLOCK = "block"              # put() ждёт, пока транскрибер разгребёт очередь (захват тормозится)
+DROP_OLDEST = "drop_oldest"  # выкидываем самый старый фрагмент, новый кладём в конец
+COALESCE = "coalesce"        # склеиваем новый фрагмент с последним в очереди (но не через конец фразы)
+POLICIES = (BLOCK, DROP_OLDEST, COALESCE)
+# COALESCE не растит последний элемент больше этого: дальше — как DROP_OLDEST (~30 с моно 16 кГц 16 бит)
+MAX_ITEM_BYTES = 1 << 20
+
+
+def coalesce_chunks(older, newer):
+    """
+    Склейка двух соседних элементов (data, start, end[, final]) в один: начало от старого, конец от нового.
+    older не должен быть концом фразы (final) — иначе склейка сотрёт границу и паузу между фразами.
+    """
+    return (older[0] + newer[0], older[1]) + tuple(newer[2:])
+
+
+class CaptureQueue(queue.Queue):
+    """
+    Ограниченная очередь захваченного аудио с политикой переполнения.
+    Элементы — кортежи (data, start, end, final) из BaseRecorder.record_into_queue.
+
+    Живые метрики: depth (текущая глубина), high_water (максимум глубины),
+    dropped / dropped_bytes (выброшено при DROP_OLDEST, а при COALESCE — сверх max_item_bytes
+    и когда последний элемент в очереди закрывает фразу),
+    coalesced (склеек при COALESCE), blocked (сколько раз put() ждал при BLOCK). Снимок — stats().
+
+    add_listener(fn) — fn() вызывается после каждого put() в потоке захвата
+    (например, чтобы разбудить asyncio-цикл через call_soon_threadsafe), а если в очереди
+    уже что-то лежит — и сразу при регистрации, чтобы ранние элементы не ждали следующего put().
+    """
+    def __init__(self, maxsize=0, policy=DROP_OLDEST, name="audio", merge=coalesce_chunks,
+                 max_item_bytes=MAX_ITEM_BYTES):
+        if policy not in POLICIES:
+            raise ValueError(f"unknown overflow policy: {policy!r}")
+        super().__init__(maxsize)
+        self.policy = policy
+        self.name = name
+        self.merge = merge
+        self.max_item_bytes = max_item_bytes
+        self.high_water = 0
+        self.queued_bytes = 0
+        self.dropped = 0
+        self.dropped_bytes = 0
+        self.coalesced = 0
+        self.blocked = 0
+        self._listeners = []
+
+    # ---------- queue.Queue internals (вызываются под self.mutex) ----------
+    def _put(self, item):
+        super()._put(item)
+        self.queued_bytes += len(item[0])
+        self.high_water = max(self.high_water, len(self.queue))
+
+    def _get(self):
+        item = super()._get()
+        self.queued_bytes -= len(item[0])
+        return item
+
+    # ---------- API ----------
+    @property
+    def depth(self):
+        return self.qsize()
+
+    def add_listener(self, fn):
+        self._listeners.append(fn)
+        if self.qsize():
+            fn()
+
+    def remove_listener(self, fn):
+        self._listeners.remove(fn)
+
+    def put(self, item, block=True, timeout=None):
+        self._put_item(item, block, timeout)
+        for fn in self._listeners:
+            fn()
+
+    def _put_item(self, item, block, timeout):
+        if self.policy == BLOCK or self.maxsize <= 0:
+            if self.maxsize > 0 and self.full():
+                self.blocked += 1
+            return super().put(item, block, timeout)
+
+        with self.not_full:
+            if self._qsize() >= self.maxsize:
+                newest = self.queue[-1]
+                if (self.policy == DROP_OLDEST or len(newest[0]) + len(item[0]) > self.max_item_bytes
+                        or (len(newest) > 3 and newest[3])):     # через конец фразы не склеиваем
+                    oldest = self._get()
+                    self.unfinished_tasks -= 1
+                    self.dropped += 1
+                    self.dropped_bytes += len(oldest[0])
+                    self._warn(self.dropped, "dropped")
+                else:
+                    self.queue.pop()
+                    self.queued_bytes -= len(newest[0])
+                    self.unfinished_tasks -= 1
+                    item = self.merge(newest, item)
+                    self.coalesced += 1
+                    self._warn(self.coalesced, "coalesced")
+            self._put(item)
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+
+    def stats(self):
+        with self.mutex:
+            return {
+                "name": self.name,
+                "policy": self.policy,
+                "maxsize": self.maxsize,
+                "depth": self._qsize(),
+                "queued_bytes": self.queued_bytes,
+                "high_water": self.high_water,
+                "dropped": self.dropped,
+                "dropped_bytes": self.dropped_bytes,
+                "coalesced": self.coalesced,
+                "blocked": self.blocked,
+            }
+
+    def _warn(self, count, what):
+        # печатаем на 1, 2, 4, 8… событии, чтобы не заспамить консоль на долгом созвоне
+        if count & (count - 1) == 0:
+            print(f"[WARN] {self.name} queue full ({self.maxsize}): {count} chunk(s) {what} so far")
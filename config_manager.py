@@ -5,6 +5,22 @@ CONFIG_FILE = "config.json"
 
 DEFAULT_CONFIG = {
     "language": "ru",
+    # распознавание речи (TranscriberModels.get_model): точность против задержки под конкретную машину
+    "transcriber": {
+        "backend": "api",           # "api" — Whisper API, "local" — faster-whisper на этой машине
+        "model": "base",            # local: tiny / base / small / medium / large-v3, *.en — только английский
+        "device": "auto",           # local: "auto" | "cpu" | "cuda"
+        "compute_type": "auto",     # local: "auto" | "int8" | "int8_float16" | "float16" | "float32"
+        "cpu_threads": 0,           # local: потоков CTranslate2 (0 — по умолчанию / поровну между процессами)
+        "workers": 1,               # local: параллельных распознаваний в процессе
+        "processes": 0,             # local: > 0 — пул процессов с отдельными моделями
+        "beam_size": 5,
+        "batching": True,           # local: пакетное распознавание накопившихся фраз
+        "batch_size": 8,            # local: фраз в пакете не больше
+        "batch_window": 0.05,       # local: сколько секунд ждать, пока пакет наполнится
+        "language": "",             # "" — язык из окна настроек
+        "warm_up": True,
+    },
         "fonts": {
         "sync": True,
         "common":  {"family": "Arial", "size": 16, "bold": False, "italic": False, "color": "#ffffff"},
@@ -28,12 +44,13 @@ def load_config():
             with open(CONFIG_FILE, "r", encoding="utf-8") as f:
                 user_cfg = json.load(f)
                 # верхний уровень
-                cfg.update({k: v for k, v in user_cfg.items() if k != "fonts"})
-                # deep-merge для fonts
-                if isinstance(user_cfg.get("fonts"), dict):
-                    fonts = cfg["fonts"].copy()
-                    fonts.update(user_cfg["fonts"])
-                    cfg["fonts"] = fonts
+                cfg.update({k: v for k, v in user_cfg.items() if k not in ("fonts", "transcriber")})
+                # deep-merge для fonts и transcriber
+                for section in ("fonts", "transcriber"):
+                    if isinstance(user_cfg.get(section), dict):
+                        merged = cfg[section].copy()
+                        merged.update(user_cfg[section])
+                        cfg[section] = merged
         except Exception:
             # повреждённый JSON – игнорируем, берём дефолт
             pass
@@ -0,0 +1,2 @@
+# test_openai.py — ручная проверка ключа и прокси OpenAI (сетевой запрос), а не тест
+collect_ignore = ["test_openai.py"]
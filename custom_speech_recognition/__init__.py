@@ -8,9 +8,7 @@ import tempfile
 import sys
 import subprocess
 import wave
-import aifc
 import math
-import audioop
 import collections
 import json
 import base64
@@ -34,6 +32,10 @@ from urllib.request import Request, urlopen
 from urllib.error import URLError, HTTPError
 
 from .audio import AudioData, get_flac_converter
+from .ring_buffer import RingBuffer
+from .clock import SampleClock, phrase_times
+from . import dsp
+from . import energy as energy_engine
 from .exceptions import (
     RequestError,
     TranscriptionFailed, 
@@ -70,33 +72,43 @@ class Microphone(AudioSource):
     Higher ``sample_rate`` values result in better audio quality, but also more bandwidth (and therefore, slower recognition). Additionally, some CPUs, such as those in older Raspberry Pi models, can't keep up if this value is too high.
 
     Higher ``chunk_size`` values help avoid triggering on rapidly changing ambient noise, but also makes detection less sensitive. This value, generally, should be left at its default.
+
+    If ``callback_mode`` is true, the PyAudio stream is opened in non-blocking mode: PortAudio's ``stream_callback`` copies incoming audio into a preallocated ring buffer holding ``buffer_seconds`` seconds of audio, and reads are served from that buffer; reads longer than the buffer are served in pieces as the audio arrives. Overflows are counted on ``stream.ring_buffer`` (see ``RingBuffer.stats()``) instead of being hidden.
+
+    PortAudio initialization, termination and opening/closing streams are not thread safe, so they are serialized on ``Microphone.portaudio_lock``; several microphones can still be set up and read from different threads at the same time. Code that uses PyAudio directly alongside ``Microphone`` instances should hold the same lock.
     """
-    def __init__(self, device_index=None, sample_rate=None, chunk_size=1024, speaker=False, channels = 1):
+    portaudio_lock = threading.RLock()
+
+    def __init__(self, device_index=None, sample_rate=None, chunk_size=1024, speaker=False, channels = 1, callback_mode=False, buffer_seconds=2.0):
         assert device_index is None or isinstance(device_index, int), "Device index must be None or an integer"
         assert sample_rate is None or (isinstance(sample_rate, int) and sample_rate > 0), "Sample rate must be None or a positive integer"
         assert isinstance(chunk_size, int) and chunk_size > 0, "Chunk size must be a positive integer"
+        assert buffer_seconds > 0, "Buffer duration must be a positive number"
 
         # set up PyAudio
         self.speaker=speaker
         self.pyaudio_module = self.get_pyaudio()
-        audio = self.pyaudio_module.PyAudio()
-        try:
-            count = audio.get_device_count()  # obtain device count
-            if device_index is not None:  # ensure device index is in range
-                assert 0 <= device_index < count, "Device index out of range ({} devices available; device index should be between 0 and {} inclusive)".format(count, count - 1)
-            if sample_rate is None:  # automatically set the sample rate to the hardware's default sample rate if not specified
-                device_info = audio.get_device_info_by_index(device_index) if device_index is not None else audio.get_default_input_device_info()
-                assert isinstance(device_info.get("defaultSampleRate"), (float, int)) and device_info["defaultSampleRate"] > 0, "Invalid device info returned from PyAudio: {}".format(device_info)
-                sample_rate = int(device_info["defaultSampleRate"])
-        finally:
-            audio.terminate()
+        with Microphone.portaudio_lock:
+            audio = self.pyaudio_module.PyAudio()
+            try:
+                count = audio.get_device_count()  # obtain device count
+                if device_index is not None:  # ensure device index is in range
+                    assert 0 <= device_index < count, "Device index out of range ({} devices available; device index should be between 0 and {} inclusive)".format(count, count - 1)
+                if sample_rate is None:  # automatically set the sample rate to the hardware's default sample rate if not specified
+                    device_info = audio.get_device_info_by_index(device_index) if device_index is not None else audio.get_default_input_device_info()
+                    assert isinstance(device_info.get("defaultSampleRate"), (float, int)) and device_info["defaultSampleRate"] > 0, "Invalid device info returned from PyAudio: {}".format(device_info)
+                    sample_rate = int(device_info["defaultSampleRate"])
+            finally:
+                audio.terminate()
 
         self.device_index = device_index
         self.format = self.pyaudio_module.paInt16  # 16-bit int sampling
         self.SAMPLE_WIDTH = self.pyaudio_module.get_sample_size(self.format)  # size of each sample
         self.SAMPLE_RATE = sample_rate  # sampling rate in Hertz
         self.CHUNK = chunk_size  # number of frames stored in each buffer
-        self.channels = channels
+        self.channels = channels if speaker else 1  # regular microphones are always opened as mono
+        self.callback_mode = callback_mode
+        self.buffer_seconds = buffer_seconds
 
         self.audio = None
         self.stream = None
@@ -162,9 +174,9 @@ class Microphone(AudioSource):
                     continue
 
                 # compute RMS of debiased audio
-                energy = -audioop.rms(buffer, 2)
+                energy = -dsp.rms(buffer, 2)
                 energy_bytes = bytes([energy & 0xFF, (energy >> 8) & 0xFF])
-                debiased_energy = audioop.rms(audioop.add(buffer, energy_bytes * (len(buffer) // 2), 2), 2)
+                debiased_energy = dsp.rms(dsp.add(buffer, energy_bytes * (len(buffer) // 2), 2), 2)
 
                 if debiased_energy > 30:  # probably actually audio
                     result[device_index] = device_name
@@ -174,45 +186,74 @@ class Microphone(AudioSource):
 
     def __enter__(self):
         assert self.stream is None, "This audio source is already inside a context manager"
+        with Microphone.portaudio_lock:
+            return self._open()
+
+    def _open(self):
         self.audio = self.pyaudio_module.PyAudio()
 
         try:
-            if self.speaker:
-                p = self.audio
-                self.stream = Microphone.MicrophoneStream(
-                    p.open(
-                        input_device_index=self.device_index,
-                        channels=self.channels,
-                        format=self.format,
-                        rate=self.SAMPLE_RATE,
-                        frames_per_buffer=self.CHUNK,
-                        input=True
-                    )
+            stream_options = dict(
+                input_device_index=self.device_index,
+                channels=self.channels,
+                format=self.format,
+                rate=self.SAMPLE_RATE,
+                frames_per_buffer=self.CHUNK,
+                input=True,
+            )
+            frame_bytes = self.SAMPLE_WIDTH * stream_options["channels"]
+            clock = SampleClock(self.SAMPLE_RATE)
+            if self.callback_mode:
+                ring_buffer = RingBuffer(int(self.buffer_seconds * self.SAMPLE_RATE) * frame_bytes, frame_bytes)
+                pa_continue = self.pyaudio_module.paContinue
+                overflow_flag = self.pyaudio_module.paInputOverflow
+
+                def stream_callback(in_data, frame_count, time_info, status):
+                    # runs on the PortAudio thread: keep it to a single copy into preallocated memory
+                    clock.sync(ring_buffer.written // frame_bytes, frame_count)
+                    ring_buffer.write(in_data, overflowed=bool(status & overflow_flag))
+                    return None, pa_continue
+
+                self.stream = Microphone.CallbackStream(
+                    self.audio.open(stream_callback=stream_callback, **stream_options),
+                    ring_buffer, frame_bytes, clock,
                 )
             else:
-                self.stream = Microphone.MicrophoneStream(
-                    self.audio.open(
-                        input_device_index=self.device_index, channels=1, format=self.format,
-                        rate=self.SAMPLE_RATE, frames_per_buffer=self.CHUNK, input=True,
-                    )
-                )
+                self.stream = Microphone.MicrophoneStream(self.audio.open(**stream_options), frame_bytes, clock)
         except Exception:
             self.audio.terminate()
         return self
 
     def __exit__(self, exc_type, exc_value, traceback):
-        try:
-            self.stream.close()
-        finally:
-            self.stream = None
-            self.audio.terminate()
+        with Microphone.portaudio_lock:
+            try:
+                self.stream.close()
+            finally:
+                self.stream = None
+                self.audio.terminate()
 
     class MicrophoneStream(object):
-        def __init__(self, pyaudio_stream):
+        def __init__(self, pyaudio_stream, frame_bytes, clock):
             self.pyaudio_stream = pyaudio_stream
+            self.frame_bytes = frame_bytes
+            self.clock = clock  # ``SampleClock`` for frame indices of this stream
+            self.position = 0  # index of the frame after the last one returned by ``read``
 
         def read(self, size):
-            return self.pyaudio_stream.read(size, exception_on_overflow=False)
+            buffer = self.pyaudio_stream.read(size, exception_on_overflow=False)
+            frames = len(buffer) // self.frame_bytes
+            if frames: self.clock.sync(self.position, frames)  # the read returns as soon as the block is complete
+            self.position += frames
+            return buffer
+
+        def pause(self):
+            if not self.pyaudio_stream.is_stopped():
+                self.pyaudio_stream.stop_stream()
+
+        def resume(self):
+            self.clock.reset()
+            if self.pyaudio_stream.is_stopped():
+                self.pyaudio_stream.start_stream()
 
         def close(self):
             try:
@@ -222,6 +263,45 @@ class Microphone(AudioSource):
             finally:
                 self.pyaudio_stream.close()
 
+    class CallbackStream(object):
+        def __init__(self, pyaudio_stream, ring_buffer, frame_bytes, clock):
+            self.pyaudio_stream = pyaudio_stream
+            self.ring_buffer = ring_buffer
+            self.frame_bytes = frame_bytes
+            self.clock = clock  # anchored by the stream callback, indexed like the ring buffer
+            self.position = 0  # index of the frame after the last one returned by ``read``
+
+        def read(self, size):
+            # reads longer than the ring buffer (e.g. calibration) are served in pieces as the audio arrives
+            step = self.ring_buffer.capacity // self.frame_bytes
+            parts = []
+            while size > 0:
+                wanted = min(size, step) * self.frame_bytes
+                part = self.ring_buffer.read(wanted)
+                self.position = (self.ring_buffer.last_read_start + len(part)) // self.frame_bytes  # accounts for overwritten audio
+                parts.append(part)
+                if len(part) < wanted: break  # the buffer was closed
+                size -= len(part) // self.frame_bytes
+            return b"".join(parts)
+
+        def pause(self):
+            if not self.pyaudio_stream.is_stopped():
+                self.pyaudio_stream.stop_stream()
+
+        def resume(self):
+            self.ring_buffer.clear()  # whatever was captured before the pause is stale by now
+            self.clock.reset()
+            if self.pyaudio_stream.is_stopped():
+                self.pyaudio_stream.start_stream()
+
+        def close(self):
+            try:
+                if not self.pyaudio_stream.is_stopped():
+                    self.pyaudio_stream.stop_stream()
+            finally:
+                self.pyaudio_stream.close()
+                self.ring_buffer.close()
+
 
 class AudioFile(AudioSource):
     """
@@ -257,6 +337,7 @@ class AudioFile(AudioSource):
             self.audio_reader = wave.open(self.filename_or_fileobject, "rb")
             self.little_endian = True  # RIFF WAV is a little-endian format (most ``audioop`` operations assume that the frames are stored in little-endian form)
         except (wave.Error, EOFError):
+            import aifc  # imported here: removed in Python 3.13 along with ``audioop``, and only needed for AIFF and FLAC files
             try:
                 # attempt to read the file as AIFF
                 self.audio_reader = aifc.open(self.filename_or_fileobject, "rb")
@@ -295,8 +376,8 @@ class AudioFile(AudioSource):
         # 24-bit audio needs some special handling for old Python versions (workaround for https://bugs.python.org/issue12866)
         samples_24_bit_pretending_to_be_32_bit = False
         if self.SAMPLE_WIDTH == 3:  # 24-bit audio
-            try: audioop.bias(b"", self.SAMPLE_WIDTH, 0)  # test whether this sample width is supported (for example, ``audioop`` in Python 3.3 and below don't support sample width 3, while Python 3.4+ do)
-            except audioop.error:  # this version of audioop doesn't support 24-bit audio (probably Python 3.3 or less)
+            try: dsp.bias(b"", self.SAMPLE_WIDTH, 0)  # test whether this sample width is supported (for example, ``audioop`` in Python 3.3 and below don't support sample width 3, while Python 3.4+ do)
+            except dsp.error:  # this version of audioop doesn't support 24-bit audio (probably Python 3.3 or less)
                 samples_24_bit_pretending_to_be_32_bit = True  # while the ``AudioFile`` instance will outwardly appear to be 32-bit, it will actually internally be 24-bit
                 self.SAMPLE_WIDTH = 4  # the ``AudioFile`` instance should present itself as a 32-bit stream now, since we'll be converting into 32-bit on the fly when reading
 
@@ -318,15 +399,18 @@ class AudioFile(AudioSource):
             self.audio_reader = audio_reader  # an audio file object (e.g., a `wave.Wave_read` instance)
             self.little_endian = little_endian  # whether the audio data is little-endian (when working with big-endian things, we'll have to convert it to little-endian before we process it)
             self.samples_24_bit_pretending_to_be_32_bit = samples_24_bit_pretending_to_be_32_bit  # this is true if the audio is 24-bit audio, but 24-bit audio isn't supported, so we have to pretend that this is 32-bit audio and convert it on the fly
+            self.clock = SampleClock(audio_reader.getframerate(), start_time=0.0)  # times are seconds from the start of the file
+            self.position = 0
 
         def read(self, size=-1):
             buffer = self.audio_reader.readframes(self.audio_reader.getnframes() if size == -1 else size)
             if not isinstance(buffer, bytes): buffer = b""  # workaround for https://bugs.python.org/issue24608
+            self.position += len(buffer) // (self.audio_reader.getsampwidth() * self.audio_reader.getnchannels())
 
             sample_width = self.audio_reader.getsampwidth()
             if not self.little_endian:  # big endian format, convert to little endian on the fly
-                if hasattr(audioop, "byteswap"):  # ``audioop.byteswap`` was only added in Python 3.4 (incidentally, that also means that we don't need to worry about 24-bit audio being unsupported, since Python 3.4+ always has that functionality)
-                    buffer = audioop.byteswap(buffer, sample_width)
+                if hasattr(dsp, "byteswap"):  # ``audioop.byteswap`` was only added in Python 3.4 (incidentally, that also means that we don't need to worry about 24-bit audio being unsupported, since Python 3.4+ always has that functionality)
+                    buffer = dsp.byteswap(buffer, sample_width)
                 else:  # manually reverse the bytes of each sample, which is slower but works well enough as a fallback
                     buffer = buffer[sample_width - 1::-1] + b"".join(buffer[i + sample_width:i:-1] for i in range(sample_width - 1, len(buffer), sample_width))
 
@@ -335,7 +419,7 @@ class AudioFile(AudioSource):
                 buffer = b"".join(b"\x00" + buffer[i:i + sample_width] for i in range(0, len(buffer), sample_width))  # since we're in little endian, we prepend a zero byte to each 24-bit sample to get a 32-bit sample
                 sample_width = 4  # make sure we thread the buffer as 32-bit audio now, after converting it from 24-bit audio
             if self.audio_reader.getnchannels() != 1:  # stereo audio
-                buffer = audioop.tomono(buffer, sample_width, 1, 1)  # convert stereo audio data to mono
+                buffer = dsp.tomono(buffer, sample_width, 1, 1)  # convert stereo audio data to mono
             return buffer
 
 
@@ -354,6 +438,11 @@ class Recognizer(AudioSource):
         self.phrase_threshold = 0.3  # minimum seconds of speaking audio before we consider the speaking audio a phrase - values below this are ignored (for filtering out clicks and pops)
         self.non_speaking_duration = 0.5  # seconds of non-speaking audio to keep on both sides of the recording
 
+        self.vectorized = energy_engine.available()  # process audio in NumPy blocks instead of one chunk at a time
+        self.block_duration = 0.1  # seconds of audio read and analyzed at once by the vectorized engine
+        self._block_listener = None
+        self.noise_floor = None  # optional ``energy.NoiseFloorTracker``; when set, it drives ``energy_threshold`` continuously
+
     def record(self, source, duration=None, offset=None):
         """
         Records up to ``duration`` seconds of audio from ``source`` (an ``AudioSource`` instance) starting at ``offset`` (or at the beginning if not specified) into an ``AudioData`` instance, which it returns.
@@ -394,6 +483,8 @@ class Recognizer(AudioSource):
         Intended to calibrate the energy threshold with the ambient energy level. Should be used on periods of audio without speech - will stop early if any speech is detected.
 
         The ``duration`` parameter is the maximum number of seconds that it will dynamically adjust the threshold for before returning. This value should be at least 0.5 in order to get a representative sample of the ambient noise.
+
+        Returns the energies of the chunks that were measured (on the ``energy_threshold`` scale), e.g. for computing noise floor statistics.
         """
         assert isinstance(source, AudioSource), "Source must be an audio source"
         assert source.stream is not None, "Audio source must be entered before adjusting, see documentation for ``AudioSource``; are you using ``source`` outside of a ``with`` statement?"
@@ -402,17 +493,35 @@ class Recognizer(AudioSource):
         seconds_per_buffer = (source.CHUNK + 0.0) / source.SAMPLE_RATE
         elapsed_time = 0
 
+        if self.vectorized:  # read the whole calibration period at once and fold it into the threshold in one pass
+            buffer = source.stream.read(source.CHUNK * energy_engine.buffer_count(duration, seconds_per_buffer))
+            if len(buffer) == 0: return []
+            energies = energy_engine.chunk_energies(buffer, source.SAMPLE_WIDTH, energy_engine.source_chunk_bytes(source), getattr(source, "channels", 1))
+            damping = self.dynamic_energy_adjustment_damping ** seconds_per_buffer  # account for different chunk sizes and rates
+            self.energy_threshold = float(energy_engine.ema_thresholds(self.energy_threshold, energies * self.dynamic_energy_ratio, damping)[-1])
+            return energies
+
         # adjust energy threshold until a phrase starts
+        energies = []
         while True:
             elapsed_time += seconds_per_buffer
             if elapsed_time > duration: break
             buffer = source.stream.read(source.CHUNK)
-            energy = audioop.rms(buffer, source.SAMPLE_WIDTH)  # energy of the audio signal
+            energy = energy_engine.frame_energy(buffer, source.SAMPLE_WIDTH, getattr(source, "channels", 1))  # energy of the audio signal
+            energies.append(energy)
 
             # dynamically adjust the energy threshold using asymmetric weighted average
             damping = self.dynamic_energy_adjustment_damping ** seconds_per_buffer  # account for different chunk sizes and rates
             target_energy = energy * self.dynamic_energy_ratio
             self.energy_threshold = self.energy_threshold * damping + target_energy * (1 - damping)
+        return energies
+
+    def track_noise_floor(self, energies, seconds_per_buffer):
+        """Feeds chunk energies to ``self.noise_floor`` (if set) and moves ``energy_threshold`` to the threshold it derives."""
+        if self.noise_floor is None: return
+        self.noise_floor.update(energies, seconds_per_buffer)
+        if self.noise_floor.ready:
+            self.energy_threshold = self.noise_floor.threshold()
 
     def snowboy_wait_for_hot_word(self, snowboy_location, snowboy_hot_word_files, source, timeout=None):
         # load snowboy library (NOT THREAD SAFE)
@@ -451,7 +560,7 @@ class Recognizer(AudioSource):
             frames.append(buffer)
 
             # resample audio to the required sample rate
-            resampled_buffer, resampling_state = audioop.ratecv(buffer, source.SAMPLE_WIDTH, 1, source.SAMPLE_RATE, snowboy_sample_rate, resampling_state)
+            resampled_buffer, resampling_state = dsp.ratecv(buffer, source.SAMPLE_WIDTH, 1, source.SAMPLE_RATE, snowboy_sample_rate, resampling_state)
             resampled_frames.append(resampled_buffer)
             if time.time() - last_check > check_interval:
                 # run Snowboy on the resampled audio
@@ -476,6 +585,8 @@ class Recognizer(AudioSource):
         The ``snowboy_configuration`` parameter allows integration with `Snowboy <https://snowboy.kitt.ai/>`__, an offline, high-accuracy, power-efficient hotword recognition engine. When used, this function will pause until Snowboy detects a hotword, after which it will unpause. This parameter should either be ``None`` to turn off Snowboy support, or a tuple of the form ``(SNOWBOY_LOCATION, LIST_OF_HOT_WORD_FILES)``, where ``SNOWBOY_LOCATION`` is the path to the Snowboy root directory, and ``LIST_OF_HOT_WORD_FILES`` is a list of paths to Snowboy hotword configuration files (`*.pmdl` or `*.umdl` format).
 
         This operation will always complete within ``timeout + phrase_timeout`` seconds if both are numbers, either by returning the audio data, or by raising a ``speech_recognition.WaitTimeoutError`` exception.
+
+        If ``recognizer_instance.vectorized`` is true (the default when NumPy is installed) and Snowboy isn't used, the audio is read ``recognizer_instance.block_duration`` seconds at a time and each block is analyzed at once; the returned phrases are the same.
         """
         assert isinstance(source, AudioSource), "Source must be an audio source"
         assert source.stream is not None, "Audio source must be entered before listening, see documentation for ``AudioSource``; are you using ``source`` outside of a ``with`` statement?"
@@ -485,13 +596,19 @@ class Recognizer(AudioSource):
             for hot_word_file in snowboy_configuration[1]:
                 assert os.path.isfile(hot_word_file), "``snowboy_configuration[1]`` must be a list of Snowboy hot word configuration files"
 
+        if self.vectorized and snowboy_configuration is None:
+            if self._block_listener is None: self._block_listener = energy_engine.BlockListener(self)
+            return self._block_listener.listen(source, timeout, phrase_time_limit)
+
         seconds_per_buffer = float(source.CHUNK) / source.SAMPLE_RATE
         pause_buffer_count = int(math.ceil(self.pause_threshold / seconds_per_buffer))  # number of buffers of non-speaking audio during a phrase, before the phrase should be considered complete
         phrase_buffer_count = int(math.ceil(self.phrase_threshold / seconds_per_buffer))  # minimum number of buffers of speaking audio before we consider the speaking audio a phrase
         non_speaking_buffer_count = int(math.ceil(self.non_speaking_duration / seconds_per_buffer))  # maximum number of buffers of non-speaking audio to retain before and after a phrase
+        timeout_buffer_count = energy_engine.buffer_count(timeout, seconds_per_buffer) if timeout else None  # maximum number of buffers to wait for a phrase to start
+        limit_buffer_count = energy_engine.buffer_count(phrase_time_limit, seconds_per_buffer) if phrase_time_limit else None  # maximum number of buffers in a phrase
 
         # read audio input for phrases until there is a phrase that is long enough
-        elapsed_time = 0  # number of seconds of audio read
+        elapsed_count = 0  # number of buffers of audio read, counted as integers so that limits don't depend on floating point accumulation
         buffer = b""  # an empty buffer means that the stream has ended and there is no data left to read
         while True:
             frames = collections.deque()
@@ -500,8 +617,8 @@ class Recognizer(AudioSource):
                 # store audio input until the phrase starts
                 while True:
                     # handle waiting too long for phrase by raising an exception
-                    elapsed_time += seconds_per_buffer
-                    if timeout and elapsed_time > timeout:
+                    elapsed_count += 1
+                    if timeout_buffer_count is not None and elapsed_count > timeout_buffer_count:
                         raise WaitTimeoutError("listening timed out while waiting for phrase to start")
 
                     buffer = source.stream.read(source.CHUNK)
@@ -511,29 +628,31 @@ class Recognizer(AudioSource):
                         frames.popleft()
 
                     # detect whether speaking has started on audio input
-                    energy = audioop.rms(buffer, source.SAMPLE_WIDTH)  # energy of the audio signal
-                    if energy > self.energy_threshold: break
+                    energy = energy_engine.frame_energy(buffer, source.SAMPLE_WIDTH, getattr(source, "channels", 1))  # energy of the audio signal
+                    speaking = energy > self.energy_threshold
 
                     # dynamically adjust the energy threshold using asymmetric weighted average
-                    if self.dynamic_energy_threshold:
+                    if self.dynamic_energy_threshold and not speaking:
                         damping = self.dynamic_energy_adjustment_damping ** seconds_per_buffer  # account for different chunk sizes and rates
                         target_energy = energy * self.dynamic_energy_ratio
                         self.energy_threshold = self.energy_threshold * damping + target_energy * (1 - damping)
+                    self.track_noise_floor((energy,), seconds_per_buffer)
+                    if speaking: break
             else:
                 # read audio input until the hotword is said
                 snowboy_location, snowboy_hot_word_files = snowboy_configuration
                 buffer, delta_time = self.snowboy_wait_for_hot_word(snowboy_location, snowboy_hot_word_files, source, timeout)
-                elapsed_time += delta_time
+                elapsed_count += int(round(delta_time / seconds_per_buffer))
                 if len(buffer) == 0: break  # reached end of the stream
                 frames.append(buffer)
 
             # read audio input until the phrase ends
             pause_count, phrase_count = 0, 0
-            phrase_start_time = elapsed_time
+            phrase_start_count = elapsed_count
             while True:
                 # handle phrase being too long by cutting off the audio
-                elapsed_time += seconds_per_buffer
-                if phrase_time_limit and elapsed_time - phrase_start_time > phrase_time_limit:
+                elapsed_count += 1
+                if limit_buffer_count is not None and elapsed_count - phrase_start_count > limit_buffer_count:
                     break
 
                 buffer = source.stream.read(source.CHUNK)
@@ -542,8 +661,10 @@ class Recognizer(AudioSource):
                 phrase_count += 1
 
                 # check if speaking has stopped for longer than the pause threshold on the audio input
-                energy = audioop.rms(buffer, source.SAMPLE_WIDTH)  # unit energy of the audio signal within the buffer
-                if energy > self.energy_threshold:
+                energy = energy_engine.frame_energy(buffer, source.SAMPLE_WIDTH, getattr(source, "channels", 1))  # unit energy of the audio signal within the buffer
+                speaking = energy > self.energy_threshold
+                self.track_noise_floor((energy,), seconds_per_buffer)
+                if speaking:
                     pause_count = 0
                 else:
                     pause_count += 1
@@ -555,12 +676,15 @@ class Recognizer(AudioSource):
             if phrase_count >= phrase_buffer_count or len(buffer) == 0: break  # phrase is long enough or we've reached the end of the stream, so stop listening
 
         # obtain frame data
-        for i in range(pause_count - non_speaking_buffer_count): frames.pop()  # remove extra non-speaking frames at the end
+        removed = 0
+        for i in range(pause_count - non_speaking_buffer_count): removed += len(frames.pop())  # remove extra non-speaking frames at the end
         frame_data = b"".join(frames)
 
-        return AudioData(frame_data, source.SAMPLE_RATE, source.SAMPLE_WIDTH)
+        frame_bytes = source.SAMPLE_WIDTH * getattr(source, "channels", 1)
+        start_time, end_time = phrase_times(source.stream, len(frame_data) // frame_bytes, removed // frame_bytes)
+        return AudioData(frame_data, source.SAMPLE_RATE, source.SAMPLE_WIDTH, start_time, end_time)
 
-    def listen_in_background(self, source, callback, phrase_time_limit=None):
+    def listen_in_background(self, source, callback, phrase_time_limit=None, active=None):
         """
         Spawns a thread to repeatedly record phrases from ``source`` (an ``AudioSource`` instance) into an ``AudioData`` instance and call ``callback`` with that ``AudioData`` instance as soon as each phrase are detected.
 
@@ -569,13 +693,25 @@ class Recognizer(AudioSource):
         Phrase recognition uses the exact same mechanism as ``recognizer_instance.listen(source)``. The ``phrase_time_limit`` parameter works in the same way as the ``phrase_time_limit`` parameter for ``recognizer_instance.listen(source)``, as well.
 
         The ``callback`` parameter is a function that should accept two parameters - the ``recognizer_instance``, and an ``AudioData`` instance representing the captured audio. Note that ``callback`` function will be called from a non-main thread.
+
+        The optional ``active`` parameter is a ``threading.Event``: while it is cleared, the background listener pauses the underlying stream and sleeps on the event, so no audio is read or analyzed. Audio captured before the pause is discarded on resume. Calling the stop function sets the event so a paused listener can exit.
         """
         assert isinstance(source, AudioSource), "Source must be an audio source"
         running = [True]
 
+        def wait_while_paused(s):
+            if hasattr(s.stream, "pause"): s.stream.pause()
+            active.wait()
+            if not running[0]: return
+            if hasattr(s.stream, "resume"): s.stream.resume()
+            if self._block_listener is not None: self._block_listener.reset()
+
         def threaded_listen():
             with source as s:
                 while running[0]:
+                    if active is not None and not active.is_set():
+                        wait_while_paused(s)
+                        continue
                     try:  # listen for 1 second, then check again if the stop function has been called
                         audio = self.listen(s, 1, phrase_time_limit)
                     except WaitTimeoutError:  # listening timed out, just try again
@@ -585,6 +721,7 @@ class Recognizer(AudioSource):
 
         def stopper(wait_for_stop=True):
             running[0] = False
+            if active is not None: active.set()  # wake up a paused listener so it can exit
             if wait_for_stop:
                 listener_thread.join()  # block until the background thread is done, which can take around 1 second
 
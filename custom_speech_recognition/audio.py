@@ -1,5 +1,3 @@
-import aifc
-import audioop
 import io
 import os
 import platform
@@ -8,6 +6,8 @@ import subprocess
 import sys
 import wave
 
+from . import dsp
+
 
 class AudioData(object):
     """
@@ -20,9 +20,11 @@ class AudioData(object):
     The audio data is assumed to have a sample rate of ``sample_rate`` samples per second (Hertz).
 
     Usually, instances of this class are obtained from ``recognizer_instance.record`` or ``recognizer_instance.listen``, or in the callback for ``recognizer_instance.listen_in_background``, rather than instantiating them directly.
+
+    ``start_time`` and ``end_time`` are the ``time.monotonic()`` times of the first and one-past-the-last frame, derived from the stream's sample clock, or ``None`` if the source doesn't provide one.
     """
 
-    def __init__(self, frame_data, sample_rate, sample_width):
+    def __init__(self, frame_data, sample_rate, sample_width, start_time=None, end_time=None):
         assert sample_rate > 0, "Sample rate must be a positive integer"
         assert (
             sample_width % 1 == 0 and 1 <= sample_width <= 4
@@ -30,6 +32,8 @@ class AudioData(object):
         self.frame_data = frame_data
         self.sample_rate = sample_rate
         self.sample_width = int(sample_width)
+        self.start_time = start_time
+        self.end_time = end_time
 
     def get_segment(self, start_ms=None, end_ms=None):
         """
@@ -82,19 +86,18 @@ class AudioData(object):
 
         # make sure unsigned 8-bit audio (which uses unsigned samples) is handled like higher sample width audio (which uses signed samples)
         if self.sample_width == 1:
-            raw_data = audioop.bias(
+            raw_data = dsp.bias(
                 raw_data, 1, -128
             )  # subtract 128 from every sample to make them act like signed samples
 
         # resample audio at the desired rate if specified
         if convert_rate is not None and self.sample_rate != convert_rate:
-            raw_data, _ = audioop.ratecv(
+            raw_data = dsp.resample(
                 raw_data,
                 self.sample_width,
                 1,
                 self.sample_rate,
                 convert_rate,
-                None,
             )
 
         # convert samples to desired sample width if specified
@@ -102,32 +105,32 @@ class AudioData(object):
             if (
                 convert_width == 3
             ):  # we're converting the audio into 24-bit (workaround for https://bugs.python.org/issue12866)
-                raw_data = audioop.lin2lin(
+                raw_data = dsp.lin2lin(
                     raw_data, self.sample_width, 4
                 )  # convert audio into 32-bit first, which is always supported
                 try:
-                    audioop.bias(
+                    dsp.bias(
                         b"", 3, 0
                     )  # test whether 24-bit audio is supported (for example, ``audioop`` in Python 3.3 and below don't support sample width 3, while Python 3.4+ do)
                 except (
-                    audioop.error
+                    dsp.error
                 ):  # this version of audioop doesn't support 24-bit audio (probably Python 3.3 or less)
                     raw_data = b"".join(
                         raw_data[i + 1 : i + 4]
                         for i in range(0, len(raw_data), 4)
                     )  # since we're in little endian, we discard the first byte from each 32-bit sample to get a 24-bit sample
                 else:  # 24-bit audio fully supported, we don't need to shim anything
-                    raw_data = audioop.lin2lin(
+                    raw_data = dsp.lin2lin(
                         raw_data, self.sample_width, convert_width
                     )
             else:
-                raw_data = audioop.lin2lin(
+                raw_data = dsp.lin2lin(
                     raw_data, self.sample_width, convert_width
                 )
 
         # if the output is 8-bit audio with unsigned samples, convert the samples we've been treating as signed to unsigned again
         if convert_width == 1:
-            raw_data = audioop.bias(
+            raw_data = dsp.bias(
                 raw_data, 1, 128
             )  # add 128 to every sample to make them act like unsigned samples again
 
@@ -184,9 +187,9 @@ class AudioData(object):
 
         # the AIFF format is big-endian, so we need to convert the little-endian raw data to big-endian
         if hasattr(
-            audioop, "byteswap"
+            dsp, "byteswap"
         ):  # ``audioop.byteswap`` was only added in Python 3.4
-            raw_data = audioop.byteswap(raw_data, sample_width)
+            raw_data = dsp.byteswap(raw_data, sample_width)
         else:  # manually reverse the bytes of each sample, which is slower but works well enough as a fallback
             raw_data = raw_data[sample_width - 1 :: -1] + b"".join(
                 raw_data[i + sample_width : i : -1]
@@ -194,6 +197,7 @@ class AudioData(object):
             )
 
         # generate the AIFF-C file contents
+        import aifc  # imported here: removed in Python 3.13 along with ``audioop``, and only needed for AIFF and FLAC output
         with io.BytesIO() as aiff_file:
             aiff_writer = aifc.open(aiff_file, "wb")
             try:  # note that we can't use context manager, since that was only added in Python 3.4
@@ -0,0 +1,61 @@
+import time
+
+
+class SampleClock(object):
+    """
+    Maps frame indices of a stream onto ``time.monotonic()`` seconds.
+
+    The clock is anchored when the first audio of a (re)started stream arrives: from then on the time of frame ``n`` is derived from the frame count, so timestamps are sample-accurate and free of scheduler jitter. A live stream reports every block to ``sync``, which re-anchors the clock when the frame count stops matching the arrival times - some devices send nothing at all for a while (WASAPI loopback during silence), and the frame count alone would then fall behind real time by the length of every gap. If ``start_time`` is given, frame 0 is anchored at that time right away.
+
+    ``max_lag`` is how many seconds a block may arrive later than its frame count implies before the clock is re-anchored; below that, the difference is taken for delivery jitter.
+    """
+
+    def __init__(self, sample_rate, start_time=None, max_lag=0.1):
+        self.sample_rate = sample_rate
+        self.max_lag = max_lag
+        self.anchor_frame = None if start_time is None else 0
+        self.anchor_time = start_time
+
+    @property
+    def needs_anchor(self):
+        return self.anchor_time is None
+
+    def anchor(self, frame, frame_count=0):
+        """Anchors the clock so that ``frame`` was captured ``frame_count`` frames before now (i.e. at the start of a block that just arrived)."""
+        self.anchor_frame = frame
+        self.anchor_time = time.monotonic() - float(frame_count) / self.sample_rate
+
+    def sync(self, frame, frame_count):
+        """
+        Reports a block of ``frame_count`` frames starting at ``frame`` that has just arrived. Anchors the clock at the first block, and re-anchors it when the block would have been captured after it arrived (the clock ran ahead) or more than ``max_lag`` seconds before (the device skipped a gap).
+        """
+        latest = time.monotonic() - float(frame_count) / self.sample_rate  # the block can't have started any later
+        current = self.time_of(frame)
+        if current is None or current > latest or latest - current > self.max_lag:
+            self.anchor_frame = frame
+            self.anchor_time = latest
+
+    def reset(self):
+        """Forgets the anchor; the next block re-anchors the clock (e.g. after the stream was stopped and restarted)."""
+        self.anchor_frame = None
+        self.anchor_time = None
+
+    def time_of(self, frame):
+        """Returns the monotonic time of ``frame``, or ``None`` if the clock isn't anchored yet."""
+        if self.anchor_time is None:
+            return None
+        return self.anchor_time + float(frame - self.anchor_frame) / self.sample_rate
+
+
+def phrase_times(stream, frame_count, trailing_frames=0):
+    """
+    Returns the ``(start_time, end_time)`` of ``frame_count`` frames that end ``trailing_frames`` frames before the read position of ``stream``.
+
+    Returns ``(None, None)`` for streams that don't keep a ``position`` and a ``clock``.
+    """
+    position = getattr(stream, "position", None)
+    clock = getattr(stream, "clock", None)
+    if position is None or clock is None:
+        return None, None
+    end = position - trailing_frames
+    return clock.time_of(end - frame_count), clock.time_of(end)
@@ -0,0 +1,275 @@
+"""
+Pluggable backend for the handful of PCM primitives used by this package (``rms``, ``ratecv``, ``lin2lin``, ``bias``, ``add``, ``tomono``, ``byteswap``).
+
+Two backends are available:
+
+* ``"audioop"`` - the standard library ``audioop`` module (removed in Python 3.13).
+* ``"numpy"`` - vectorized NumPy implementations with the same semantics, except that resampling uses a windowed-sinc polyphase filter instead of ``audioop``'s linear interpolation.
+
+The backend is selected automatically (``audioop`` if it can be imported, NumPy otherwise) and can be changed with ``set_backend``. All fragments are little-endian signed PCM, like ``audioop`` expects.
+"""
+
+import math
+
+try:
+    import audioop
+except (ModuleNotFoundError, ImportError):
+    audioop = None
+
+try:
+    import numpy as np
+except (ModuleNotFoundError, ImportError):
+    np = None
+
+
+class DSPError(ValueError):
+    pass
+
+
+# exceptions that any backend may raise for unsupported or malformed fragments
+error = (DSPError,) if audioop is None else (DSPError, audioop.error)
+
+
+def to_samples(fragment, width):
+    """Returns the samples in ``fragment`` as a NumPy integer array, without copying where possible."""
+    if width == 1:
+        return np.frombuffer(fragment, dtype=np.int8)
+    if width == 2:
+        return np.frombuffer(fragment, dtype="<i2")
+    if width == 4:
+        return np.frombuffer(fragment, dtype="<i4")
+    if width == 3:  # widen every sample to 32 bits, keeping the sign of the top byte
+        raw = np.frombuffer(fragment, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        value = raw[:, 0] | (raw[:, 1] << 8) | (raw[:, 2] << 16)
+        return np.where(value & 0x800000, value - 0x1000000, value)
+    raise DSPError("Size should be 1, 2, 3 or 4")
+
+
+def from_samples(values, width):
+    """Returns ``values`` (any numeric array) as a fragment of ``width``-byte samples, rounding and saturating as needed."""
+    if width not in (1, 2, 3, 4):
+        raise DSPError("Size should be 1, 2, 3 or 4")
+    values = np.asarray(values)
+    if values.dtype.kind == "f":
+        values = np.floor(values + 0.5)
+    limit = 1 << (8 * width - 1)
+    values = np.clip(values, -limit, limit - 1)
+    if width == 1:
+        return values.astype(np.int8).tobytes()
+    if width == 2:
+        return values.astype("<i2").tobytes()
+    if width == 4:
+        return values.astype("<i4").tobytes()
+    return values.astype("<i4").view(np.uint8).reshape(-1, 4)[:, :3].tobytes()
+
+
+class PolyphaseResampler(object):
+    """
+    Rational-ratio resampler for interleaved audio: upsample by ``L``, low-pass with a Kaiser-windowed sinc, downsample by ``M``, computed in polyphase form so only the needed output samples are evaluated.
+
+    ``process`` is streaming - it keeps the filter history between calls, so consecutive fragments of one stream can be fed in as they arrive (the output lags the input by half the filter length). ``resample`` converts one complete signal with the filter delay compensated.
+    """
+
+    OUTPUT_BATCH = 8192  # output samples evaluated per vectorized step, bounds temporary memory on long signals
+
+    def __init__(self, in_rate, out_rate, channels=1, zero_crossings=16, rolloff=0.9, kaiser_beta=8.6):
+        assert in_rate > 0 and out_rate > 0, "Sample rates must be positive integers"
+        g = math.gcd(int(in_rate), int(out_rate))
+        self.up, self.down = int(out_rate) // g, int(in_rate) // g
+        self.channels = channels
+        cutoff = rolloff * 0.5 / max(self.up, self.down)  # cycles per sample at the upsampled rate
+        half_length = int(math.ceil(zero_crossings / (2 * cutoff)))
+        taps = 2 * half_length + 1
+        n = np.arange(taps) - half_length
+        h = 2 * cutoff * np.sinc(2 * cutoff * n) * np.kaiser(taps, kaiser_beta) * self.up
+        self.delay = half_length  # in upsampled samples
+        self.phase_taps = -(-taps // self.up)
+        h = np.concatenate([h, np.zeros(self.phase_taps * self.up - taps)])
+        # phases[p, i] = h[p + i * up], stored reversed so it lines up with a forward sliding window over the input
+        self.phases = h.reshape(self.phase_taps, self.up).T[:, ::-1].copy()
+        self.reset()
+
+    def reset(self):
+        """Forgets the stream history, as if no input had been processed yet."""
+        self._history = np.zeros((self.phase_taps - 1, self.channels))
+        self._consumed = 0  # absolute index of the next input frame
+        self._next_output = 0  # absolute index of the next output frame
+
+    def output_length(self, input_length):
+        return -(-input_length * self.up // self.down)
+
+    def _evaluate(self, buffer, buffer_start, first, last, offset):
+        windows = np.lib.stride_tricks.sliding_window_view(buffer, self.phase_taps, axis=0)  # (frames, channels, taps)
+        if self.up == 1 and last > first:  # integer decimation: a single phase over evenly strided windows, no gather needed
+            oldest = first * self.down + offset - buffer_start - (self.phase_taps - 1)
+            return windows[oldest:oldest + (last - first - 1) * self.down + 1:self.down] @ self.phases[0]
+        output = np.empty((last - first, self.channels))
+        for start in range(first, last, self.OUTPUT_BATCH):
+            position = np.arange(start, min(last, start + self.OUTPUT_BATCH), dtype=np.int64) * self.down + offset
+            newest = position // self.up - buffer_start  # buffer index of the newest input frame under the filter
+            output[start - first:start - first + len(position)] = np.einsum(
+                "nk,nck->nc", self.phases[position % self.up], windows[newest - (self.phase_taps - 1)]
+            )
+        return output
+
+    def process(self, frames):
+        """Feeds ``frames`` (shape ``(n, channels)``, or ``(n,)`` for mono) into the stream and returns every output frame that can now be computed."""
+        frames = np.asarray(frames, dtype=np.float64).reshape(-1, self.channels)
+        buffer = np.concatenate([self._history, frames])
+        buffer_start = self._consumed - len(self._history)
+        self._consumed += len(frames)
+        last = self.output_length(self._consumed)
+        output = self._evaluate(buffer, buffer_start, self._next_output, last, 0)
+        self._next_output = last
+        self._history = buffer[len(buffer) - (self.phase_taps - 1):]
+        return output
+
+    def resample(self, frames):
+        """Resamples one complete signal (shape ``(n, channels)``, or ``(n,)`` for mono) with the filter delay removed; does not touch the stream state."""
+        frames = np.asarray(frames, dtype=np.float64).reshape(-1, self.channels)
+        count = self.output_length(len(frames))
+        if count == 0:
+            return np.zeros((0, self.channels))
+        newest = ((count - 1) * self.down + self.delay) // self.up
+        padding = np.zeros((max(0, newest - len(frames) + 1), self.channels))
+        buffer = np.concatenate([np.zeros((self.phase_taps - 1, self.channels)), frames, padding])
+        return self._evaluate(buffer, -(self.phase_taps - 1), 0, count, self.delay)
+
+
+class AudioopBackend(object):
+    name = "audioop"
+
+    def __init__(self):
+        if audioop is None:
+            raise DSPError("the audioop module is not available in this Python version")
+
+    def rms(self, fragment, width):
+        return audioop.rms(fragment, width)
+
+    def add(self, fragment1, fragment2, width):
+        return audioop.add(fragment1, fragment2, width)
+
+    def bias(self, fragment, width, bias):
+        return audioop.bias(fragment, width, bias)
+
+    def lin2lin(self, fragment, width, newwidth):
+        return audioop.lin2lin(fragment, width, newwidth)
+
+    def tomono(self, fragment, width, lfactor, rfactor):
+        return audioop.tomono(fragment, width, lfactor, rfactor)
+
+    def byteswap(self, fragment, width):
+        return audioop.byteswap(fragment, width)
+
+    def ratecv(self, fragment, width, nchannels, inrate, outrate, state, weightA=1, weightB=0):
+        return audioop.ratecv(fragment, width, nchannels, inrate, outrate, state, weightA, weightB)
+
+    def resample(self, fragment, width, nchannels, inrate, outrate):
+        return audioop.ratecv(fragment, width, nchannels, inrate, outrate, None)[0]
+
+
+class NumpyBackend(object):
+    name = "numpy"
+
+    def __init__(self):
+        if np is None:
+            raise DSPError("NumPy is not installed")
+
+    def rms(self, fragment, width):
+        values = to_samples(fragment, width).astype(np.float64)
+        if len(values) == 0:
+            return 0
+        return int(math.sqrt(np.dot(values, values) / len(values)))
+
+    def add(self, fragment1, fragment2, width):
+        if len(fragment1) != len(fragment2):
+            raise DSPError("Lengths should be the same")
+        return from_samples(to_samples(fragment1, width).astype(np.int64) + to_samples(fragment2, width), width)
+
+    def bias(self, fragment, width, bias):
+        span = 1 << (8 * width)
+        values = (to_samples(fragment, width).astype(np.int64) + bias + span // 2) % span - span // 2  # wraps around like audioop
+        return from_samples(values, width)
+
+    def lin2lin(self, fragment, width, newwidth):
+        values = to_samples(fragment, width).astype(np.int64)
+        shift = 8 * (newwidth - width)
+        values = values << shift if shift >= 0 else values >> -shift
+        return from_samples(values, newwidth)
+
+    def tomono(self, fragment, width, lfactor, rfactor):
+        values = to_samples(fragment, width).astype(np.float64).reshape(-1, 2)
+        return from_samples(np.floor(values[:, 0] * lfactor + values[:, 1] * rfactor).astype(np.int64), width)
+
+    def byteswap(self, fragment, width):
+        return np.frombuffer(fragment, dtype=np.uint8).reshape(-1, width)[:, ::-1].tobytes()
+
+    def ratecv(self, fragment, width, nchannels, inrate, outrate, state, weightA=1, weightB=0):
+        """Streaming resampling; ``state`` is an opaque ``PolyphaseResampler`` (``weightA`` / ``weightB`` are accepted for compatibility and ignored)."""
+        if state is None:
+            state = PolyphaseResampler(inrate, outrate, nchannels)
+        return from_samples(state.process(to_samples(fragment, width)), width), state
+
+    def resample(self, fragment, width, nchannels, inrate, outrate):
+        resampler = PolyphaseResampler(inrate, outrate, nchannels)
+        return from_samples(resampler.resample(to_samples(fragment, width)), width)
+
+
+BACKENDS = {"audioop": AudioopBackend, "numpy": NumpyBackend}
+backend = None
+
+
+def set_backend(name=None):
+    """
+    Selects the DSP backend by name (``"audioop"`` or ``"numpy"``), or installs ``name`` directly if it is a backend instance.
+
+    If ``name`` is ``None``, ``audioop`` is used when available, and NumPy otherwise.
+    """
+    global backend
+    if name is None:
+        name = "audioop" if audioop is not None else "numpy"
+    backend = BACKENDS[name]() if isinstance(name, str) else name
+    return backend
+
+
+def get_backend():
+    return backend
+
+
+def rms(fragment, width):
+    return backend.rms(fragment, width)
+
+
+def add(fragment1, fragment2, width):
+    return backend.add(fragment1, fragment2, width)
+
+
+def bias(fragment, width, bias):
+    return backend.bias(fragment, width, bias)
+
+
+def lin2lin(fragment, width, newwidth):
+    return backend.lin2lin(fragment, width, newwidth)
+
+
+def tomono(fragment, width, lfactor, rfactor):
+    return backend.tomono(fragment, width, lfactor, rfactor)
+
+
+def byteswap(fragment, width):
+    return backend.byteswap(fragment, width)
+
+
+def ratecv(fragment, width, nchannels, inrate, outrate, state, weightA=1, weightB=0):
+    return backend.ratecv(fragment, width, nchannels, inrate, outrate, state, weightA, weightB)
+
+
+def resample(fragment, width, nchannels, inrate, outrate):
+    """Resamples one complete fragment (no streaming state)."""
+    return backend.resample(fragment, width, nchannels, inrate, outrate)
+
+
+try:
+    set_backend()
+except DSPError:  # neither audioop nor NumPy: the primitives raise until a backend is installed
+    pass
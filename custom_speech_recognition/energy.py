@@ -0,0 +1,266 @@
+"""Energy detection for ``Recognizer.listen``: channel-aware, normalized chunk energies, and a vectorized engine used when NumPy is available."""
+
+import math
+from array import array
+
+try:
+    import numpy as np
+except (ModuleNotFoundError, ImportError):
+    np = None
+
+from .audio import AudioData
+from .clock import phrase_times
+from . import dsp
+from .dsp import to_samples
+from .exceptions import WaitTimeoutError
+
+EMA_SEGMENT = 64  # steps per closed-form EMA segment, keeps ``damping ** -n`` well inside float64 range
+
+
+def available():
+    """Returns whether the vectorized engine can be used (i.e. NumPy is installed)."""
+    return np is not None
+
+
+def sample_scale(sample_width):
+    """Factor that maps an RMS value at ``sample_width`` bytes per sample onto the 16-bit scale thresholds are expressed in."""
+    return 2.0 ** (16 - 8 * sample_width)
+
+
+def chunk_energies(buffer, sample_width, chunk_bytes, channels=1):
+    """
+    Returns the energy of every ``chunk_bytes``-sized chunk of interleaved ``channels``-channel ``buffer``.
+
+    The energy of a chunk is the RMS of its loudest channel, expressed on the 16-bit scale, so one ``energy_threshold`` means the same thing for every device regardless of channel count or sample width. For mono 16-bit audio this is exactly what ``audioop.rms`` gives for each chunk.
+
+    A trailing partial chunk gets its own energy, as if it had been read separately.
+    """
+    full = len(buffer) // chunk_bytes
+    values = to_samples(buffer, sample_width).astype(np.float64)
+    per_chunk = chunk_bytes // sample_width
+    squares = values[:full * per_chunk].reshape(full, per_chunk // channels, channels)
+    energies = np.sqrt(np.einsum("ijk,ijk->ik", squares, squares).max(axis=1) / (per_chunk // channels))
+    if len(buffer) > full * chunk_bytes:
+        tail = values[full * per_chunk:].reshape(-1, channels)
+        energies = np.append(energies, math.sqrt(np.einsum("jk,jk->k", tail, tail).max() / len(tail)))
+    return np.floor(energies) * sample_scale(sample_width)
+
+
+def frame_energy(buffer, sample_width, channels=1):
+    """Energy of a single chunk, on the same scale as ``chunk_energies``; used by the chunk-by-chunk code paths."""
+    if channels == 1:
+        return dsp.rms(buffer, sample_width) * sample_scale(sample_width)
+    if np is None and channels == 2:
+        loudest = max(dsp.rms(dsp.tomono(buffer, sample_width, 1, 0), sample_width), dsp.rms(dsp.tomono(buffer, sample_width, 0, 1), sample_width))
+        return loudest * sample_scale(sample_width)
+    return float(chunk_energies(buffer, sample_width, len(buffer), channels)[0])
+
+
+def buffer_count(duration, seconds_per_buffer):
+    """Returns how many whole buffers fit in ``duration`` seconds (tolerant to floating point error, e.g. 0.3 s of 10 ms buffers is 30)."""
+    return int(math.floor(duration / seconds_per_buffer + 1e-9))
+
+
+def source_chunk_bytes(source):
+    """Returns the size in bytes of one ``source.CHUNK``-frame read from ``source``."""
+    return source.CHUNK * source.SAMPLE_WIDTH * getattr(source, "channels", 1)
+
+
+def ema_thresholds(threshold, targets, damping):
+    """
+    Applies ``threshold = threshold * damping + target * (1 - damping)`` for every value in ``targets`` at once.
+
+    Returns ``len(targets) + 1`` values: the threshold in effect before each step, followed by the final threshold.
+    """
+    result = np.empty(len(targets) + 1)
+    result[0] = threshold
+    for start in range(0, len(targets), EMA_SEGMENT):
+        segment = targets[start:start + EMA_SEGMENT]
+        steps = np.arange(1, len(segment) + 1)
+        decay = damping ** steps
+        weighted = np.cumsum(segment / decay)
+        result[start + 1:start + 1 + len(segment)] = decay * (result[start] + (1 - damping) * weighted)
+    return result
+
+
+def pause_counts(loud, initial_pause_count):
+    """Returns the running count of consecutive non-speaking chunks after each chunk, given which chunks are ``loud``."""
+    index = np.arange(len(loud))
+    last_loud = np.maximum.accumulate(np.where(loud, index, -1))
+    return np.where(last_loud >= 0, index - last_loud, initial_pause_count + index + 1)
+
+
+class NoiseFloorTracker(object):
+    """
+    Online estimate of the noise floor of one source: the ``percentile``-th percentile of chunk energies over the last ``window_seconds`` seconds, kept in a preallocated ``array('f')`` ring.
+
+    Speech only ever occupies part of a long enough window, so a low percentile follows the background level (room noise, fans, system audio hiss) in both directions without a blocking calibration. ``threshold()`` puts the energy threshold ``ratio`` times above the floor, clamped to ``[min_threshold, max_threshold]``; nothing is reported until ``warmup_seconds`` of audio have been seen.
+    """
+
+    def __init__(self, window_seconds=6.0, percentile=15.0, ratio=3.0, min_threshold=150.0, max_threshold=None, warmup_seconds=1.0):
+        assert window_seconds > 0 and 0 <= percentile <= 100 and ratio > 0
+        self.window_seconds = window_seconds
+        self.percentile = percentile
+        self.ratio = ratio
+        self.min_threshold = min_threshold
+        self.max_threshold = max_threshold
+        self.warmup_seconds = warmup_seconds
+        self._seconds_per_buffer = None
+        self._values = array("f")
+        self._next = 0  # ring index of the next write
+        self._count = 0  # number of valid entries
+
+    def reset(self):
+        self._next = self._count = 0
+
+    @property
+    def ready(self):
+        return self._seconds_per_buffer is not None and self._count * self._seconds_per_buffer >= self.warmup_seconds
+
+    def update(self, energies, seconds_per_buffer):
+        """Adds the energies of consecutive chunks of ``seconds_per_buffer`` seconds each."""
+        if seconds_per_buffer != self._seconds_per_buffer:  # (re)size the window for this chunk duration
+            self._seconds_per_buffer = seconds_per_buffer
+            self._values = array("f", bytes(4 * max(1, int(round(self.window_seconds / seconds_per_buffer)))))
+            self.reset()
+        size = len(self._values)
+        energies = [float(e) for e in energies[-size:]]
+        first = min(len(energies), size - self._next)
+        self._values[self._next:self._next + first] = array("f", energies[:first])
+        self._values[:len(energies) - first] = array("f", energies[first:])
+        self._next = (self._next + len(energies)) % size
+        self._count = min(size, self._count + len(energies))
+
+    def noise_floor(self):
+        if self._count == 0:
+            return None
+        k = int(self.percentile / 100.0 * (self._count - 1))
+        if np is not None:
+            return float(np.partition(np.frombuffer(self._values, dtype=np.float32)[:self._count], k)[k])
+        return float(sorted(self._values[:self._count])[k])
+
+    def threshold(self):
+        floor = self.noise_floor()
+        if floor is None:
+            return None
+        value = max(self.min_threshold, floor * self.ratio)
+        return value if self.max_threshold is None else min(self.max_threshold, value)
+
+
+class BlockListener(object):
+    """
+    Implements ``Recognizer.listen`` over blocks of about ``block_duration`` seconds of chunks: each block is read from the stream in one call, and energies, threshold adaptation and pause/phrase counting are computed for the whole block with NumPy.
+
+    Chunks that were read past the end of a phrase are kept and consumed first by the next ``listen`` call on the same stream, so the resulting phrases match the chunk-by-chunk implementation.
+    """
+
+    def __init__(self, recognizer):
+        self.recognizer = recognizer
+        self._pending_stream = None
+        self._pending = b""
+
+    def reset(self):
+        """Drops any audio carried over from the previous ``listen`` call."""
+        self._pending_stream = None
+        self._pending = b""
+
+    def listen(self, source, timeout=None, phrase_time_limit=None):
+        r = self.recognizer
+        width = source.SAMPLE_WIDTH
+        channels = getattr(source, "channels", 1)
+        chunk_bytes = source_chunk_bytes(source)
+        seconds_per_buffer = float(source.CHUNK) / source.SAMPLE_RATE
+        pause_buffer_count = int(math.ceil(r.pause_threshold / seconds_per_buffer))
+        phrase_buffer_count = int(math.ceil(r.phrase_threshold / seconds_per_buffer))
+        non_speaking_buffer_count = int(math.ceil(r.non_speaking_duration / seconds_per_buffer))
+        timeout_buffer_count = None if not timeout else buffer_count(timeout, seconds_per_buffer)
+        limit_buffer_count = None if not phrase_time_limit else buffer_count(phrase_time_limit, seconds_per_buffer)
+
+        block_buffers = max(1, int(round(r.block_duration / seconds_per_buffer)))
+        if self._pending_stream is not source.stream:  # new stream, anything left over belongs to the old one
+            self._pending_stream, self._pending = source.stream, b""
+        ended = False
+
+        def next_block():
+            nonlocal ended
+            if self._pending:
+                block, self._pending = self._pending, b""
+                return block
+            if ended:
+                return b""
+            block = source.stream.read(source.CHUNK * block_buffers)
+            if len(block) < chunk_bytes * block_buffers: ended = True  # short read, the stream has no more data
+            return block
+
+        def chunk_count(data):
+            return -(-len(data) // chunk_bytes)  # the last chunk may be partial at the end of the stream
+
+        elapsed = 0  # number of chunks of audio consumed
+        while True:
+            preroll = b""  # only the needed amount of non-speaking buffers is kept before the phrase
+
+            # store audio input until the phrase starts
+            block = b""
+            while True:
+                if timeout_buffer_count is not None and elapsed >= timeout_buffer_count:
+                    raise WaitTimeoutError("listening timed out while waiting for phrase to start")
+                block = next_block()
+                if len(block) == 0: break  # reached end of the stream
+                energies = chunk_energies(block, width, chunk_bytes, channels)
+                usable = len(energies)
+                if timeout_buffer_count is not None:
+                    usable = min(usable, timeout_buffer_count - elapsed)
+                if r.dynamic_energy_threshold:
+                    damping = r.dynamic_energy_adjustment_damping ** seconds_per_buffer
+                    thresholds = ema_thresholds(r.energy_threshold, energies[:usable] * r.dynamic_energy_ratio, damping)
+                else:
+                    thresholds = np.full(usable + 1, float(r.energy_threshold))
+                speaking = np.flatnonzero(energies[:usable] > thresholds[:usable])
+                consumed = int(speaking[0]) + 1 if len(speaking) else usable
+                elapsed += consumed
+                preroll += block[:consumed * chunk_bytes]
+                preroll = preroll[max(0, chunk_count(preroll) - non_speaking_buffer_count) * chunk_bytes:]
+                if r.dynamic_energy_threshold:
+                    r.energy_threshold = float(thresholds[consumed - 1] if len(speaking) else thresholds[usable])
+                r.track_noise_floor(energies[:consumed], seconds_per_buffer)
+                self._pending = block[consumed * chunk_bytes:]
+                if len(speaking): break
+
+            # read audio input until the phrase ends
+            frames = [preroll]
+            pause_count, phrase_count = 0, 0
+            while len(block):
+                if limit_buffer_count is not None and phrase_count >= limit_buffer_count:
+                    elapsed += 1  # like the chunk-by-chunk loop, the chunk that would exceed the limit counts towards the timeout
+                    break
+                block = next_block()
+                if len(block) == 0: break  # reached end of the stream
+                energies = chunk_energies(block, width, chunk_bytes, channels)
+                usable = len(energies)
+                if limit_buffer_count is not None:
+                    usable = min(usable, limit_buffer_count - phrase_count)
+                counts = pause_counts(energies[:usable] > r.energy_threshold, pause_count)
+                ends = np.flatnonzero(counts > pause_buffer_count)
+                consumed = int(ends[0]) + 1 if len(ends) else usable
+                r.track_noise_floor(energies[:consumed], seconds_per_buffer)
+                frames.append(block[:consumed * chunk_bytes])
+                elapsed += consumed
+                phrase_count += consumed
+                pause_count = int(counts[consumed - 1])
+                self._pending = block[consumed * chunk_bytes:]
+                if len(ends): break
+
+            # check how long the detected phrase is, and retry listening if the phrase is too short
+            phrase_count -= pause_count
+            if phrase_count >= phrase_buffer_count or len(block) == 0: break
+
+        # obtain frame data, without the extra non-speaking frames at the end
+        frame_data = b"".join(frames)
+        trailing = len(self._pending) + len(frame_data)  # audio already read from the stream past the returned phrase
+        extra = pause_count - non_speaking_buffer_count
+        if extra > 0:
+            frame_data = frame_data[:max(0, chunk_count(frame_data) - extra) * chunk_bytes]
+        trailing -= len(frame_data)
+        frame_bytes = width * channels
+        start_time, end_time = phrase_times(source.stream, len(frame_data) // frame_bytes, trailing // frame_bytes)
+        return AudioData(frame_data, source.SAMPLE_RATE, source.SAMPLE_WIDTH, start_time, end_time)
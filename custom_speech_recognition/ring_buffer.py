@@ -0,0 +1,120 @@
+import threading
+
+
+class RingBuffer(object):
+    """
+    Fixed-size byte ring buffer shared between a PortAudio callback (the writer) and a consumer thread (the reader).
+
+    The whole storage is allocated once in the constructor, so writing from the audio callback is a single memory copy with no Python object allocations. When the reader falls behind and the buffer is full, the oldest audio is overwritten and counted in ``overflows`` / ``dropped_bytes`` rather than silently discarded.
+
+    ``frame_bytes`` is the size of one interleaved frame; reads, writes and drops always stay aligned to it.
+    """
+
+    def __init__(self, capacity, frame_bytes=1):
+        assert isinstance(frame_bytes, int) and frame_bytes > 0, "Frame size must be a positive integer"
+        capacity -= capacity % frame_bytes
+        assert capacity > 0, "Capacity must hold at least one frame"
+        self.capacity = capacity
+        self.frame_bytes = frame_bytes
+        self._buffer = bytearray(capacity)
+        self._view = memoryview(self._buffer)
+        self._read_pos = 0  # absolute byte positions, the storage index is ``pos % capacity``
+        self._write_pos = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self.last_read_start = 0  # absolute byte position of the data returned by the latest ``read``
+
+        self.overflows = 0  # number of writes that had to overwrite unread audio, plus overflows reported by the driver
+        self.dropped_bytes = 0
+
+    def __len__(self):
+        with self._cond:
+            return self._write_pos - self._read_pos
+
+    @property
+    def written(self):
+        """Total number of bytes ever written, including any that were later overwritten."""
+        return self._write_pos
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def write(self, data, overflowed=False):
+        """
+        Copies ``data`` into the buffer, overwriting the oldest unread audio if there isn't enough free space. Safe to call from the audio callback.
+
+        ``overflowed`` reports that the driver lost input before ``data`` (e.g. ``paInputOverflow``); it is counted in ``overflows`` under the same lock.
+        """
+        n = len(data)
+        if n == 0:
+            if overflowed:
+                with self._cond:
+                    self.overflows += 1
+            return
+        data = memoryview(data).cast("B")
+        if n > self.capacity:  # only the most recent ``capacity`` bytes can be kept
+            skipped = n - self.capacity
+            data = data[skipped:]
+            n = self.capacity
+        else:
+            skipped = 0
+        with self._cond:
+            overflow = self._write_pos - self._read_pos + n - self.capacity
+            if overflow > 0 or skipped:
+                overflow = max(overflow, 0)
+                self._read_pos += overflow
+                self.overflows += 1
+                self.dropped_bytes += overflow + skipped
+            if overflowed:
+                self.overflows += 1
+            start = self._write_pos % self.capacity
+            first = min(n, self.capacity - start)
+            self._view[start:start + first] = data[:first]
+            if first < n:
+                self._view[:n - first] = data[first:]
+            self._write_pos += n
+            self._cond.notify_all()
+
+    def read(self, size, timeout=None):
+        """
+        Returns exactly ``size`` bytes of the oldest unread audio, blocking until that much is available.
+
+        Returns fewer bytes (possibly ``b""``) only if the buffer is closed, or if ``timeout`` seconds elapse first. Raises ``ValueError`` if ``size`` exceeds ``capacity``, since that much audio could never be available at once.
+        """
+        if size > self.capacity:
+            raise ValueError("cannot read {} bytes from a ring buffer of {} bytes".format(size, self.capacity))
+        with self._cond:
+            self._cond.wait_for(lambda: self._closed or self._write_pos - self._read_pos >= size, timeout)
+            n = min(size, self._write_pos - self._read_pos)
+            start = self._read_pos % self.capacity
+            first = min(n, self.capacity - start)
+            if first == n:
+                data = bytes(self._view[start:start + n])
+            else:
+                data = b"".join((self._view[start:], self._view[:n - first]))
+            self.last_read_start = self._read_pos
+            self._read_pos += n
+            return data
+
+    def stats(self):
+        """Returns a consistent snapshot of the buffer's fill level and loss counters."""
+        with self._cond:
+            return {
+                "capacity": self.capacity,
+                "buffered": self._write_pos - self._read_pos,
+                "written": self._write_pos,
+                "overflows": self.overflows,
+                "dropped_bytes": self.dropped_bytes,
+            }
+
+    def clear(self):
+        """Discards all unread audio."""
+        with self._cond:
+            self._read_pos = self._write_pos
+
+    def close(self):
+        """Marks the buffer as closed and wakes up any blocked reader."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
@@ -2,6 +2,7 @@
 
 import os
 import threading
+import time
 from openai import OpenAI
 
 class GPTManager:
@@ -11,6 +12,8 @@ class GPTManager:
         self.latest_answer = ""
         self.auto_var = None  # будет CTk BooleanVar
         self.last_prompt = None
+        self._threads = set()
+        self._closed = False
         self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
     # связываем переключатель
@@ -32,12 +35,30 @@ class GPTManager:
         if self.last_prompt:
             self._send_async(self.last_prompt)
 
+    def shutdown(self, timeout=None):
+        """Новые запросы больше не отправляются; ждёт начатые до timeout секунд, возвращает число незавершённых."""
+        self._closed = True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in list(self._threads):
+            thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+        return sum(thread.is_alive() for thread in list(self._threads))
+
     # ------------- внутреннее -------------
     def _send_async(self, prompt_lines):
+        if self._closed:
+            return
         self.last_prompt = prompt_lines
-        threading.Thread(target=self._send_sync,args=(prompt_lines,),daemon=True).start()
+        thread = threading.Thread(target=self._send_sync,args=(prompt_lines,),daemon=True)
+        self._threads.add(thread)
+        thread.start()
 
     def _send_sync(self, prompt_lines):
+        try:
+            self._request(prompt_lines)
+        finally:
+            self._threads.discard(threading.current_thread())
+
+    def _request(self, prompt_lines):
         prompt = "\n".join(prompt_lines)
         try:
             resp = self.client.chat.completions.create(
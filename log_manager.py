@@ -1,11 +1,38 @@
 import os
+import queue
+import threading
 from datetime import datetime
 
 class LogManager:
+    """Журнал транскрипта: write() только ставит строку в очередь, в файл пишет фоновый поток."""
     def __init__(self, log_dir="log"):
         os.makedirs(log_dir, exist_ok=True)
         self.path = os.path.join(log_dir, datetime.now().strftime("%Y-%m-%d_%H-%M-%S.txt"))
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._writer, daemon=True)
+        self._thread.start()
 
     def write(self, speaker_line:str):
-        with open(self.path,"a",encoding="utf-8") as f:
-            f.write(speaker_line+"\n")
\ No newline at end of file
+        self._queue.put(speaker_line)
+
+    def _writer(self):
+        while True:
+            lines = [self._queue.get()]
+            while lines[-1] is not None:          # всё, что накопилось, — одной записью
+                try:
+                    lines.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            closing = lines[-1] is None
+            lines = [line for line in lines if line is not None]
+            if lines:
+                with open(self.path,"a",encoding="utf-8") as f:
+                    f.write("".join(line+"\n" for line in lines))
+            if closing:
+                return
+
+    def close(self, timeout=None):
+        """Дописывает очередь и останавливает поток; возвращает число незаписанных строк."""
+        self._queue.put(None)
+        self._thread.join(timeout)
+        return self._queue.qsize() if self._thread.is_alive() else 0
@@ -2,7 +2,6 @@
 from dotenv import load_dotenv
 load_dotenv() 
 import threading
-import queue
 import time
 import asyncio
 import subprocess
@@ -20,11 +19,20 @@ from gpt_manager import GPTManager
 from log_manager import LogManager
 import TranscriberModels
 from config_manager import load_config, save_config 
+from capture_queue import CaptureQueue
+from startup import StartupOrchestrator
 
 
 # ---------- CONFIG DEFAULTS ----------
 CONTEXT_DEPTH_DEFAULT = 3
 BTN_ICON_FONT = ("Arial", 18)
+# Очереди захваченного аудио: элемент — кусок фразы до AudioRecorder.SEGMENT_EMIT_MS.
+# Политика при переполнении: "block" | "drop_oldest" | "coalesce" (см. capture_queue.py)
+AUDIO_QUEUE_SIZE = 40
+AUDIO_QUEUE_POLICY = "drop_oldest"
+# Остановка: сколько ждать дораспознавания открытых фраз и ответов GPT, секунд
+SHUTDOWN_TRANSCRIBE_TIMEOUT = 10.0
+SHUTDOWN_GPT_TIMEOUT = 5.0
 
 load_dotenv()  # подгружаем OPENAI_API_KEY из .env
 
@@ -64,7 +72,7 @@ def write_transcript(tb: ctk.CTkTextbox, items, start: int, end: int):
         text, _, role = item[:3]
         tag = "speaker_tag" if role == "Speaker" else "user_tag"
         extra = ()
-        if role == "Speaker":
+        if role == "Speaker" and not item[4]:     # промежуточная гипотеза в контекст не входит и не считается
             if start <= spk_index <= end:
                 extra = ("ctx_tag",)
             spk_index += 1
@@ -81,12 +89,20 @@ def write_in_textbox(tb: ctk.CTkTextbox, text: str):
 
 # ---------- UI creation ----------
 
-def create_ui(root, transcriber, gpt_mgr, mic_rec, spk_rec, config):
+def create_window():
+    """Окно создаётся сразу, пока в фоне калибруются устройства и грузится модель."""
     ctk.set_appearance_mode("dark")
     ctk.set_default_color_theme("dark-blue")
 
+    root = ctk.CTk()
     root.title("Ecoute + GPT")
     root.geometry("1200x650")
+    root._startup_label = ctk.CTkLabel(root, text="Калибровка устройств и загрузка модели…", font=("Arial", 16))
+    root._startup_label.place(relx=0.5, rely=0.5, anchor="center")
+    return root
+
+def create_ui(root, transcriber, gpt_mgr, mic_rec, spk_rec, config):
+    root._startup_label.destroy()
     root.grid_columnconfigure(0, weight=1)
     root.grid_columnconfigure(1, weight=0)
     root.grid_columnconfigure(2, weight=1)
@@ -218,7 +234,7 @@ def create_ui(root, transcriber, gpt_mgr, mic_rec, spk_rec, config):
     def update_context_range(start: int, end: int):
         if end < start:
             start, end = end, start
-        spk_total = len(transcriber.transcript_data["Speaker"])
+        spk_total = len(transcriber.get_context_lines())
         max_val = max(spk_total - 1, 0)
         start = max(0, min(start, max_val))
         end = max(0, min(end, max_val))
@@ -239,7 +255,7 @@ def create_ui(root, transcriber, gpt_mgr, mic_rec, spk_rec, config):
         prompt_preview.configure(state="disabled")
 
     def update_slider_limits():
-        spk_total = len(transcriber.transcript_data["Speaker"])
+        spk_total = len(transcriber.get_context_lines())
         max_val = max(spk_total - 1, 0)
         slider_max = max(1, max_val)
         if hasattr(range_slider, "configure"):
@@ -318,33 +334,72 @@ def open_language_settings(parent, transcriber, config):
 
 # ---------- main() ----------
 
-def main():
-    # check ffmpeg
+def check_ffmpeg():
     try:
         subprocess.run(["ffmpeg", "-version"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return True
     except FileNotFoundError:
-        print("FFmpeg не найден. Установи ffmpeg и попробуй снова.")
-        return
-    
-    config = load_config()        
-    root = ctk.CTk()
+        return False
+
+def start_recorder(recorder_cls, audio_queue):
+    recorder = recorder_cls()          # калибровка шума внутри конструктора
+    recorder.record_into_queue(audio_queue)
+    return recorder
+
+def warm_up_model(model, loop):
+    """Прогрев бэкенда в цикле транскрибера: соединения клиента API привязаны к циклу, где созданы."""
+    warm_up = getattr(model, "warm_up", None)
+    if warm_up is not None:
+        asyncio.run_coroutine_threadsafe(warm_up(), loop).result()
 
-    speaker_q = queue.Queue()
-    mic_q = queue.Queue()
+def run_transcriber(loop, transcriber, speaker_q, mic_q):
+    """Запускает цикл транскрибера в работающем loop; когда цикл завершится, loop останавливается."""
+    def done(future):
+        if not future.cancelled() and future.exception() is not None:
+            print(f"[ERROR] Transcriber loop failed: {future.exception()}")
+        loop.call_soon_threadsafe(loop.stop)
 
-    mic_rec = AudioRecorder.DefaultMicRecorder()
-    mic_rec.record_into_queue(mic_q)
-    time.sleep(1)
-    spk_rec = AudioRecorder.DefaultSpeakerRecorder()
-    spk_rec.record_into_queue(speaker_q)
+    future = asyncio.run_coroutine_threadsafe(transcriber.transcribe_audio_queue_async(speaker_q, mic_q), loop)
+    future.add_done_callback(done)
 
-    model = TranscriberModels.get_model(use_api=True)
+def main():
+    # Калибровка mic/speaker, загрузка модели и проверка ffmpeg идут параллельно,
+    # окно строится в главном потоке в это же время.
+    startup = StartupOrchestrator()
+    speaker_q = CaptureQueue(AUDIO_QUEUE_SIZE, AUDIO_QUEUE_POLICY, name="Speaker")
+    mic_q = CaptureQueue(AUDIO_QUEUE_SIZE, AUDIO_QUEUE_POLICY, name="You")
+
+    config = startup.run("config", load_config)     # быстрое чтение JSON, нужно для выбора модели
+
+    # Цикл транскрибера стартует сразу: прогрев клиента API идёт в нём же, параллельно с калибровкой.
+    # daemon: остановку ведёт shutdown_pipeline с ограниченным join(); зависший бэкенд не держит процесс
+    loop = asyncio.new_event_loop()
+    thr = threading.Thread(target=loop.run_forever, name="transcriber", daemon=True)
+    thr.start()
+
+    startup.submit("ffmpeg", check_ffmpeg)
+    startup.submit("mic", start_recorder, AudioRecorder.DefaultMicRecorder, mic_q)
+    startup.submit("speaker", start_recorder, AudioRecorder.DefaultSpeakerRecorder, speaker_q)
+    startup.submit("model", TranscriberModels.get_model, config["transcriber"], config.get("language", "ru"))
+    startup.submit("warm_up", warm_up_model, loop, after=("model",))
+
+    root = startup.run("window", create_window)
+
+    ffmpeg_ok, mic_rec, spk_rec, model, _ = startup.wait(["ffmpeg", "mic", "speaker", "model", "warm_up"],
+                                                         pump=root.update)
+    if not ffmpeg_ok:
+        print("FFmpeg не найден. Установи ffmpeg и попробуй снова.")
+        mic_rec.stop()
+        spk_rec.stop()
+        loop.call_soon_threadsafe(loop.stop)
+        root.destroy()
+        return
 
     log_mgr = LogManager(log_dir=os.path.join(os.path.dirname(__file__), "log"))
 
     transcriber = AudioTranscriber(
-        mic_rec.source,
-        spk_rec.source,
+        mic_rec,
+        spk_rec,
         model,
         context_depth=CONTEXT_DEPTH_DEFAULT,
         logger=log_mgr,
@@ -353,14 +408,53 @@ def main():
 
     gpt_mgr = GPTManager(transcriber)
 
-    thr = threading.Thread(target=transcriber.transcribe_audio_queue, args=(speaker_q, mic_q))
-    thr.daemon = True
-    thr.start()
+    run_transcriber(loop, transcriber, speaker_q, mic_q)
+
+    startup.run("ui", create_ui, root, transcriber, gpt_mgr, mic_rec, spk_rec, config)
+    startup.report()
+    startup.shutdown()
 
-    create_ui(root, transcriber, gpt_mgr, mic_rec, spk_rec, config)
+    def on_close():
+        root.withdraw()
+        shutdown_pipeline(mic_rec, spk_rec, transcriber, thr, gpt_mgr, log_mgr, model)
+        root.destroy()
 
+    root.protocol("WM_DELETE_WINDOW", on_close)
     root.mainloop()
 
 
+def shutdown_pipeline(mic_rec, spk_rec, transcriber, transcriber_thread, gpt_mgr, log_mgr, model):
+    """
+    Штатная остановка по порядку: захват (сегментаторы отдают незаконченные фразы) →
+    дораспознавание открытых фраз с дедлайном → ответы GPT → журнал. Печатает, что потеряно.
+    """
+    t0 = time.perf_counter()
+    mic_rec.stop()
+    spk_rec.stop()
+    transcriber.set_gpt_callback(None)      # новые запросы к GPT на выходе не нужны
+    report = transcriber.shutdown(SHUTDOWN_TRANSCRIBE_TIMEOUT)
+    transcriber_thread.join(SHUTDOWN_TRANSCRIBE_TIMEOUT)
+    gpt_pending = gpt_mgr.shutdown(SHUTDOWN_GPT_TIMEOUT)
+    log_pending = log_mgr.close(SHUTDOWN_GPT_TIMEOUT)
+    if hasattr(model, "close"):
+        model.close()           # процессы пула и их общая память
+
+    print(f"[INFO] Shutdown finished in {time.perf_counter() - t0:.2f} s:")
+    if report is not None:
+        print(f"[INFO]   flushed phrases   {report['flushed_phrases']} (drained in {report['drain_seconds']:.2f} s)")
+        print(f"[INFO]   dropped jobs      {report['dropped_jobs']} ({report['dropped_seconds']:.1f} s of audio)")
+        stats = report["scheduler"]
+        print(f"[INFO]   cancelled jobs    {stats['cancelled_queued']} queued, {stats['cancelled_running']} running "
+              f"({stats['cancelled_seconds']:.1f} s of audio)")
+        for who, dropped in report["capture_dropped"].items():
+            print(f"[INFO]   {who + ' queue drops':<17} {dropped}")
+    else:
+        print("[WARN]   transcriber did not report (not running or timed out)")
+    if transcriber_thread.is_alive():
+        print("[WARN]   transcription thread did not stop")
+    print(f"[INFO]   GPT unfinished    {gpt_pending}")
+    print(f"[INFO]   log lines lost    {log_pending}")
+
+
 if __name__ == "__main__":
     main()
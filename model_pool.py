@@ -0,0 +1,269 @@
+import os
+import pickle
+import queue
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+from multiprocessing.connection import Client, Listener
+
+import numpy as np
+
+CONNECT_TIMEOUT = 30.0    # запуск интерпретатора процесса-обработчика до подключения к родителю
+READY_TIMEOUT = 120.0     # загрузка модели в процессе-обработчике
+JOB_TIMEOUT = 60.0        # дольше фраза не распознаётся — процесс считается зависшим
+HEALTH_INTERVAL = 5.0     # как часто проверять простаивающие процессы
+HEALTH_TIMEOUT = 5.0
+MIN_BUFFER_SAMPLES = 30 * 16000   # общий буфер процесса рассчитан на 30 с аудио и растёт при необходимости
+
+
+class JobError(RuntimeError):
+    """Задание не выполнено, но процесс-обработчик жив и сам сообщил об ошибке — перезапуск не нужен."""
+
+
+def _attach(name):
+    """Подключается к сегменту общей памяти родителя; удаляет сегмент только родитель."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)    # Python 3.13+
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        if os.name == "posix":
+            # у процесса свой resource_tracker — без этого он удалит сегмент родителя при выходе
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+def _worker_main(conn, model_args, model_kwargs, transcribe_kwargs, warm_up):
+    """
+    Процесс-обработчик: своя модель CTranslate2, команды по conn.
+    ("ping",) → ("pong",); ("transcribe", имя буфера, число сэмплов, параметры) → ("done", текст) | ("error", текст).
+    """
+    from faster_whisper import WhisperModel
+
+    model = WhisperModel(*model_args, **model_kwargs)
+    if warm_up:     # первый проход — до того, как процесс объявит себя готовым
+        segments, _ = model.transcribe(np.zeros(16000, dtype=np.float32), **transcribe_kwargs)
+        for _ in segments:
+            pass
+    conn.send(("ready", os.getpid()))
+    shm = None
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+        if message[0] == "ping":
+            conn.send(("pong",))
+            continue
+        _, name, count, options = message
+        try:
+            if shm is None or shm.name != name:
+                if shm is not None:
+                    shm.close()
+                shm = _attach(name)
+            audio = np.ndarray((count,), dtype=np.float32, buffer=shm.buf)
+            try:
+                segments, _ = model.transcribe(audio, **{**transcribe_kwargs, **options})
+                text = " ".join(segment.text for segment in segments).strip()
+            finally:
+                del audio       # иначе shm.close() упадёт с BufferError
+            conn.send(("done", text))
+        except Exception as e:
+            conn.send(("error", str(e)))
+    if shm is not None:
+        shm.close()
+
+
+def _serve():
+    """
+    Точка входа процесса-обработчика (python model_pool.py): адрес и ключ канала приходят через stdin,
+    параметры модели — уже по каналу. Процесс — отдельный интерпретатор, а не multiprocessing.Process:
+    spawn импортировал бы в нём модуль __main__ родителя (main.py с GUI, OpenAI и torch).
+    """
+    address, authkey = pickle.load(sys.stdin.buffer)
+    conn = Client(address, authkey=authkey)
+    _worker_main(conn, *conn.recv())
+
+
+class _Worker:
+    """Один процесс пула, его канал и его общий буфер для аудио."""
+    def __init__(self, index, args):
+        self.index = index
+        self._args = args
+        self.process = None
+        self.conn = None
+        self.shm = None
+        self.restarts = 0
+
+    @property
+    def alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def start(self):
+        authkey = os.urandom(32)
+        with Listener(authkey=authkey) as listener:
+            self.process = subprocess.Popen([sys.executable, os.path.abspath(__file__)], stdin=subprocess.PIPE)
+            with self.process.stdin as stdin:
+                stdin.write(pickle.dumps((listener.address, authkey)))
+            self.conn = self._accept(listener, authkey)
+        self.conn.send(self._args)
+
+    def _accept(self, listener, authkey, timeout=CONNECT_TIMEOUT):
+        """Ждёт подключения процесса; если тот упал при старте или завис, accept() будит пустое подключение."""
+        accepted = []
+        thread = threading.Thread(target=lambda: accepted.append(listener.accept()), daemon=True)
+        thread.start()
+        deadline = time.monotonic() + timeout
+        while thread.is_alive() and self.process.poll() is None and time.monotonic() < deadline:
+            thread.join(0.1)
+        if not thread.is_alive() and accepted:
+            return accepted[0]
+        if thread.is_alive():
+            Client(listener.address, authkey=authkey).close()
+            thread.join()
+        for conn in accepted:
+            conn.close()
+        self.process.kill()
+        self.process.wait()
+        raise RuntimeError(f"worker {self.index} did not connect (exit code {self.process.returncode})")
+
+    def wait_ready(self, timeout=READY_TIMEOUT):
+        if not self.conn.poll(timeout):
+            raise TimeoutError(f"worker {self.index} did not load the model in {timeout:.0f} s")
+        self.conn.recv()
+
+    def stop(self, timeout=1.0):
+        if self.process is None:
+            return
+        try:
+            self.conn.send(None)
+        except (OSError, EOFError):
+            pass
+        try:
+            self.process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        self.conn.close()
+        self.process = None
+
+    def release_buffer(self):
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+    def request(self, message, timeout):
+        self.conn.send(message)
+        if not self.conn.poll(timeout):
+            raise TimeoutError(f"worker {self.index} did not answer in {timeout:.0f} s")
+        return self.conn.recv()
+
+    def transcribe(self, samples, options, timeout=JOB_TIMEOUT):
+        count = len(samples)
+        if self.shm is None or self.shm.size < samples.nbytes:
+            self.release_buffer()
+            size = max(samples.nbytes, MIN_BUFFER_SAMPLES * 4)
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+        np.ndarray((count,), dtype=np.float32, buffer=self.shm.buf)[:] = samples
+        status, *payload = self.request(("transcribe", self.shm.name, count, options), timeout)
+        if status != "done":
+            raise JobError(payload[0] if payload else status)
+        return payload[0]
+
+
+class ModelPool:
+    """
+    Пул процессов с локальными моделями faster-whisper: каждый держит свою модель и считает
+    в cpu_threads потоков, так что N процессов занимают N × cpu_threads ядер без общего GIL.
+    Аудио передаётся через общую память (буфер на процесс), по каналу идут только команды.
+
+    transcribe() — блокирующий, вызывается из потоков (до processes одновременно).
+    Процесс перезапускается, только если он упал или не ответил за timeout: перезапуск — это
+    новая загрузка модели. Ошибку, о которой процесс сообщил сам (ответ "error"), получает
+    вызывающий (JobError), процесс остаётся в пуле. Простаивающие процессы раз в HEALTH_INTERVAL
+    секунд проверяются фоновым ping.
+    """
+    def __init__(self, processes, model_args, model_kwargs=None, transcribe_kwargs=None, cpu_threads=0,
+                 warm_up=False):
+        self.processes = max(1, processes)
+        model_kwargs = dict(model_kwargs or {})
+        model_kwargs.setdefault("cpu_threads", cpu_threads or max(1, (os.cpu_count() or 1) // self.processes))
+        model_kwargs.setdefault("num_workers", 1)
+        args = (tuple(model_args), model_kwargs, dict(transcribe_kwargs or {}), warm_up)
+        self._workers = [_Worker(i, args) for i in range(self.processes)]
+        self._idle = queue.Queue()
+        self._closed = threading.Event()
+
+        for worker in self._workers:      # модели грузятся во всех процессах параллельно
+            worker.start()
+        for worker in self._workers:
+            worker.wait_ready()
+            self._idle.put(worker)
+
+        self._monitor = threading.Thread(target=self._health_loop, name="whisper-pool-health", daemon=True)
+        self._monitor.start()
+
+    def transcribe(self, samples, options=None, timeout=JOB_TIMEOUT):
+        """options — параметры model.transcribe() для этого задания поверх общих (например, language)."""
+        samples = np.ascontiguousarray(samples, dtype=np.float32)
+        worker = self._idle.get()
+        try:
+            return worker.transcribe(samples, options or {}, timeout)
+        except JobError:
+            raise       # процесс жив и ответил — модель перезагружать незачем
+        except Exception as e:
+            print(f"[WARN] Whisper worker {worker.index} failed ({e}), restarting")
+            try:
+                self._respawn(worker)
+            except Exception as restart_error:
+                print(f"[WARN] Whisper worker {worker.index} restart failed: {restart_error}")
+            raise
+        finally:
+            self._idle.put(worker)
+
+    def _respawn(self, worker):
+        worker.stop(timeout=0)
+        worker.restarts += 1
+        worker.start()
+        worker.wait_ready()
+
+    def _health_loop(self):
+        while not self._closed.wait(HEALTH_INTERVAL):
+            for _ in range(self._idle.qsize()):
+                try:
+                    worker = self._idle.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    if not worker.alive or worker.request(("ping",), HEALTH_TIMEOUT)[0] != "pong":
+                        raise RuntimeError("not responding")
+                except Exception as e:
+                    print(f"[WARN] Whisper worker {worker.index} unhealthy ({e}), restarting")
+                    try:
+                        self._respawn(worker)
+                    except Exception as e:
+                        print(f"[WARN] Whisper worker {worker.index} restart failed: {e}")
+                finally:
+                    self._idle.put(worker)
+
+    def stats(self):
+        return {
+            "processes": self.processes,
+            "idle": self._idle.qsize(),
+            "alive": sum(1 for w in self._workers if w.alive),
+            "restarts": sum(w.restarts for w in self._workers),
+        }
+
+    def close(self):
+        self._closed.set()
+        for worker in self._workers:
+            worker.stop()
+            worker.release_buffer()
+
+
+if __name__ == "__main__":
+    _serve()
@@ -0,0 +1,55 @@
+class PhraseBuffer:
+    """
+    Накопитель аудио одной фразы без лишних копий.
+
+    Данные дописываются в заранее выделенный bytearray; при нехватке места
+    выделяется новый (вдвое больше) — старый никогда не меняет размер на месте,
+    поэтому выданные memoryview остаются валидными. take() отдаёт готовую фразу
+    как memoryview (без копирования) и начинает новую в свежем буфере.
+    """
+    INITIAL_CAPACITY = 64 * 1024
+
+    def __init__(self, capacity=INITIAL_CAPACITY):
+        self._buffer = bytearray(max(1, capacity))
+        self._length = 0
+
+    def __len__(self):
+        return self._length
+
+    def __bool__(self):
+        return self._length > 0
+
+    def append(self, data):
+        n = len(data)
+        if self._length + n > len(self._buffer):
+            grown = bytearray(max(2 * len(self._buffer), self._length + n))
+            grown[:self._length] = memoryview(self._buffer)[:self._length]
+            self._buffer = grown
+        self._buffer[self._length:self._length + n] = data
+        self._length += n
+
+    def view(self):
+        """memoryview на текущие данные (действителен, пока буфер не перераспределён)."""
+        return memoryview(self._buffer)[:self._length]
+
+    def take(self):
+        """Отдаёт накопленную фразу (memoryview) и начинает новую, не трогая отданную память."""
+        data = self.view()
+        self._buffer = bytearray(max(self.INITIAL_CAPACITY, self._length))
+        self._length = 0
+        return data
+
+    def split(self, length, keep=0):
+        """
+        Отдаёт первые length байт (memoryview, без копирования) и оставляет в буфере
+        всё, что после них, плюс последние keep байт отданного — перекрытие окон.
+        """
+        data = self.view()
+        rest = data[max(0, length - keep):]
+        self._buffer = bytearray(max(self.INITIAL_CAPACITY, 2 * len(rest)))
+        self._buffer[:len(rest)] = rest
+        self._length = len(rest)
+        return data[:length]
+
+    def clear(self):
+        self.take()
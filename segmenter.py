@@ -0,0 +1,161 @@
+import collections
+
+from custom_speech_recognition import energy
+
+
+class StreamingSegmenter:
+    """
+    Однопроходная сегментация потока на фразы (вместо listen() + склейки по PHRASE_TIMEOUT).
+
+    На вход — блоки PCM (моно, sample_rate) по мере захвата и время их первого сэмпла;
+    на выход — события (data, start, end, final): куски подтверждённой речи
+    не реже чем раз в emit_ms и финальный кусок с final=True, как только после
+    речи набралось end_silence_ms тишины.
+
+    Эндпоинтинг по энергии кадров frame_ms:
+      * речь начинается с первого кадра громче порога, вместе с preroll_ms тишины до него;
+      * фраза подтверждается, когда в ней набралось min_speech_ms громких кадров,
+        неподтверждённые фразы (щелчки, короткие шумы) молча отбрасываются;
+      * тишина внутри фразы придерживается и уходит только если речь продолжилась,
+        после конца фразы остаётся не больше tail_ms тишины.
+
+    Энергия кадра — energy.chunk_energies (RMS в 16-битной шкале), считается сразу для всех
+    кадров блока; frame_energies() — то же определение для калибровки, так что порог, замер фона
+    и трекер работают с одними и теми же числами.
+    Порог — self.energy_threshold; если передан noise_floor (energy.NoiseFloorTracker),
+    он получает энергии всех кадров и сам ведёт порог. Речь от фона отделяет сам трекер:
+    низкий перцентиль по окну в несколько секунд попадает в паузы между словами, а если фон
+    поднялся выше порога, он поднимается и вместе с ним — иначе вся запись стала бы одной фразой.
+    """
+    def __init__(self, sample_rate, sample_width, energy_threshold, noise_floor=None,
+                 frame_ms=20, preroll_ms=300, min_speech_ms=250, end_silence_ms=500,
+                 tail_ms=200, emit_ms=500):
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self.energy_threshold = energy_threshold
+        self.noise_floor = noise_floor
+        self.frame_samples = max(1, sample_rate * frame_ms // 1000)
+        self.frame_bytes = self.frame_samples * sample_width
+        self.frame_seconds = self.frame_samples / sample_rate
+
+        def frames(ms):
+            return max(1, int(round(ms / 1000 * sample_rate / self.frame_samples)))
+
+        self.preroll_frames = frames(preroll_ms) if preroll_ms else 0
+        self.min_speech_frames = frames(min_speech_ms)
+        self.end_silence_frames = frames(end_silence_ms)
+        self.tail_frames = min(frames(tail_ms) if tail_ms else 0, self.end_silence_frames)
+        self.emit_frames = frames(emit_ms)
+        self.reset()
+
+    def reset(self):
+        """Забыть всё (например, после паузы захвата): незаконченная фраза пропадает."""
+        self._partial = b""             # хвост блока короче кадра
+        self._frame = 0                 # номер следующего кадра
+        self._anchor = (0, 0.0)         # (номер сэмпла, время) для пересчёта в time.monotonic()
+        self._received = 0              # сэмплов получено всего
+        self._preroll = collections.deque(maxlen=self.preroll_frames or None)
+        self._reset_phrase()
+
+    def _reset_phrase(self):
+        self.in_speech = False
+        self._confirmed = False
+        self._held = []                 # кадры фразы, ещё не отданные наружу
+        self._out = bytearray()         # подтверждённая речь к отправке
+        self._out_start = 0             # номер кадра начала self._out
+        self._speech = 0
+        self._silence = 0
+
+    def _time_of(self, frame):
+        sample, time = self._anchor
+        return time + (frame * self.frame_samples - sample) / self.sample_rate
+
+    def _emit(self, final):
+        data = bytes(self._out)
+        frames = len(data) // self.frame_bytes
+        event = (data, self._time_of(self._out_start), self._time_of(self._out_start + frames), final)
+        self._out_start += frames
+        self._out = bytearray()
+        return event
+
+    def frame_energies(self, data):
+        """Энергии целых кадров data (хвост короче кадра не учитывается)."""
+        count = len(data) // self.frame_bytes
+        return energy.chunk_energies(data[:count * self.frame_bytes], self.sample_width, self.frame_bytes)
+
+    def feed(self, data, start_time):
+        """Принимает блок data, первый сэмпл которого захвачен в start_time; возвращает список событий."""
+        if not data:
+            return []
+        self._anchor = (self._received, start_time)
+        self._received += len(data) // self.sample_width
+        data = self._partial + data
+        count = len(data) // self.frame_bytes
+        self._partial = data[count * self.frame_bytes:]
+        events = []
+        for i, level in enumerate(self.frame_energies(data)):
+            frame = data[i * self.frame_bytes:(i + 1) * self.frame_bytes]
+            loud = level > self.energy_threshold
+            if self.noise_floor is not None:
+                self._track_noise((level,))
+            event = self._step(frame, loud)
+            if event is not None:
+                events.append(event)
+            self._frame += 1
+        if self._confirmed and len(self._out) >= self.emit_frames * self.frame_bytes:
+            events.append(self._emit(final=False))
+        return events
+
+    def _track_noise(self, levels):
+        self.noise_floor.update(levels, self.frame_seconds)
+        if self.noise_floor.ready:
+            self.energy_threshold = self.noise_floor.threshold()
+
+    def _step(self, frame, loud):
+        if not self.in_speech:
+            if not loud:
+                if self.preroll_frames:
+                    self._preroll.append(frame)
+                return None
+            self.in_speech = True
+            self._held = list(self._preroll) + [frame]
+            self._out_start = self._frame - len(self._preroll)
+            self._preroll.clear()
+            self._speech, self._silence = 1, 0
+        elif loud:
+            self._speech += 1
+            self._silence = 0
+            self._held.append(frame)
+        else:
+            self._silence += 1
+            self._held.append(frame)
+
+        if not self._confirmed and self._speech >= self.min_speech_frames:
+            self._confirmed = True
+        if self._confirmed and loud:   # речь продолжилась — придержанное уходит в выдачу
+            self._out += b"".join(self._held)
+            self._held = []
+
+        if self._silence >= self.end_silence_frames:
+            return self._end_phrase()
+        return None
+
+    def _end_phrase(self):
+        event = None
+        silence = self._held
+        if self._confirmed:
+            self._out += b"".join(silence[:self.tail_frames])
+            event = self._emit(final=True)
+        self._reset_phrase()
+        for frame in silence[-self.preroll_frames:] if self.preroll_frames else ():
+            self._preroll.append(frame)
+        return event
+
+    def flush(self):
+        """Закрывает текущую фразу (остановка или пауза захвата); возвращает список событий."""
+        events = []
+        if self.in_speech and self._confirmed:
+            self._out += b"".join(self._held[:self.tail_frames])
+            events.append(self._emit(final=True))
+        self._reset_phrase()
+        return events
@@ -0,0 +1,74 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
+
+
+class StartupOrchestrator:
+    """
+    Параллельный запуск приложения: независимые фазы (калибровка устройств,
+    загрузка модели, прогрев клиента) выполняются в пуле потоков, фазы с Tk —
+    в главном потоке через run(). Для каждой фазы запоминается, когда она
+    началась и сколько длилась (секунды от создания оркестратора); report()
+    печатает сводку.
+    """
+    def __init__(self, max_workers=4):
+        self.t0 = time.perf_counter()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="startup")
+        self._futures = {}
+        self._lock = threading.Lock()
+        self.timings = {}   # name -> (start, duration)
+
+    def _timed(self, name, fn, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            end = time.perf_counter()
+            with self._lock:
+                self.timings[name] = (start - self.t0, end - start)
+
+    def submit(self, name, fn, *args, after=(), **kwargs):
+        """
+        Запускает фазу name в фоне. after — имена фаз, результаты которых
+        передаются в fn первыми аргументами (фаза ждёт их завершения).
+        """
+        deps = [self._futures[d] for d in after]
+
+        def phase():
+            dep_results = [f.result() for f in deps]
+            return self._timed(name, fn, *dep_results, *args, **kwargs)
+
+        self._futures[name] = self._executor.submit(phase)
+        return self._futures[name]
+
+    def run(self, name, fn, *args, **kwargs):
+        """Выполняет фазу в текущем (главном) потоке — для всего, что трогает Tk."""
+        return self._timed(name, fn, *args, **kwargs)
+
+    def result(self, name, timeout=None):
+        return self._futures[name].result(timeout)
+
+    def wait(self, names=None, pump=None, interval=0.05):
+        """
+        Ждёт завершения фаз (по умолчанию — всех запущенных). pump вызывается
+        между ожиданиями, например root.update, чтобы окно не «висело».
+        Ошибка любой фазы пробрасывается сразу.
+        """
+        pending = {self._futures[n] for n in (names if names is not None else list(self._futures))}
+        while pending:
+            done, pending = wait(pending, timeout=interval if pump else None, return_when=FIRST_EXCEPTION)
+            for f in done:
+                f.result()
+            if pump and pending:
+                pump()
+        return [self._futures[n].result() for n in (names or [])]
+
+    def report(self):
+        total = time.perf_counter() - self.t0
+        print(f"[INFO] Startup finished in {total:.2f} s:")
+        for name, (start, duration) in sorted(self.timings.items(), key=lambda kv: kv[1][0]):
+            print(f"[INFO]   {name:<12} {start:6.2f} → {start + duration:6.2f} s  ({duration:.2f} s)")
+        return total
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,119 @@
+import queue
+import time
+
+import numpy as np
+
+import custom_speech_recognition as sr
+from custom_speech_recognition.clock import SampleClock
+from custom_speech_recognition.ring_buffer import RingBuffer
+from AudioRecorder import BaseRecorder, block_chunk_size
+
+RATE = 48000
+CHANNELS = 2
+FRAME_BYTES = 2 * CHANNELS
+CHUNK = block_chunk_size(RATE, 20)
+
+
+class FakePortAudioStream(object):
+    def __init__(self):
+        self.stopped = False
+
+    def is_stopped(self):
+        return self.stopped
+
+    def stop_stream(self):
+        self.stopped = True
+
+    def start_stream(self):
+        self.stopped = False
+
+    def close(self):
+        self.stopped = True
+
+
+class CountingStream(sr.Microphone.CallbackStream):
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.reads = 0
+
+    def read(self, size):
+        self.reads += 1
+        return super().read(size)
+
+
+class Loopback(sr.AudioSource):
+    """Источник в callback-режиме: аудио пишет тест (вместо PortAudio) через write()."""
+
+    def __init__(self):
+        self.SAMPLE_RATE = RATE
+        self.SAMPLE_WIDTH = 2
+        self.CHUNK = CHUNK
+        self.channels = CHANNELS
+        self.stream = None
+
+    def __enter__(self):
+        self.stream = CountingStream(FakePortAudioStream(), RingBuffer(4 * RATE * FRAME_BYTES, FRAME_BYTES),
+                                     FRAME_BYTES, SampleClock(RATE))
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stream = None
+
+    def write(self, pcm):
+        """То, что делает stream_callback: блоки по CHUNK в кольцевой буфер и в часы потока."""
+        stream = self.stream
+        for i in range(0, len(pcm), CHUNK * FRAME_BYTES):
+            block = pcm[i:i + CHUNK * FRAME_BYTES]
+            stream.clock.sync(stream.ring_buffer.written // FRAME_BYTES, len(block) // FRAME_BYTES)
+            stream.ring_buffer.write(block)
+
+
+def sound(seconds, amplitude, seed=0):
+    samples = np.random.default_rng(seed).normal(0, 100, int(RATE * seconds))
+    samples += amplitude * np.sin(2 * np.pi * 440 * np.arange(len(samples)) / RATE)
+    return np.repeat(samples[:, None], CHANNELS, axis=1).astype("<i2").tobytes()
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def drain(q):
+    events = []
+    while not q.empty():
+        events.append(q.get_nowait())
+    return events
+
+
+def test_mute_pauses_the_stream_and_drops_stale_audio():
+    source = Loopback()
+    recorder = BaseRecorder(source)
+    q = queue.Queue()
+    recorder.record_into_queue(q)
+    wait_for(lambda: source.stream is not None)
+    stream = source.stream
+
+    source.write(sound(0.5, 0) + sound(1.0, 6000, seed=1))        # фраза ещё не закончилась
+    wait_for(lambda: len(stream.ring_buffer) == 0)
+    recorder.set_muted(True)
+    source.write(sound(0.02, 0, seed=2))                           # отпускает ждущий read()
+    wait_for(stream.pyaudio_stream.is_stopped)
+    before_mute = drain(q)
+    assert before_mute and before_mute[-1][3]                     # mute закрыл начатую фразу
+
+    source.write(sound(0.5, 6000, seed=3))      # успело попасть в буфер до остановки стрима — уже не нужно
+    reads = stream.reads
+    time.sleep(0.2)
+    assert stream.reads == reads                                   # на паузе никаких чтений
+    assert q.empty()
+
+    recorder.set_muted(False)
+    wait_for(lambda: not stream.pyaudio_stream.is_stopped())
+    source.write(sound(1.0, 0, seed=4))
+    wait_for(lambda: len(stream.ring_buffer) == 0)
+    recorder.stop()
+    assert stream.reads > reads
+    assert drain(q) == []                                          # старая речь после снятия mute не вернулась
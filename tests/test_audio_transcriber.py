@@ -0,0 +1,142 @@
+import asyncio
+import threading
+import time
+
+import AudioTranscriber
+from AudioTranscriber import PARTIAL_MARK
+from capture_queue import CaptureQueue
+
+RATE = 16000
+SECOND = b"\x01\x00" * RATE
+
+
+class Source:
+    SAMPLE_RATE = RATE
+    SAMPLE_WIDTH = 2
+    channels = 1
+
+
+class EchoModel:
+    """Возвращает длительность аудио в виде текста; delay — сколько «распознаётся» фраза."""
+    supports_partials = False
+    max_concurrency = 1
+
+    def __init__(self, delay=0.0, partial_delay=0.0):
+        self.delay = delay
+        self.partial_delay = partial_delay
+
+    async def get_transcription(self, audio, language="ru", partial=False):
+        await asyncio.sleep(self.partial_delay if partial else self.delay)
+        return f"{len(audio.frame_data) / (2 * RATE):.1f}s"
+
+
+class PartialModel(EchoModel):
+    supports_partials = True
+
+
+def start(model):
+    mic_q, speaker_q = CaptureQueue(name="You"), CaptureQueue(name="Speaker")
+    transcriber = AudioTranscriber.AudioTranscriber(Source(), Source(), model)
+    thread = threading.Thread(target=transcriber.transcribe_audio_queue, args=(speaker_q, mic_q), daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 2.0
+    while getattr(transcriber, "_loop", None) is None or not transcriber._loop.is_running():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    return transcriber, thread, mic_q
+
+
+def texts(transcriber, who="You"):
+    return [entry[0] for entry in transcriber.transcript_data[who]]
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.01)
+
+
+def test_shutdown_flushes_open_phrase():
+    transcriber, thread, mic_q = start(EchoModel())
+    now = time.monotonic()
+    mic_q.put((SECOND, now, now + 1.0, False))     # фраза без final — открыта
+    mic_q.put((SECOND, now + 1.0, now + 2.0, False))
+
+    report = transcriber.shutdown(2.0)
+    thread.join(2.0)
+
+    assert not thread.is_alive()
+    assert report["flushed_phrases"] == 1
+    assert report["dropped_jobs"] == 0
+    assert texts(transcriber) == ["You: [2.0s]\n\n"]
+
+
+def test_shutdown_cancels_stuck_backend_and_loop_exits():
+    transcriber, thread, mic_q = start(EchoModel(delay=60.0))
+    now = time.monotonic()
+    mic_q.put((SECOND, now, now + 1.0, True))
+    wait_for(lambda: transcriber.scheduler.running == 1)
+
+    report = transcriber.shutdown(0.2)
+    thread.join(2.0)
+
+    assert not thread.is_alive()
+    assert report["dropped_jobs"] == 1
+    assert report["scheduler"]["cancelled_running"] == 1
+    assert texts(transcriber) == []
+
+
+def test_partials_are_marked_and_replaced_by_final(monkeypatch):
+    monkeypatch.setattr(AudioTranscriber, "PARTIAL_INTERVAL", 0.05)
+    transcriber, thread, mic_q = start(PartialModel())
+    now = time.monotonic()
+    mic_q.put((SECOND, now, now + 1.0, False))
+    wait_for(lambda: texts(transcriber) == [f"You: [1.0s{PARTIAL_MARK}]\n\n"])
+    assert transcriber.get_current_prompt() == []
+
+    mic_q.put((SECOND, now + 1.0, now + 2.0, True))
+    wait_for(lambda: texts(transcriber) == ["You: [2.0s]\n\n"])
+
+    transcriber.shutdown(1.0)
+    thread.join(2.0)
+    assert not thread.is_alive()
+
+
+def test_clear_cancels_running_phrase():
+    transcriber, thread, mic_q = start(EchoModel(delay=0.2))
+    now = time.monotonic()
+    mic_q.put((SECOND, now, now + 1.0, True))
+    wait_for(lambda: transcriber.scheduler.running == 1)
+    transcriber.clear_transcript_data()
+    mic_q.put((SECOND, now + 2.0, now + 3.0, True))
+    wait_for(lambda: texts(transcriber) == ["You: [1.0s]\n\n"])
+
+    report = transcriber.shutdown(1.0)
+    thread.join(2.0)
+    assert report["scheduler"]["cancelled_running"] == 1
+    assert texts(transcriber) == ["You: [1.0s]\n\n"]
+
+
+def test_phrase_timeout_counts_from_arrival_not_from_stamps(monkeypatch):
+    monkeypatch.setattr(AudioTranscriber, "PHRASE_TIMEOUT", 0.3)
+    transcriber, thread, mic_q = start(EchoModel())
+    stamp = time.monotonic() - 5.0          # метки потока отстают от прихода (например, после паузы в loopback)
+    for i in range(3):
+        mic_q.put((SECOND[:RATE], stamp + 0.5 * i, stamp + 0.5 * (i + 1), False))
+        time.sleep(0.05)
+    wait_for(lambda: texts(transcriber) == ["You: [1.5s]\n\n"])
+
+    transcriber.shutdown(1.0)
+    thread.join(2.0)
+    assert not thread.is_alive()
+
+
+def test_context_skips_open_speaker_phrase():
+    transcriber = AudioTranscriber.AudioTranscriber(Source(), Source(), EchoModel(), context_depth=3)
+    for phrase_id in range(4):
+        transcriber.update_transcript("Speaker", f"line {phrase_id}", 100.0 + phrase_id, phrase_id)
+    transcriber.update_transcript("Speaker", "open" + PARTIAL_MARK, 105.0, 4, partial=True)
+
+    assert len(transcriber.get_context_lines()) == 4
+    assert transcriber.get_current_prompt() == ["Speaker: [line 3]", "Speaker: [line 2]", "Speaker: [line 1]"]
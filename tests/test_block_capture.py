@@ -0,0 +1,81 @@
+import numpy as np
+
+import custom_speech_recognition as sr
+
+RATE = 16000
+CHANNELS = 2
+FRAME_BYTES = 2 * CHANNELS
+BLOCK_FRAMES = RATE * 20 // 1000       # блок 20 мс, как SPEAKER_BLOCK_MS
+SPEECH = [(0.5, 1.5), (2.5, 3.5)]
+
+
+class Loopback(sr.AudioSource):
+    """Синтетический loopback: стерео, шум и тон на время SPEECH; считает вызовы read()."""
+
+    def __init__(self, pcm, chunk):
+        self.SAMPLE_RATE = RATE
+        self.SAMPLE_WIDTH = 2
+        self.CHUNK = chunk
+        self.channels = CHANNELS
+        self.pcm = pcm
+        self.stream = None
+
+    def __enter__(self):
+        self.stream = Loopback.Stream(self.pcm)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stream = None
+
+    class Stream(object):
+        def __init__(self, pcm):
+            self.pcm = pcm
+            self.pos = 0
+            self.reads = 0
+
+        def read(self, frames):
+            self.reads += 1
+            data = self.pcm[self.pos:self.pos + frames * FRAME_BYTES]
+            self.pos += len(data)
+            return data
+
+
+def loopback_pcm(seconds=5.0):
+    t = np.arange(int(RATE * seconds)) / RATE
+    samples = np.random.default_rng(0).normal(0, 100, len(t))
+    for start, end in SPEECH:
+        mask = (t >= start) & (t < end)
+        samples[mask] += 6000 * np.sin(2 * np.pi * 440 * t[mask])
+    return np.repeat(samples[:, None], CHANNELS, axis=1).astype("<i2").tobytes()
+
+
+def listen_all(pcm, chunk, vectorized):
+    r = sr.Recognizer()
+    r.energy_threshold = 1000
+    r.dynamic_energy_threshold = False
+    r.vectorized = vectorized
+    phrases = []
+    with Loopback(pcm, chunk) as source:
+        while source.stream.pos < len(pcm):
+            audio = r.listen(source, phrase_time_limit=3)
+            if audio.frame_data:
+                phrases.append(len(audio.frame_data))
+        return phrases, source.stream.reads
+
+
+def test_block_sized_reads_find_the_same_phrases_as_two_frame_reads():
+    pcm = loopback_pcm()
+    reference, _ = listen_all(pcm, 2, vectorized=False)     # старый захват динамика: 2 фрейма за чтение
+    assert len(reference) == len(SPEECH) + 1                # и тишина, прочитанная до конца потока
+    for vectorized in (False, True):
+        phrases, _ = listen_all(pcm, BLOCK_FRAMES, vectorized)
+        assert len(phrases) == len(reference)
+        for size, expected in zip(phrases, reference):
+            assert abs(size - expected) <= BLOCK_FRAMES * FRAME_BYTES
+
+
+def test_block_sized_reads_touch_the_stream_once_per_block():
+    pcm = loopback_pcm()
+    _, reads = listen_all(pcm, BLOCK_FRAMES, vectorized=False)
+    seconds = len(pcm) / FRAME_BYTES / RATE
+    assert reads <= seconds * 1000 / 20 + len(SPEECH) + 1
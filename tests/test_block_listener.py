@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+import custom_speech_recognition as sr
+
+
+class Source(sr.AudioSource):
+    def __init__(self, pcm, rate, chunk, channels=1):
+        self.SAMPLE_RATE = rate
+        self.SAMPLE_WIDTH = 2
+        self.CHUNK = chunk
+        self.channels = channels
+        self.pcm = pcm
+        self.stream = None
+
+    def __enter__(self):
+        self.stream = Source.Stream(self.pcm, 2 * self.channels)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stream = None
+
+    class Stream(object):
+        def __init__(self, pcm, frame_bytes):
+            self.pcm = pcm
+            self.pos = 0
+            self.frame_bytes = frame_bytes
+
+        def read(self, frames):
+            data = self.pcm[self.pos:self.pos + frames * self.frame_bytes]
+            self.pos += len(data)
+            return data
+
+
+def random_audio(rng, rate, channels, seconds=6.0):
+    t = np.arange(int(rate * seconds)) / rate
+    samples = rng.normal(0, 100, (len(t), channels))
+    for _ in range(rng.integers(1, 6)):
+        start = rng.uniform(0, seconds)
+        mask = (t >= start) & (t < start + rng.uniform(0.05, 3.0))
+        samples[mask, rng.integers(channels)] += rng.uniform(1000, 8000) * np.sin(2 * np.pi * 300 * t[mask])
+    return samples.astype("<i2").tobytes()
+
+
+def listen_all(vectorized, pcm, rate, chunk, channels, timeout, limit, dynamic):
+    r = sr.Recognizer()
+    r.vectorized = vectorized
+    r.dynamic_energy_threshold = dynamic
+    r.energy_threshold = 500
+    phrases = []
+    with Source(pcm, rate, chunk, channels) as source:
+        while len(phrases) < 30:
+            try:
+                audio = r.listen(source, timeout=timeout, phrase_time_limit=limit)
+            except sr.WaitTimeoutError:
+                phrases.append("timeout")
+                continue
+            if not audio.frame_data:
+                break
+            phrases.append(audio.frame_data)
+    return phrases, r.energy_threshold
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_block_listener_matches_chunk_by_chunk_listen(seed):
+    rng = np.random.default_rng(seed)
+    rate = int(rng.choice([8000, 16000, 44100, 48000]))
+    chunk = int(rng.choice([160, 320, 441, 480, 1024, 1600]))
+    channels = int(rng.choice([1, 2]))
+    timeout = float(rng.choice([0, 0.3, 0.7, 1.1, 2.3])) or None
+    limit = float(rng.choice([0, 0.3, 0.7, 0.9, 1.1, 2.3])) or None
+    dynamic = bool(rng.integers(2))
+    pcm = random_audio(rng, rate, channels)
+
+    scalar, scalar_threshold = listen_all(False, pcm, rate, chunk, channels, timeout, limit, dynamic)
+    block, block_threshold = listen_all(True, pcm, rate, chunk, channels, timeout, limit, dynamic)
+    assert block == scalar
+    assert block_threshold == pytest.approx(scalar_threshold)
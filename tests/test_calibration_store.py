@@ -0,0 +1,34 @@
+import time
+
+from calibration_store import CalibrationStore, device_key, noise_stats
+
+
+def test_profiles_survive_reload(tmp_path):
+    path = tmp_path / "data" / "calibration.json"
+    key = device_key("Mic", "WASAPI", 48000.0)
+    CalibrationStore(str(path)).put(key, 420.0, {"noise_floor": 100.0, "noise_p90": 150.0})
+    profile = CalibrationStore(str(path)).get(key)
+    assert profile["energy_threshold"] == 420.0
+    assert profile["noise_floor"] == 100.0
+    assert key == "Mic|WASAPI|48000"
+
+
+def test_corrupt_file_means_no_profiles(tmp_path):
+    path = tmp_path / "calibration.json"
+    path.write_text("{not json", encoding="utf-8")
+    assert CalibrationStore(str(path)).get("any") is None
+
+
+def test_staleness_and_drift():
+    fresh = {"measured_at": time.time(), "noise_floor": 100.0}
+    assert not CalibrationStore.is_stale(fresh)
+    assert CalibrationStore.is_stale({"measured_at": time.time() - 8 * 86400})
+    assert not CalibrationStore.has_drifted(fresh, 150.0)
+    assert CalibrationStore.has_drifted(fresh, 1000.0)
+    assert not CalibrationStore.has_drifted({"noise_floor": 0.0}, 10.0)     # тишина loopback
+
+
+def test_noise_stats():
+    stats = noise_stats(range(1, 101))
+    assert stats == {"noise_floor": 51.0, "noise_p90": 91.0}
+    assert noise_stats([]) is None
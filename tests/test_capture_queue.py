@@ -0,0 +1,86 @@
+import threading
+
+import pytest
+
+from capture_queue import CaptureQueue, BLOCK, DROP_OLDEST, COALESCE
+
+
+def chunk(i, size=4):
+    return (bytes([i]) * size, float(i), i + 1.0, False)
+
+
+def test_drop_oldest_keeps_newest_items():
+    q = CaptureQueue(2, DROP_OLDEST)
+    for i in range(4):
+        q.put(chunk(i))
+    assert [q.get_nowait()[1] for _ in range(2)] == [2.0, 3.0]
+    assert q.stats()["dropped"] == 2
+    assert q.stats()["dropped_bytes"] == 8
+
+
+def test_coalesce_merges_into_last_item():
+    q = CaptureQueue(2, COALESCE)
+    for i in range(4):
+        q.put(chunk(i))
+    first, last = q.get_nowait(), q.get_nowait()
+    assert first == chunk(0)
+    assert last == (bytes([1]) * 4 + bytes([2]) * 4 + bytes([3]) * 4, 1.0, 4.0, False)
+    assert q.stats()["coalesced"] == 2
+    assert q.queued_bytes == 0
+
+
+def test_coalesce_is_capped():
+    q = CaptureQueue(2, COALESCE, max_item_bytes=8)
+    for i in range(4):
+        q.put(chunk(i))
+    stats = q.stats()
+    assert stats["coalesced"] == 1
+    assert stats["dropped"] == 1
+    assert [len(q.get_nowait()[0]) for _ in range(2)] == [8, 4]
+
+
+def test_block_waits_for_consumer():
+    q = CaptureQueue(1, BLOCK)
+    q.put(chunk(0))
+    producer = threading.Thread(target=q.put, args=(chunk(1),))
+    producer.start()
+    producer.join(0.05)
+    assert producer.is_alive()
+    assert q.get()[1] == 0.0
+    producer.join(1.0)
+    assert q.get_nowait()[1] == 1.0
+    assert q.stats()["blocked"] == 1
+
+
+def test_listeners_are_notified_on_put_and_on_register():
+    q = CaptureQueue(4)
+    calls = []
+    q.put(chunk(0))
+    q.add_listener(lambda: calls.append("wake"))
+    assert calls == ["wake"]
+    q.put(chunk(1))
+    assert calls == ["wake", "wake"]
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        CaptureQueue(1, "lossless")
+
+
+def test_coalesce_never_merges_across_phrase_end():
+    q = CaptureQueue(2, COALESCE)
+    q.put(chunk(0))
+    q.put((bytes([1]) * 4, 1.0, 2.0, True))     # конец фразы
+    q.put(chunk(5))                             # первый кусок следующей фразы
+    items = [q.get_nowait() for _ in range(2)]
+    assert items == [(bytes([1]) * 4, 1.0, 2.0, True), chunk(5)]
+    stats = q.stats()
+    assert stats["coalesced"] == 0
+    assert stats["dropped"] == 1
+
+
+def test_coalesce_keeps_final_of_newer_item():
+    q = CaptureQueue(1, COALESCE)
+    q.put(chunk(0))
+    q.put((bytes([1]) * 4, 1.0, 2.0, True))
+    assert q.get_nowait() == (bytes([0]) * 4 + bytes([1]) * 4, 0.0, 2.0, True)
@@ -0,0 +1,61 @@
+import pytest
+
+from custom_speech_recognition import clock as clock_module
+from custom_speech_recognition.clock import SampleClock
+
+RATE = 16000
+BLOCK = 320     # 20 мс
+
+
+class FakeTime:
+    def __init__(self, now=100.0):
+        self.now = now
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def fake_time(monkeypatch):
+    fake = FakeTime()
+    monkeypatch.setattr(clock_module, "time", fake)
+    return fake
+
+
+def deliver(clock, fake_time, frame, seconds, latency=0.01, jitter=None):
+    """Блоки по BLOCK фреймов приходят в реальном времени (+ задержка доставки); возвращает ошибки меток."""
+    errors = []
+    start = fake_time.now
+    for i in range(int(seconds * RATE) // BLOCK):
+        captured = start + i * BLOCK / RATE
+        fake_time.now = captured + BLOCK / RATE + latency + (jitter[i % len(jitter)] if jitter else 0.0)
+        clock.sync(frame, BLOCK)
+        errors.append(clock.time_of(frame) - captured)
+        frame += BLOCK
+    return frame, errors
+
+
+def test_clock_catches_up_after_a_gap_without_data(fake_time):
+    clock = SampleClock(RATE)
+    frame, errors = deliver(clock, fake_time, 0, 1.0)
+    fake_time.now += 4.0                    # loopback в тишине ничего не присылает
+    _, after = deliver(clock, fake_time, frame, 1.0)
+    assert max(abs(e) for e in errors + after) <= 0.01 + 1e-9    # не больше задержки доставки, а не 4 с
+
+
+def test_clock_ignores_delivery_jitter(fake_time):
+    clock = SampleClock(RATE)
+    _, errors = deliver(clock, fake_time, 0, 2.0, jitter=[0.0, 0.03, 0.01, 0.05, 0.0, 0.02])
+    assert all(-1e-9 <= e <= 0.01 + 1e-9 for e in errors)       # метки — по счёту фреймов, не по приходу
+    assert clock.anchor_time == pytest.approx(100.0 + 0.01)
+
+
+def test_clock_recovers_from_a_delivery_stall(fake_time):
+    clock = SampleClock(RATE)
+    errors = []
+    for i in range(100):
+        captured = 100.0 + i * BLOCK / RATE
+        fake_time.now = max(captured + BLOCK / RATE, 100.5) + 0.01    # первые 0.5 с приходят разом, с опозданием
+        clock.sync(i * BLOCK, BLOCK)
+        errors.append(clock.time_of(i * BLOCK) - captured)
+    assert all(-1e-9 <= e <= 0.01 + 1e-9 for e in errors[30:])     # после пачки метки снова точные
@@ -0,0 +1,36 @@
+import copy
+import json
+
+import pytest
+
+import config_manager
+
+
+@pytest.fixture
+def config_file(tmp_path, monkeypatch):
+    path = tmp_path / "config.json"
+    monkeypatch.setattr(config_manager, "CONFIG_FILE", str(path))
+    return path
+
+
+def test_missing_file_gives_defaults_and_writes_them(config_file):
+    assert config_manager.load_config() == config_manager.DEFAULT_CONFIG
+    assert json.loads(config_file.read_text(encoding="utf-8")) == config_manager.DEFAULT_CONFIG
+
+
+def test_transcriber_section_is_merged_with_defaults(config_file):
+    defaults = copy.deepcopy(config_manager.DEFAULT_CONFIG)
+    config_file.write_text(json.dumps({"language": "en", "transcriber": {"backend": "local", "model": "small"}}),
+                           encoding="utf-8")
+    config = config_manager.load_config()
+
+    assert config["language"] == "en"
+    assert config["transcriber"] == {**defaults["transcriber"], "backend": "local", "model": "small"}
+    assert config["fonts"] == defaults["fonts"]
+    assert config_manager.DEFAULT_CONFIG == defaults                  # значения по умолчанию не тронуты
+    assert json.loads(config_file.read_text(encoding="utf-8")) == config     # дополненный файл сохранён
+
+
+def test_corrupt_file_gives_defaults(config_file):
+    config_file.write_text("{not json", encoding="utf-8")
+    assert config_manager.load_config() == config_manager.DEFAULT_CONFIG
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from model_pool import JobError, ModelPool
+
+# Модель для процессов пула: текст — число сэмплов и pid процесса; язык "fail" — ошибка задания,
+# "crash" — процесс падает.
+FAKE_FASTER_WHISPER = '''
+import os
+
+
+class Segment:
+    def __init__(self, text):
+        self.text = text
+
+
+class WhisperModel:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def transcribe(self, audio, language=None, **kwargs):
+        if language == "fail":
+            raise ValueError("bad audio")
+        if language == "crash":
+            os._exit(1)
+        return iter([Segment(f"{len(audio)} {os.getpid()}")]), None
+'''
+
+
+@pytest.fixture
+def pool(tmp_path, monkeypatch):
+    (tmp_path / "faster_whisper.py").write_text(FAKE_FASTER_WHISPER)
+    monkeypatch.setenv("PYTHONPATH", str(tmp_path))
+    pool = ModelPool(1, ("tiny",))
+    yield pool
+    pool.close()
+
+
+def test_transcribes_through_shared_memory(pool):
+    assert pool.transcribe(np.zeros(1600)).split()[0] == "1600"
+    assert pool.transcribe(np.zeros(40 * 16000)).split()[0] == str(40 * 16000)    # буфер вырос
+    assert pool.stats() == {"processes": 1, "idle": 1, "alive": 1, "restarts": 0}
+
+
+def test_error_reply_reaches_caller_without_restart(pool):
+    first = pool.transcribe(np.zeros(100), {"language": "en"})
+    with pytest.raises(JobError, match="bad audio"):
+        pool.transcribe(np.zeros(100), {"language": "fail"})
+    assert pool.transcribe(np.zeros(100), {"language": "en"}) == first     # тот же процесс
+    assert pool.stats()["restarts"] == 0
+
+
+def test_dead_worker_is_respawned(pool):
+    first = pool.transcribe(np.zeros(100))
+    with pytest.raises((EOFError, OSError)):
+        pool.transcribe(np.zeros(100), {"language": "crash"})
+    second = pool.transcribe(np.zeros(100))
+    assert second.split()[0] == "100"
+    assert second != first                  # новый pid
+    assert pool.stats() == {"processes": 1, "idle": 1, "alive": 1, "restarts": 1}
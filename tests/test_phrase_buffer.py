@@ -0,0 +1,47 @@
+from phrase_buffer import PhraseBuffer
+
+
+def data(start, stop):
+    return bytes(i % 256 for i in range(start, stop))
+
+
+def test_view_taken_before_growth_stays_unchanged():
+    buffer = PhraseBuffer(capacity=8)
+    buffer.append(data(0, 6))
+    view = buffer.view()
+    buffer.append(data(6, 7))           # ещё влезает — пишется в тот же bytearray за концом view
+    buffer.append(data(7, 40))          # буфер вырос
+    assert bytes(view) == data(0, 6)
+    assert bytes(buffer.view()) == data(0, 40)
+
+
+def test_taken_phrase_survives_next_phrase():
+    buffer = PhraseBuffer(capacity=8)
+    buffer.append(data(0, 6))
+    phrase = buffer.take()
+    assert not buffer
+    buffer.append(data(100, 110))
+    buffer.append(data(110, 200 * 1024))    # и больше INITIAL_CAPACITY
+    assert bytes(phrase) == data(0, 6)
+
+
+def test_split_with_overlap_keeps_window_and_tail():
+    buffer = PhraseBuffer(capacity=16)
+    buffer.append(data(0, 100))
+    window = buffer.split(60, keep=20)
+    assert bytes(window) == data(0, 60)
+    assert bytes(buffer.view()) == data(40, 100)     # перекрытие 20 байт + всё после окна
+    buffer.append(data(100, 300))
+    second = buffer.split(150, keep=20)
+    assert bytes(window) == data(0, 60)              # первое окно не тронуто ни дописыванием, ни вторым split
+    assert bytes(second) == data(40, 190)
+    assert bytes(buffer.take()) == data(170, 300)
+    assert bytes(second) == data(40, 190)
+
+
+def test_split_without_overlap():
+    buffer = PhraseBuffer()
+    buffer.append(data(0, 10))
+    assert bytes(buffer.split(4)) == data(0, 4)
+    assert bytes(buffer.view()) == data(4, 10)
+    assert len(buffer) == 6
@@ -0,0 +1,35 @@
+import numpy as np
+
+from custom_speech_recognition.dsp import PolyphaseResampler
+
+
+def tone(rate, seconds=1.0, freq=440.0):
+    return np.sin(2 * np.pi * freq * np.arange(int(rate * seconds)) / rate)
+
+
+def test_streaming_in_blocks_matches_one_call():
+    x = tone(48000)
+    blocks = PolyphaseResampler(48000, 16000)
+    whole = PolyphaseResampler(48000, 16000)
+    streamed = np.concatenate([blocks.process(x[i:i + 960]) for i in range(0, len(x), 960)])
+    np.testing.assert_allclose(streamed, whole.process(x), atol=1e-12)
+    assert len(streamed) == 16000
+
+
+def test_resample_preserves_tone():
+    y = PolyphaseResampler(44100, 16000).resample(tone(44100))[:, 0]
+    expected = tone(16000)[:len(y)]
+    np.testing.assert_allclose(y[200:-200], expected[200:-200], atol=1e-3)
+
+
+def test_removes_content_above_new_nyquist():
+    y = PolyphaseResampler(48000, 16000).resample(tone(48000, freq=12000.0))
+    assert np.abs(y[200:-200]).max() < 1e-2
+
+
+def test_reset_forgets_history():
+    resampler = PolyphaseResampler(48000, 16000)
+    first = resampler.process(tone(48000, 0.1))
+    resampler.process(np.ones(4800))
+    resampler.reset()
+    np.testing.assert_allclose(resampler.process(tone(48000, 0.1)), first)
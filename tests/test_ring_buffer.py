@@ -0,0 +1,84 @@
+import threading
+import time
+
+import pytest
+
+import custom_speech_recognition as sr
+from custom_speech_recognition.clock import SampleClock
+from custom_speech_recognition.ring_buffer import RingBuffer
+
+
+def test_read_returns_written_data_in_order():
+    buffer = RingBuffer(8, frame_bytes=2)
+    buffer.write(b"abcd")
+    buffer.write(b"ef")
+    assert buffer.read(4) == b"abcd"
+    assert buffer.read(2) == b"ef"
+    assert len(buffer) == 0
+
+
+def test_overflow_overwrites_oldest_and_counts_it():
+    buffer = RingBuffer(8, frame_bytes=2)
+    buffer.write(b"abcdef")
+    buffer.write(b"ghij")
+    assert buffer.overflows == 1
+    assert buffer.dropped_bytes == 2
+    assert buffer.read(8) == b"cdefghij"
+    assert buffer.last_read_start == 2
+
+
+def test_write_larger_than_capacity_keeps_newest():
+    buffer = RingBuffer(4)
+    buffer.write(b"abcdefgh")
+    assert buffer.dropped_bytes == 4
+    assert buffer.read(4) == b"efgh"
+
+
+def test_close_releases_blocked_reader_with_short_data():
+    buffer = RingBuffer(8)
+    buffer.write(b"ab")
+    result = []
+    reader = threading.Thread(target=lambda: result.append(buffer.read(6)))
+    reader.start()
+    time.sleep(0.05)
+    assert reader.is_alive()
+    buffer.close()
+    reader.join(1.0)
+    assert result == [b"ab"]
+    assert buffer.read(4) == b""
+
+
+def test_read_timeout_returns_what_is_available():
+    buffer = RingBuffer(8)
+    buffer.write(b"a")
+    assert buffer.read(4, timeout=0.01) == b"a"
+
+
+def test_read_larger_than_capacity_is_rejected():
+    buffer = RingBuffer(8)
+    with pytest.raises(ValueError):
+        buffer.read(9)
+
+
+def test_driver_overflows_are_counted_with_the_write():
+    buffer = RingBuffer(8, frame_bytes=2)
+    buffer.write(b"ab", overflowed=True)
+    buffer.write(b"", overflowed=True)
+    assert buffer.stats() == {"capacity": 8, "buffered": 2, "written": 2, "overflows": 2, "dropped_bytes": 0}
+
+
+def test_callback_stream_serves_long_reads_in_pieces():
+    buffer = RingBuffer(8, frame_bytes=2)
+    stream = sr.Microphone.CallbackStream(None, buffer, 2, SampleClock(16000))
+
+    def writer():
+        for i in range(5):
+            time.sleep(0.01)
+            buffer.write(bytes([i]) * 4)
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    data = stream.read(10)      # 20 байт при ёмкости 8
+    thread.join()
+    assert data == b"".join(bytes([i]) * 4 for i in range(5))
+    assert stream.position == 10
@@ -0,0 +1,88 @@
+import numpy as np
+
+from custom_speech_recognition.energy import NoiseFloorTracker
+from segmenter import StreamingSegmenter
+
+RATE = 16000
+
+
+def signal(seconds, bursts, amplitude=6000, noise=100, seed=0):
+    t = np.arange(int(RATE * seconds)) / RATE
+    samples = np.random.default_rng(seed).normal(0, noise, len(t))
+    for start, end in bursts:
+        mask = (t >= start) & (t < end)
+        samples[mask] += amplitude * np.sin(2 * np.pi * 440 * t[mask])
+    return samples.astype("<i2").tobytes()
+
+
+def run(segmenter, pcm, block=960, t0=100.0):
+    events = []
+    for i in range(0, len(pcm), block):
+        events += segmenter.feed(pcm[i:i + block], t0 + i / 2 / RATE)
+    return events + segmenter.flush()
+
+
+def phrases(events):
+    result, current = [], None
+    for data, start, end, final in events:
+        if current is None:
+            current = [start, end, len(data)]
+        else:
+            assert abs(start - current[1]) < 1e-9      # куски фразы идут встык
+            current[1], current[2] = end, current[2] + len(data)
+        if final:
+            result.append(tuple(current))
+            current = None
+    return result
+
+
+def test_phrases_and_timestamps():
+    pcm = signal(6, [(1.0, 2.0), (3.5, 4.5)])
+    found = phrases(run(StreamingSegmenter(RATE, 2, 1000), pcm))
+    assert len(found) == 2
+    for (start, end, size), (speech_start, speech_end) in zip(found, [(1.0, 2.0), (3.5, 4.5)]):
+        assert speech_start - 0.31 <= start - 100 <= speech_start        # preroll
+        assert speech_end <= end - 100 <= speech_end + 0.21              # tail
+        assert size == round((end - start) * RATE) * 2
+
+
+def test_short_blip_is_discarded():
+    pcm = signal(3, [(1.0, 1.1)])
+    assert run(StreamingSegmenter(RATE, 2, 1000), pcm) == []
+
+
+def test_long_phrase_is_emitted_in_pieces():
+    pcm = signal(4, [(0.5, 3.0)])
+    events = run(StreamingSegmenter(RATE, 2, 1000, emit_ms=500), pcm)
+    assert len(events) > 3
+    assert [final for *_, final in events].count(True) == 1
+    assert events[-1][3]
+
+
+def test_frame_energies_match_frames():
+    segmenter = StreamingSegmenter(RATE, 2, 1000)
+    pcm = np.full(segmenter.frame_samples * 3 + 5, 1000, dtype="<i2").tobytes()
+    assert list(segmenter.frame_energies(pcm)) == [1000.0] * 3
+
+
+def test_noise_floor_holds_through_speech_with_pauses():
+    segmenter = StreamingSegmenter(RATE, 2, 1000, noise_floor=NoiseFloorTracker())
+    run(segmenter, signal(2, []))
+    threshold = segmenter.energy_threshold
+    bursts = [(1.5 * i, 1.5 * i + 1.0) for i in range(20)]     # 30 с речи с паузами по 0.5 с
+    found = phrases(run(segmenter, signal(30, bursts, seed=1)))
+    assert len(found) == len(bursts)
+    assert segmenter.energy_threshold < 1.5 * threshold
+
+
+def test_noise_floor_follows_rising_background():
+    segmenter = StreamingSegmenter(RATE, 2, 1000, noise_floor=NoiseFloorTracker())
+    run(segmenter, signal(2, []))
+    threshold = segmenter.energy_threshold
+    pcm = signal(30, [], noise=1000, seed=1)    # фон стал громче порога
+    events = []
+    for i in range(0, len(pcm), 960):
+        events += segmenter.feed(pcm[i:i + 960], 100.0 + i / 2 / RATE)
+    assert not segmenter.in_speech
+    assert segmenter.energy_threshold > 1000 > threshold
+    assert sum(len(data) for data, *_ in events) / 2 / RATE < 10     # а не все 30 с фона
@@ -0,0 +1,84 @@
+import threading
+import time
+
+import pytest
+
+from startup import StartupOrchestrator
+
+
+def sleeper(seconds, result=None):
+    def run(*args):
+        time.sleep(seconds)
+        return result if result is not None else args
+    return run
+
+
+@pytest.fixture
+def startup():
+    orchestrator = StartupOrchestrator()
+    yield orchestrator
+    orchestrator.shutdown()
+
+
+def test_after_passes_results_and_waits_for_them(startup):
+    startup.submit("model", sleeper(0.1, "model"))
+    startup.submit("warm_up", lambda model, extra: (model, extra), "loop", after=("model",))
+    assert startup.wait(["warm_up"]) == [("model", "loop")]
+    model_start, model_duration = startup.timings["model"]
+    assert startup.timings["warm_up"][0] >= model_start + model_duration
+
+
+def test_independent_phases_run_concurrently(startup):
+    t0 = time.perf_counter()
+    for name in ("mic", "speaker", "model"):
+        startup.submit(name, sleeper(0.2, name))
+    assert startup.wait(["mic", "speaker", "model"]) == ["mic", "speaker", "model"]
+    assert time.perf_counter() - t0 < 0.4
+    assert max(start for start, _ in startup.timings.values()) < 0.1
+
+
+def test_phase_error_reaches_wait_without_waiting_for_the_rest(startup):
+    def fail():
+        raise RuntimeError("no loopback device")
+
+    startup.submit("slow", sleeper(1.0, "slow"))
+    startup.submit("speaker", fail)
+    t0 = time.perf_counter()
+    with pytest.raises(RuntimeError, match="no loopback device"):
+        startup.wait(["slow", "speaker"], pump=lambda: None)
+    assert time.perf_counter() - t0 < 0.5
+    assert "speaker" in startup.timings             # упавшая фаза тоже в таблице
+
+
+def test_error_in_dependency_fails_dependent_phase(startup):
+    def fail():
+        raise ValueError("model not found")
+
+    startup.submit("model", fail)
+    startup.submit("warm_up", lambda model: model, after=("model",))
+    with pytest.raises(ValueError, match="model not found"):
+        startup.wait(["warm_up"])
+
+
+def test_pump_runs_in_the_waiting_thread_until_done(startup):
+    threads = []
+    startup.submit("model", sleeper(0.2, "model"))
+    assert startup.wait(["model"], pump=lambda: threads.append(threading.current_thread()), interval=0.01) == ["model"]
+    assert len(threads) >= 5
+    assert set(threads) == {threading.current_thread()}
+
+
+def test_report_lists_phases_in_start_order(startup, capsys):
+    startup.run("config", lambda: None)
+    startup.submit("model", sleeper(0.05, "model"))
+    startup.run("window", sleeper(0.05, "window"))
+    startup.wait()
+    total = startup.report()
+
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0] == f"[INFO] Startup finished in {total:.2f} s:"
+    rows = [line.split() for line in lines[1:]]
+    assert sorted(row[1] for row in rows) == ["config", "model", "window"]
+    starts = [float(row[2]) for row in rows]
+    assert starts == sorted(starts)
+    assert startup.timings["window"][1] >= 0.05
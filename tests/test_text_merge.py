@@ -0,0 +1,40 @@
+from text_merge import merge_overlap, StablePrefix
+
+
+def test_merge_drops_repeated_overlap():
+    assert merge_overlap("we went to the store", "to the store and back") == "we went to the store and back"
+
+
+def test_merge_ignores_case_and_punctuation():
+    assert merge_overlap("Hello, big world.", "big World and more") == "Hello, big world. and more"
+
+
+def test_merge_skips_truncated_first_word_only_with_long_overlap():
+    assert merge_overlap("a b c d", "x b c d e") == "a b c d e"
+    assert merge_overlap("a b c", "x b c d") == "a b c x b c d"
+
+
+def test_merge_keeps_words_on_single_word_match():
+    assert merge_overlap("I saw the", "and the cat sat") == "I saw the and the cat sat"
+    assert merge_overlap("это", "то что надо") == "это то что надо"
+
+
+def test_merge_with_empty_side():
+    assert merge_overlap("", "text") == "text"
+    assert merge_overlap("text", "") == "text"
+
+
+def test_stable_prefix_commits_words_agreed_twice():
+    stable = StablePrefix()
+    assert stable.update("hello wor") == ("", "hello wor")
+    assert stable.update("hello world how") == ("hello", "world how")
+    assert stable.update("hello world how are") == ("hello world how", "are")
+
+
+def test_stable_prefix_never_rewrites_committed_words():
+    stable = StablePrefix()
+    stable.update("one two")
+    stable.update("one two three")
+    committed, tail = stable.update("uno dos three four")
+    assert committed == "one two three"
+    assert tail == "four"
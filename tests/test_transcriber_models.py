@@ -0,0 +1,234 @@
+import asyncio
+import threading
+import time
+import wave
+
+import numpy as np
+import pytest
+
+import custom_speech_recognition as sr
+import TranscriberModels
+from custom_speech_recognition import dsp
+
+RATE = TranscriberModels.WHISPER_SAMPLE_RATE
+
+
+class Segment:
+    def __init__(self, text, start=0.0, end=0.0, words=None):
+        self.text = text
+        self.start = start
+        self.end = end
+        self.words = words
+
+
+class SlowModel:
+    """Вместо WhisperModel: «распознаёт» за delay секунд и запоминает поток, в котором считал."""
+    delay = 0.2
+
+    def __init__(self, *args, **kwargs):
+        self.threads = []
+
+    def transcribe(self, audio, **kwargs):
+        self.threads.append(threading.current_thread().name)
+        time.sleep(self.delay)
+        return iter([Segment(f"{len(audio)}")]), None
+
+
+class Word:
+    def __init__(self, word, start, end):
+        self.word = word
+        self.start = start
+        self.end = end
+
+
+class FakePipeline:
+    """Вместо BatchedInferencePipeline: один сегмент на весь проход, по слову-длине на каждый клип."""
+
+    def __init__(self, model):
+        self.calls = []
+
+    def transcribe(self, audio, clip_timestamps, language=None, **kwargs):
+        self.calls.append((len(clip_timestamps), language))
+        words = [Word(f" {clip['end'] - clip['start']}", clip["start"] / RATE, clip["end"] / RATE)
+                 for clip in clip_timestamps]
+        return iter([Segment("", 0.0, len(audio) / RATE, words)]), None
+
+
+def audio(seconds):
+    return sr.AudioData(b"\x00\x00" * int(RATE * seconds), RATE, 2)
+
+
+@pytest.fixture
+def transcriber(monkeypatch):
+    monkeypatch.setattr(TranscriberModels, "WhisperModel", SlowModel)
+    model = TranscriberModels.FasterWhisperTranscriber(device="cpu", compute_type="int8", batching=False,
+                                                       warm_up=False)
+    yield model
+    model.close()
+
+
+@pytest.fixture
+def batched(monkeypatch):
+    monkeypatch.setattr(TranscriberModels, "WhisperModel", SlowModel)
+    monkeypatch.setattr(TranscriberModels, "BatchedInferencePipeline", FakePipeline)
+    model = TranscriberModels.FasterWhisperTranscriber(device="cpu", compute_type="int8", batch_size=8,
+                                                       batch_window=0.05, warm_up=False)
+    yield model
+    model.close()
+
+
+def test_inference_runs_off_the_event_loop(transcriber):
+    async def main():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        text = await transcriber.get_transcription(audio(1.0), "en")
+        task.cancel()
+        return text, ticks
+
+    text, ticks = asyncio.run(main())
+    assert text == str(RATE)
+    assert transcriber.model.threads == ["whisper_0"]
+    assert ticks >= 5       # цикл не стоял, пока модель считала
+
+
+def test_cancelled_transcription_releases_the_loop_at_once(transcriber):
+    async def main():
+        task = asyncio.create_task(transcriber.get_transcription(audio(1.0), "en"))
+        await asyncio.sleep(0.05)
+        start = time.perf_counter()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return time.perf_counter() - start
+
+    assert asyncio.run(main()) < 0.05      # расчёт в потоке ещё идёт, но ждать его незачем
+
+
+def test_batched_text_is_routed_to_its_phrase_by_word_timestamps(batched):
+    async def main():
+        return await asyncio.gather(*(batched.get_transcription(audio(seconds), "en")
+                                      for seconds in (0.5, 1.0, 0.25)))
+
+    # слова лежат в одном сегменте, который накрывает все три клипа, — раскладка только по времени слов
+    assert asyncio.run(main()) == [str(RATE // 2), str(RATE), str(RATE // 4)]
+    assert batched.batched.calls == [(3, "en")]
+    assert batched.model.threads == []
+
+
+def test_partials_and_languages_go_to_separate_passes(batched):
+    async def main():
+        return await asyncio.gather(
+            batched.get_transcription(audio(0.5), "en"),
+            batched.get_transcription(audio(0.5), "en", partial=True),
+            batched.get_transcription(audio(1.0), "en"),
+            batched.get_transcription(audio(1.0), "ru", partial=True),
+            batched.get_transcription(audio(0.25), "en", partial=True),
+        )
+
+    assert asyncio.run(main()) == [str(RATE // 2), str(RATE // 2), str(RATE), str(RATE), str(RATE // 4)]
+    assert sorted(batched.batched.calls) == [(2, "en"), (2, "en")]
+    assert batched.model.threads == ["whisper_0"]       # одиночная гипотеза на ru — обычным проходом
+
+
+class Backend:
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+
+
+class API(Backend):
+    pass
+
+
+class Local(Backend):
+    pass
+
+
+@pytest.fixture
+def backends(monkeypatch):
+    monkeypatch.setattr(TranscriberModels, "APIWhisperTranscriber", API)
+    monkeypatch.setattr(TranscriberModels, "FasterWhisperTranscriber", Local)
+
+
+def test_get_model_defaults_to_the_api(backends):
+    model = TranscriberModels.get_model()
+    assert isinstance(model, API)
+    assert model.kwargs == {"language": None}
+
+
+def test_get_model_builds_local_model_from_settings(backends):
+    model = TranscriberModels.get_model({"backend": "local", "model": "small", "beam_size": 1, "batching": False})
+    assert isinstance(model, Local)
+    assert model.kwargs["model_name"] == "small"
+    assert model.kwargs["beam_size"] == 1
+    assert model.kwargs["batching"] is False
+    assert model.kwargs["batch_size"] == TranscriberModels.BATCH_SIZE      # чего нет в настройках — по умолчанию
+    assert model.kwargs["language"] is None                              # язык — из окна
+
+
+def test_get_model_refuses_english_only_model_for_other_language(backends):
+    with pytest.raises(ValueError, match="English-only"):
+        TranscriberModels.get_model({"backend": "local", "model": "tiny.en"}, "ru")
+    assert isinstance(TranscriberModels.get_model({"backend": "local", "model": "tiny.en"}, "en"), Local)
+
+
+def test_config_language_overrides_window_language(backends):
+    model = TranscriberModels.get_model({"backend": "local", "model": "tiny.en", "language": "en"}, "ru")
+    assert model.kwargs["language"] == "en"
+    with pytest.raises(ValueError):
+        TranscriberModels.get_model({"backend": "local", "model": "tiny.en", "language": "de"}, "en")
+    assert TranscriberModels.get_model({"backend": "api", "language": "de"}, "ru").kwargs == {"language": "de"}
+
+
+@pytest.mark.parametrize("width", [1, 2, 3, 4])
+def test_audio_to_float32_scales_every_sample_width(width):
+    limit = 1 << (8 * width - 1)
+    pcm = dsp.from_samples([-limit, 0, limit // 2, limit - 1], width)
+    if width == 1:
+        pcm = dsp.bias(pcm, 1, 128)         # 8 бит в AudioData — беззнаковые
+    samples = TranscriberModels.audio_to_float32(sr.AudioData(memoryview(pcm), RATE, width))
+    assert samples.dtype == np.float32
+    assert samples.tolist() == pytest.approx([-1.0, 0.0, 0.5, 1.0], abs=1.0 / limit)
+
+
+@pytest.fixture(params=["audioop", "numpy"])
+def dsp_backend(request):
+    previous = dsp.get_backend()
+    try:
+        dsp.set_backend(request.param)
+    except dsp.DSPError:
+        pytest.skip(f"{request.param} backend is not available")
+    yield request.param
+    dsp.set_backend(previous)
+
+
+@pytest.mark.parametrize("width", [1, 2, 3])
+def test_audio_to_float32_resamples_like_audio_data(width, dsp_backend):
+    t = np.arange(48000) / 48000
+    pcm = dsp.from_samples(0.5 * (1 << (8 * width - 1)) * np.sin(2 * np.pi * 200 * t), width)
+    if width == 1:
+        pcm = dsp.bias(pcm, 1, 128)
+    audio = sr.AudioData(pcm, 48000, width)
+    samples = TranscriberModels.audio_to_float32(audio)
+    expected = dsp.to_samples(audio.get_raw_data(convert_rate=RATE), width) / float(1 << (8 * width - 1))
+    assert len(samples) == len(expected)
+    assert np.allclose(samples, expected)
+    assert abs(len(samples) - RATE) <= 1
+
+
+def test_audio_to_wav_file_holds_the_phrase_in_memory():
+    pcm = dsp.from_samples(np.arange(-800, 800, 7), 2)
+    audio = sr.AudioData(memoryview(pcm), RATE, 2)
+    wav_file = TranscriberModels.audio_to_wav_file(audio)
+    assert wav_file.name == "audio.wav"          # по расширению API узнаёт формат
+    assert wav_file.tell() == 0
+    assert wav_file.getvalue() == audio.get_wav_data()
+    with wave.open(wav_file) as wf:
+        assert (wf.getnchannels(), wf.getsampwidth(), wf.getframerate()) == (1, 2, RATE)
+        assert wf.readframes(wf.getnframes()) == pcm
@@ -0,0 +1,96 @@
+import asyncio
+
+from transcription_scheduler import TranscriptionScheduler, FINAL, PARTIAL
+
+
+def job(delay, result, log=None):
+    async def run():
+        await asyncio.sleep(delay)
+        if log is not None:
+            log.append(("run", result))
+        return result
+    return run
+
+
+def test_commits_follow_submission_order_per_source():
+    async def main():
+        scheduler = TranscriptionScheduler(concurrency=3)
+        scheduler.start()
+        committed = []
+        for delay, text in [(0.05, "long"), (0.01, "short"), (0.0, "shortest")]:
+            scheduler.submit("You", text, job(delay, text), committed.append)
+        await scheduler.join()
+        await scheduler.close()
+        return committed
+
+    assert asyncio.run(main()) == ["long", "short", "shortest"]
+
+
+def test_priority_runs_finals_first_then_source_priority():
+    async def main():
+        scheduler = TranscriptionScheduler(concurrency=1, source_priority={"Speaker": 0, "You": 1})
+        log = []
+        scheduler.start()
+        scheduler.submit("You", 0, job(0, "you-partial", log), lambda r: None, kind=PARTIAL)
+        scheduler.submit("You", 1, job(0, "you-final", log), lambda r: None, kind=FINAL)
+        scheduler.submit("Speaker", 0, job(0, "speaker-final", log), lambda r: None)
+        await scheduler.join()
+        await scheduler.close()
+        return [name for _, name in log]
+
+    assert asyncio.run(main()) == ["speaker-final", "you-final", "you-partial"]
+
+
+def test_cancel_skips_queued_and_interrupts_running():
+    async def main():
+        scheduler = TranscriptionScheduler(concurrency=1)
+        scheduler.start()
+        committed = []
+        scheduler.submit("You", 0, job(1.0, "running"), committed.append, seconds=2.0)
+        scheduler.submit("You", 1, job(0, "queued"), committed.append, seconds=1.0)
+        scheduler.submit("You", 2, job(0, "kept"), committed.append)
+        await asyncio.sleep(0.01)
+        assert scheduler.cancel(phrase_id=0) == 1
+        assert scheduler.cancel(phrase_id=1) == 1
+        await scheduler.join()
+        await scheduler.close()
+        return committed, scheduler.stats()
+
+    committed, stats = asyncio.run(main())
+    assert committed == ["kept"]
+    assert stats["cancelled_running"] == 1
+    assert stats["cancelled_queued"] == 1
+    assert stats["cancelled_seconds"] == 3.0
+
+
+def test_supersede_replaces_only_queued_partials():
+    async def main():
+        scheduler = TranscriptionScheduler(concurrency=1)
+        scheduler.start()
+        committed = []
+        for text in ("first", "second", "third"):
+            scheduler.submit("You", 0, job(0.02, text), committed.append, kind=PARTIAL, supersede=True)
+            await asyncio.sleep(0.001)
+        await scheduler.join()
+        await scheduler.close()
+        return committed
+
+    assert asyncio.run(main()) == ["first", "third"]
+
+
+def test_close_returns_while_jobs_are_running():
+    async def main():
+        scheduler = TranscriptionScheduler(concurrency=2)
+        scheduler.start()
+        committed = []
+        for i in range(4):
+            scheduler.submit("You", i, job(10.0, i), committed.append, seconds=1.0)
+        await asyncio.sleep(0.01)
+        await asyncio.wait_for(scheduler.close(), 1.0)
+        return committed, scheduler.stats()
+
+    committed, stats = asyncio.run(main())
+    assert committed == []
+    assert stats["running"] == 0
+    assert stats["cancelled_running"] == 2
+    assert stats["cancelled_queued"] == 2
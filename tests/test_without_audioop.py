@@ -0,0 +1,27 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# В отдельном интерпретаторе: audioop и aifc недоступны, как в Python 3.13+
+SCRIPT = '''
+import sys
+sys.modules["audioop"] = sys.modules["aifc"] = None
+
+import numpy as np
+import custom_speech_recognition as sr
+from custom_speech_recognition import dsp
+
+assert dsp.get_backend().name == "numpy"
+samples = (8000 * np.sin(2 * np.pi * 200 * np.arange(16000) / 16000)).astype("<i2")
+audio = sr.AudioData(samples.tobytes(), 16000, 2)
+raw = audio.get_raw_data(convert_rate=8000, convert_width=1)
+assert abs(len(raw) - 8000) <= 1
+assert audio.get_wav_data().startswith(b"RIFF")
+'''
+
+
+def test_package_works_without_audioop_and_aifc():
+    result = subprocess.run([sys.executable, "-c", SCRIPT], cwd=ROOT, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,57 @@
+import re
+
+MAX_OVERLAP_WORDS = 20
+# Совпадение из одного слова («the», «это») случайно слишком часто — выкидывать по нему нельзя
+MIN_OVERLAP_WORDS = 2
+
+_PUNCT = re.compile(r"[^\w]+", re.UNICODE)
+
+
+def _norm(word):
+    return _PUNCT.sub("", word).lower()
+
+
+def merge_overlap(previous, text, max_words=MAX_OVERLAP_WORDS, min_words=MIN_OVERLAP_WORDS):
+    """
+    Склеивает распознанный текст соседних перекрывающихся окон: ищет самый длинный
+    хвост previous (не короче min_words слов), который повторяется в начале text, и выкидывает повтор.
+    Первое слово text может быть обрезано границей окна, поэтому при совпадении хотя бы
+    из min_words + 1 слов допускается его пропуск. Без совпадения тексты просто соединяются.
+    """
+    if not previous:
+        return text
+    if not text:
+        return previous
+    prev_words = previous.split()
+    words = text.split()
+    prev_norm = [_norm(w) for w in prev_words]
+    norm = [_norm(w) for w in words]
+    for k in range(min(len(prev_words), len(words), max_words), min_words - 1, -1):
+        tail = prev_norm[-k:]
+        if not any(tail):
+            continue
+        for skip in (0, 1) if k > min_words else (0,):
+            if norm[skip:skip + k] == tail:
+                return " ".join(prev_words + words[skip + k:])
+    return " ".join(prev_words + words)
+
+
+class StablePrefix:
+    """
+    Политика «согласованного префикса» для промежуточных гипотез растущей фразы:
+    слово становится подтверждённым, когда две гипотезы подряд совпадают до него включительно.
+    Подтверждённые слова больше не меняются, даже если следующие гипотезы их переписывают.
+    """
+    def __init__(self):
+        self.committed = []
+        self._previous = []
+
+    def update(self, hypothesis):
+        """Возвращает (подтверждённый текст, неподтверждённый хвост последней гипотезы)."""
+        rest = hypothesis.split()[len(self.committed):]
+        n = 0
+        while n < min(len(rest), len(self._previous)) and _norm(rest[n]) == _norm(self._previous[n]):
+            n += 1
+        self.committed += rest[:n]
+        self._previous = rest[n:]
+        return " ".join(self.committed), " ".join(rest[n:])
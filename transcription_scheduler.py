@@ -0,0 +1,196 @@
+import asyncio
+import itertools
+
+# Ранги видов заданий: итоговый текст фраз важнее промежуточных гипотез
+FINAL = 0
+PARTIAL = 1
+
+
+class TranscriptionJob:
+    """
+    Одно задание распознавания: run() — корутина с результатом, commit(result) — применение результата.
+    Задание служит и токеном отмены: после cancel() результат не фиксируется, а выполняющаяся
+    корутина отменяется (запрос к API обрывается вместе с ней).
+    """
+    __slots__ = ("who", "phrase_id", "kind", "run", "commit", "ticket", "seconds", "cancelled", "task")
+
+    def __init__(self, who, phrase_id, kind, run, commit, ticket=None, seconds=0.0):
+        self.who = who
+        self.phrase_id = phrase_id
+        self.kind = kind
+        self.run = run
+        self.commit = commit
+        self.ticket = ticket    # порядковый номер для FIFO-фиксации (None — фиксировать сразу)
+        self.seconds = seconds  # длительность аудио — для учёта сэкономленной отменой работы
+        self.cancelled = False
+        self.task = None        # выполняющаяся корутина run()
+
+    def cancel(self):
+        """Возвращает True, если задание было отменено этим вызовом."""
+        if self.cancelled:
+            return False
+        self.cancelled = True
+        if self.task is not None:
+            self.task.cancel()
+        return True
+
+
+class TranscriptionScheduler:
+    """
+    Ограниченный планировщик заданий распознавания для одного бэкенда.
+
+    * Не больше concurrency заданий одновременно (лимит бэкенда: API / локальная модель).
+    * Очередь с приоритетом: сначала итоговые задания, потом промежуточные; внутри —
+      по source_priority (меньше — раньше, например Speaker раньше You), затем по времени постановки.
+    * Итоговые задания одного источника фиксируются (commit) строго в порядке постановки:
+      результат короткой фразы ждёт, пока распознается длинная, поставленная раньше.
+      Промежуточные фиксируются сразу — они всё равно перезаписываются.
+    * Устаревшие задания отменяются (cancel / cancel_all): из очереди они выбрасываются
+      не запускаясь, выполняющиеся прерываются. Новое задание с supersede=True заменяет
+      ещё не запущенные задания того же источника, фразы и вида (начатое доработает).
+
+    Все методы, кроме stats(), вызываются из потока asyncio-цикла; start() — внутри работающего цикла.
+    """
+    def __init__(self, concurrency=1, source_priority=None):
+        self.concurrency = max(1, int(concurrency))
+        self.source_priority = source_priority or {}
+        self._seq = itertools.count()
+        self._queue = None
+        self._workers = []
+        self._next_ticket = {}      # who -> номер следующего итогового задания
+        self._next_commit = {}      # who -> номер задания, которое фиксируется следующим
+        self._ready = {}            # who -> {номер: (job, result)} — готовы, ждут своей очереди
+        self._live = set()          # поставленные и ещё не зафиксированные задания
+
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.running = 0
+        self.max_backlog = 0
+        self.cancelled_queued = 0       # отменены до запуска
+        self.cancelled_running = 0      # прерваны во время распознавания
+        self.cancelled_seconds = 0.0    # секунд аудио, которые не пришлось (до)распознавать
+
+    def start(self):
+        self._queue = asyncio.PriorityQueue()
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    def submit(self, who, phrase_id, run, commit, kind=FINAL, seconds=0.0, supersede=False):
+        if supersede:
+            self.cancel(who, phrase_id, kind, running=False)
+        ticket = None
+        if kind == FINAL:
+            ticket = self._next_ticket.get(who, 0)
+            self._next_ticket[who] = ticket + 1
+        job = TranscriptionJob(who, phrase_id, kind, run, commit, ticket, seconds)
+        self._live.add(job)
+        self._queue.put_nowait(((kind, self.source_priority.get(who, 0), next(self._seq)), job))
+        self.submitted += 1
+        self.max_backlog = max(self.max_backlog, self._queue.qsize())
+        return job
+
+    def cancel(self, who=None, phrase_id=None, kind=None, running=True):
+        """
+        Отменяет незавершённые задания, подходящие под фильтр (None — любое значение); возвращает их число.
+        running=False — только ещё не запущенные.
+        """
+        count = 0
+        for job in list(self._live):
+            if ((who is None or job.who == who) and (phrase_id is None or job.phrase_id == phrase_id)
+                    and (kind is None or job.kind == kind)):
+                started, finished = job.task is not None, job.task is not None and job.task.done()
+                if (started and not running) or not job.cancel():
+                    continue
+                count += 1
+                if finished:
+                    continue    # уже распознано и ждёт очереди фиксации — просто не фиксируем
+                self.cancelled_seconds += job.seconds
+                if started:
+                    self.cancelled_running += 1
+                else:
+                    self.cancelled_queued += 1
+        return count
+
+    def cancel_all(self):
+        return self.cancel()
+
+    async def _worker(self):
+        while True:
+            _, job = await self._queue.get()
+            result = None
+            if not job.cancelled:
+                self.running += 1
+                job.task = asyncio.ensure_future(job.run())
+                try:
+                    # wait(), а не await job.task: отмена задания не попадает в обработчик,
+                    # и любой CancelledError здесь — отмена самого обработчика (close / остановка цикла)
+                    await asyncio.wait((job.task,))
+                except asyncio.CancelledError:
+                    job.task.cancel()
+                    raise
+                finally:
+                    self.running -= 1
+                if job.task.cancelled():
+                    pass                # отменено через cancel() — фиксировать нечего
+                elif job.task.exception() is not None:
+                    print(f"Transcription task error: {job.task.exception()}")
+                    self.failed += 1
+                else:
+                    result = job.task.result()
+                    self.completed += 1
+            self._finish(job, result)
+            self._queue.task_done()     # после фиксации — join() дожидается и её
+
+    def _finish(self, job, result):
+        if job.ticket is None:
+            self._commit(job, result)
+            return
+        ready = self._ready.setdefault(job.who, {})
+        ready[job.ticket] = (job, result)
+        next_ticket = self._next_commit.get(job.who, 0)
+        while next_ticket in ready:
+            done, done_result = ready.pop(next_ticket)
+            next_ticket += 1
+            self._next_commit[job.who] = next_ticket
+            self._commit(done, done_result)
+
+    def _commit(self, job, result):
+        self._live.discard(job)
+        if job.cancelled:
+            return              # отменённое задание только сдвигает очередь фиксации
+        try:
+            job.commit(result)
+        except Exception as e:
+            print(f"Transcription commit error: {e}")
+
+    async def close(self, timeout=None):
+        """
+        Отменяет все задания и останавливает обработчики. Ждёт их не дольше timeout секунд
+        (None — без ограничения); возвращает False, если кто-то не остановился за это время.
+        """
+        self.cancel_all()
+        workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.cancel()
+        if not workers:
+            return True
+        _, pending = await asyncio.wait(workers, timeout=timeout)
+        return not pending
+
+    async def join(self):
+        """Ждёт, пока все поставленные задания выполнятся и зафиксируются."""
+        await self._queue.join()
+
+    def stats(self):
+        return {
+            "concurrency": self.concurrency,
+            "backlog": self._queue.qsize() if self._queue is not None else 0,
+            "running": self.running,
+            "max_backlog": self.max_backlog,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "cancelled_queued": self.cancelled_queued,
+            "cancelled_running": self.cancelled_running,
+            "cancelled_seconds": round(self.cancelled_seconds, 1),
+        }